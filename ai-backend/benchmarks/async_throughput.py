@@ -0,0 +1,103 @@
+"""
+Async Throughput Benchmark for /chat
+
+Drives the chat endpoint with an increasing number of concurrent clients
+against a simulated LLM and reports throughput, mean latency and event-loop
+lag (how long a /health probe waits while the graph is busy).
+
+Two LLM modes are compared:
+- blocking: the LLM call sleeps synchronously (old graph.invoke behaviour)
+- async:    the LLM call awaits, so other requests keep flowing
+
+Usage:
+    python benchmarks/async_throughput.py --latency-ms 300 --requests 64
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Offline stand-ins: no API key or network needed
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("EMBEDDINGS_PROVIDER", "hashing")
+
+import graph
+from main import health_check
+from routers import chat as chat_router
+from services.fake_providers import FakeChatModel
+
+
+async def _probe_health(stop: asyncio.Event, lags: list):
+    """Measure how late a /health call is served while chats are in flight"""
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await health_check()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - t0 - 0.01)
+
+
+async def run_level(concurrency: int, total: int, run_id: str) -> dict:
+    queue = asyncio.Queue()
+    for i in range(total):
+        # Unique queries so every request misses the cache
+        queue.put_nowait(f"benchmark {run_id} question {i} about patience")
+
+    latencies = []
+
+    async def client():
+        while not queue.empty():
+            message = queue.get_nowait()
+            t0 = time.perf_counter()
+            await chat_router.chat(chat_router.ChatRequest(message=message))
+            latencies.append(time.perf_counter() - t0)
+
+    stop = asyncio.Event()
+    lags = []
+    probe = asyncio.create_task(_probe_health(stop, lags))
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+
+    stop.set()
+    await probe
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "elapsed_s": elapsed,
+        "throughput_rps": total / elapsed,
+        "mean_latency_ms": 1000 * sum(latencies) / len(latencies),
+        "max_health_lag_ms": 1000 * max(lags, default=0.0),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark /chat throughput under concurrency")
+    parser.add_argument("--latency-ms", type=float, default=300, help="Simulated LLM latency per call")
+    parser.add_argument("--requests", type=int, default=64, help="Requests per concurrency level")
+    parser.add_argument("--levels", default="1,2,4,8,16,32", help="Comma-separated client counts")
+    parser.add_argument("--modes", default="blocking,async", help="LLM modes to compare")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.levels.split(",")]
+
+    print(f"Simulated LLM latency: {args.latency_ms:.0f} ms | "
+          f"requests/level: {args.requests} | worker cap: {chat_router.MAX_CONCURRENT_CHATS}\n")
+    print(f"{'mode':<10}{'clients':>8}{'req/s':>10}{'mean ms':>10}{'health lag ms':>15}")
+
+    for mode in args.modes.split(","):
+        graph.llm = FakeChatModel(latency_ms=args.latency_ms, blocking=(mode == "blocking"))
+        for level in levels:
+            result = await run_level(level, args.requests, run_id=f"{mode}-{level}")
+            print(f"{mode:<10}{result['concurrency']:>8}{result['throughput_rps']:>10.1f}"
+                  f"{result['mean_latency_ms']:>10.0f}{result['max_health_lag_ms']:>15.0f}")
+        print()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
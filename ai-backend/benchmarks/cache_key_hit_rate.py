@@ -0,0 +1,133 @@
+"""
+Cache Key Hit Rate: lower/strip vs normalize_query
+
+Replays a query log against an unbounded cache twice, keyed by the old
+lower().strip() and by services/query_normalizer.normalize_query, and
+reports hit rates, distinct keys and the normalization cost per query.
+
+Without --log, a synthetic log is generated from benchmarks/data/
+intent_queries.jsonl plus a few Arabic queries: every question is asked
+several times with the spelling noise real users produce (case, spacing,
+punctuation, fillers, transliteration variants, tashkeel). Since each
+synthetic query knows its source question, the report also counts false
+merges (different questions sharing a key).
+
+Usage:
+    python benchmarks/cache_key_hit_rate.py
+    python benchmarks/cache_key_hit_rate.py --log logs/queries.jsonl
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.query_normalizer import PHRASES, WORDS, normalize_query
+
+DEFAULT_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "intent_queries.jsonl")
+
+ARABIC_QUERIES = [
+    ("دُعَاءٌ لِلسَّفَرِ", "دعاء للسفر"),
+    ("مَا هِيَ آيَةُ الْكُرْسِيِّ؟", "ما هي اية الكرسي"),
+    ("دُعَاءُ لَيْلَةِ الْقَدْرِ", "دعاء ليلة القدر"),
+    ("كَيْفَ أُصَلِّي صَلَاةَ الِاسْتِخَارَةِ", "كيف اصلي صلاة الاستخارة"),
+]
+FILLERS = ["please ", "hey ", "hi, ", "", "", ""]
+ENDINGS = ["", "", "?", "??", "!", ".", " ?"]
+
+# canonical -> spellings, for injecting transliteration variants
+VARIANTS = {**PHRASES, **WORDS}
+
+
+def perturb(query, rng):
+    """One noisy way a user might type query"""
+    text = query
+    for canonical, spellings in VARIANTS.items():
+        if canonical in text.lower() and rng.random() < 0.5:
+            start = text.lower().index(canonical)
+            text = text[:start] + rng.choice(spellings) + text[start + len(canonical):]
+
+    roll = rng.random()
+    if roll < 0.3:
+        text = text.lower()
+    elif roll < 0.5:
+        text = text.capitalize()
+    elif roll < 0.55:
+        text = text.upper()
+
+    if rng.random() < 0.2:
+        text = text.replace(" ", "  ", 1)
+    return rng.choice(FILLERS) + text.strip() + rng.choice(ENDINGS)
+
+
+def synthetic_log(path, repeats, seed):
+    """[(query, source id)]: each question asked repeats times in varied spellings, shuffled"""
+    rng = random.Random(seed)
+    with open(path, "r", encoding="utf-8") as f:
+        bases = [json.loads(line)["query"] for line in f if line.strip()]
+
+    log = []
+    for i, base in enumerate(bases):
+        log.extend((perturb(base, rng), i) for _ in range(repeats))
+    for j, (voweled, plain) in enumerate(ARABIC_QUERIES, start=len(bases)):
+        log.extend((rng.choice([voweled, plain, plain + "؟"]), j) for _ in range(repeats))
+    rng.shuffle(log)
+    return log
+
+
+def read_log(path):
+    with open(path, "r", encoding="utf-8") as f:
+        rows = [line.strip() for line in f if line.strip()]
+    return [(json.loads(row)["query"] if row.startswith("{") else row, None) for row in rows]
+
+
+def replay(log, key_fn):
+    seen = {}
+    hits = false_merges = 0
+    for query, source in log:
+        key = key_fn(query)
+        if key in seen:
+            hits += 1
+            if source is not None and seen[key] != source:
+                false_merges += 1
+        else:
+            seen[key] = source
+    return {"hits": hits, "hit_rate": hits / len(log) if log else 0.0, "keys": len(seen), "false_merges": false_merges}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare cache hit rates with and without query normalization")
+    parser.add_argument("--log", help="Query log: JSONL with a query field, or one query per line")
+    parser.add_argument("--data", default=DEFAULT_DATA, help="Source questions for the synthetic log")
+    parser.add_argument("--repeats", type=int, default=5, help="Synthetic askings per question")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    log = read_log(args.log) if args.log else synthetic_log(args.data, args.repeats, args.seed)
+    synthetic = not args.log
+
+    baseline = replay(log, lambda q: q.lower().strip())
+    normalized = replay(log, normalize_query)
+
+    queries = [q for q, _ in log]
+    t0 = time.perf_counter()
+    for query in queries:
+        normalize_query.__wrapped__(query)
+    uncached_us = (time.perf_counter() - t0) / len(queries) * 1e6
+
+    print(f"\n{len(log)} queries ({'synthetic' if synthetic else args.log})")
+    print(f"\n{'key':<16}{'hit rate':>10}{'keys':>8}" + (f"{'false merges':>14}" if synthetic else ""))
+    for name, result in (("lower/strip", baseline), ("normalized", normalized)):
+        line = f"{name:<16}{result['hit_rate']:>10.1%}{result['keys']:>8}"
+        if synthetic:
+            line += f"{result['false_merges']:>14}"
+        print(line)
+    print(f"\nnormalize_query: {uncached_us:.1f} us/query uncached")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Offline Evaluation of the Local Intent Classifier
+
+Compares services/intent_classifier.py against reference labels and reports
+accuracy, how many queries it would answer without the LLM, and the
+latency that saves.
+
+Reference labels come from the "llm_intent" field when present (written by
+--label, which asks the analyzer LLM), otherwise from the hand-labelled
+"intent" field.
+
+Usage:
+    python benchmarks/eval_intent_classifier.py
+    python benchmarks/eval_intent_classifier.py --label --out benchmarks/data/intent_queries.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.intent_classifier import INTENTS, intent_classifier
+
+DEFAULT_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "intent_queries.jsonl")
+
+
+def load_rows(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def label_with_llm(rows):
+    """Fill llm_intent for every row via the analyzer prompt; returns mean latency (s)"""
+    from graph import llm_classify_intent
+
+    latencies = []
+    for row in rows:
+        t0 = time.perf_counter()
+        row["llm_intent"] = await llm_classify_intent(row["query"])
+        latencies.append(time.perf_counter() - t0)
+        print(f"  {row['llm_intent']:<10} {row['query']}")
+    return sum(latencies) / len(latencies)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the local intent classifier")
+    parser.add_argument("--data", default=DEFAULT_DATA, help="JSONL with query + intent / llm_intent")
+    parser.add_argument("--threshold", type=float, default=float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.85")))
+    parser.add_argument("--label", action="store_true", help="Label queries with the analyzer LLM first")
+    parser.add_argument("--out", help="Where to write labelled rows (with --label)")
+    parser.add_argument("--llm-latency-ms", type=float, default=800,
+                        help="Analyzer LLM latency used for savings when not measured via --label")
+    args = parser.parse_args()
+
+    rows = load_rows(args.data)
+    llm_latency_s = args.llm_latency_ms / 1000
+
+    if args.label:
+        print(f"Labelling {len(rows)} queries with the LLM...")
+        llm_latency_s = asyncio.run(label_with_llm(rows))
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            print(f"✓ Wrote labels to {args.out}")
+
+    intent_classifier.model  # train before timing
+
+    correct = confident = confident_correct = 0
+    timings = []
+    confusion = {expected: {predicted: 0 for predicted in INTENTS} for expected in INTENTS}
+    mistakes = []
+
+    for row in rows:
+        expected = row.get("llm_intent") or row["intent"]
+
+        t0 = time.perf_counter()
+        predicted, confidence = intent_classifier.classify(row["query"])
+        timings.append(time.perf_counter() - t0)
+
+        confusion[expected][predicted] += 1
+        correct += predicted == expected
+        if confidence >= args.threshold:
+            confident += 1
+            confident_correct += predicted == expected
+            if predicted != expected:
+                mistakes.append((row["query"], expected, predicted, confidence))
+
+    total = len(rows)
+    print(f"\nQueries: {total} | threshold: {args.threshold}")
+    print(f"Accuracy (all):             {correct / total:.1%}")
+    print(f"Coverage (answered locally): {confident / total:.1%}")
+    if confident:
+        print(f"Accuracy (answered locally): {confident_correct / confident:.1%}")
+
+    print(f"\nClassifier latency: mean {1e6 * sum(timings) / total:.1f} µs | "
+          f"p99 {1e6 * percentile(timings, 99):.1f} µs")
+    print(f"LLM latency assumed: {llm_latency_s * 1000:.0f} ms per analyzer call")
+    print(f"Latency saved: {llm_latency_s * confident:.1f} s over {total} queries "
+          f"({llm_latency_s * confident / total * 1000:.0f} ms per query on average)")
+
+    print("\nConfusion (rows = reference, cols = predicted):")
+    print(" " * 12 + "".join(f"{i:>11}" for i in INTENTS))
+    for expected in INTENTS:
+        print(f"{expected:<12}" + "".join(f"{confusion[expected][p]:>11}" for p in INTENTS))
+
+    if mistakes:
+        print("\nConfident mistakes:")
+        for query, expected, predicted, confidence in mistakes:
+            print(f"  [{expected} -> {predicted} {confidence:.2f}] {query}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Load Test for the /chat Pipeline
+
+Drives POST /chat/ with a configurable number of concurrent clients and a
+mix of dua / ask_hafiz / watch queries. A share of requests repeats an
+earlier query so response_cache hits are exercised alongside misses.
+
+Reports throughput, p50/p95/p99 latency, cache hit rate and the share of
+node time per graph node, and writes everything to a JSON file so runs can
+be compared across commits.
+
+By default the FastAPI app from main.py runs in-process (httpx ASGI
+transport) against the offline fake LLM and hashing embeddings. --url
+targets a running server instead; start it with LLM_PROVIDER=fake
+EMBEDDINGS_PROVIDER=hashing to keep it offline.
+
+Usage:
+    python benchmarks/load_test.py --concurrency 16 --requests 400
+    python benchmarks/load_test.py --mix dua=0.2,ask_hafiz=0.6,watch=0.2 --repeat-ratio 0.7
+    python benchmarks/load_test.py --url http://localhost:8000 --out results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "intent_queries.jsonl")
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(","):
+        intent, weight = part.split("=")
+        mix[intent.strip()] = float(weight)
+    return mix
+
+
+def load_queries(path):
+    by_intent = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                by_intent.setdefault(row["intent"], []).append(row["query"])
+    return by_intent
+
+
+def build_workload(by_intent, mix, total, repeat_ratio, rng, run_tag):
+    """
+    Return [(intent, query)]: fresh queries (dataset query + unique suffix,
+    a guaranteed cache miss) or, with probability repeat_ratio, a query
+    already issued earlier in this run
+    """
+    intents = list(mix)
+    weights = [mix[i] for i in intents]
+    issued = {intent: [] for intent in intents}
+    workload = []
+
+    for i in range(total):
+        intent = rng.choices(intents, weights)[0]
+        if issued[intent] and rng.random() < repeat_ratio:
+            query = rng.choice(issued[intent])
+        else:
+            query = f"{rng.choice(by_intent[intent])} ({run_tag}-{i})"
+            issued[intent].append(query)
+        workload.append((intent, query))
+    return workload
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+async def make_client(url):
+    import httpx
+
+    if url:
+        return httpx.AsyncClient(base_url=url, timeout=120)
+
+    # Offline stand-ins unless the caller chose otherwise
+    os.environ.setdefault("LLM_PROVIDER", "fake")
+    os.environ.setdefault("EMBEDDINGS_PROVIDER", "hashing")
+    from main import app
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=120)
+
+
+async def cache_counts(client):
+    stats = (await client.get("/cache/stats")).json()["cache_stats"]
+    return stats["hits"], stats["misses"]
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    by_intent = load_queries(args.data)
+    mix = parse_mix(args.mix)
+    run_tag = f"lt{int(time.time())}"
+
+    client = await make_client(args.url)
+    async with client:
+        # Warm-up requests are not measured (imports, model init, first index loads)
+        warmup = build_workload(by_intent, mix, args.warmup, 0.0, rng, f"{run_tag}w")
+        for _, query in warmup:
+            await client.post("/chat/", json={"message": query})
+
+        await client.post("/metrics/nodes/reset")
+        hits_before, misses_before = await cache_counts(client)
+
+        workload = build_workload(by_intent, mix, args.requests, args.repeat_ratio, rng, run_tag)
+        queue = asyncio.Queue()
+        for item in workload:
+            queue.put_nowait(item)
+
+        latencies = {intent: [] for intent in mix}
+        errors = 0
+
+        async def worker():
+            nonlocal errors
+            while not queue.empty():
+                intent, query = queue.get_nowait()
+                t0 = time.perf_counter()
+                try:
+                    response = await client.post("/chat/", json={"message": query})
+                    ok = response.status_code == 200
+                except Exception:
+                    ok = False
+                elapsed = time.perf_counter() - t0
+                if ok:
+                    latencies[intent].append(elapsed)
+                else:
+                    errors += 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        wall = time.perf_counter() - t0
+
+        hits_after, misses_after = await cache_counts(client)
+        nodes = (await client.get("/metrics/nodes")).json()["nodes"]
+
+    all_latencies = [v for values in latencies.values() for v in values]
+    hits, misses = hits_after - hits_before, misses_after - misses_before
+
+    def summary(values):
+        return {
+            "count": len(values),
+            "mean_ms": 1000 * sum(values) / len(values) if values else 0.0,
+            "p50_ms": 1000 * percentile(values, 50),
+            "p95_ms": 1000 * percentile(values, 95),
+            "p99_ms": 1000 * percentile(values, 99),
+        }
+
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "target": args.url or "in-process",
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "mix": mix,
+            "repeat_ratio": args.repeat_ratio,
+            "seed": args.seed,
+            "llm_provider": os.getenv("LLM_PROVIDER"),
+            "fake_llm_latency_ms": os.getenv("FAKE_LLM_LATENCY_MS", "300"),
+        },
+        "elapsed_s": wall,
+        "throughput_rps": len(all_latencies) / wall if wall else 0.0,
+        "errors": errors,
+        "latency": summary(all_latencies),
+        "latency_by_intent": {intent: summary(values) for intent, values in latencies.items()},
+        "cache": {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        },
+        "nodes": nodes,
+    }
+
+
+def print_report(result):
+    latency = result["latency"]
+    print(f"\nTarget: {result['config']['target']} | clients: {result['config']['concurrency']} | "
+          f"requests: {result['config']['requests']} | repeat ratio: {result['config']['repeat_ratio']}")
+    print(f"Throughput: {result['throughput_rps']:.1f} req/s over {result['elapsed_s']:.1f}s "
+          f"({result['errors']} errors)")
+    print(f"Latency ms: p50 {latency['p50_ms']:.0f} | p95 {latency['p95_ms']:.0f} | "
+          f"p99 {latency['p99_ms']:.0f} | mean {latency['mean_ms']:.0f}")
+    print(f"Cache hit rate: {result['cache']['hit_rate']:.1%} "
+          f"({result['cache']['hits']} hits / {result['cache']['misses']} misses)")
+
+    print(f"\n{'intent':<12}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for intent, s in result["latency_by_intent"].items():
+        print(f"{intent:<12}{s['count']:>6}{s['p50_ms']:>10.0f}{s['p95_ms']:>10.0f}{s['p99_ms']:>10.0f}")
+
+    print(f"\n{'node':<22}{'runs':>6}{'mean ms':>10}{'share':>8}")
+    for name, node in sorted(result["nodes"].items(), key=lambda item: -item[1]["share"]):
+        print(f"{name:<22}{node['count']:>6}{node['mean_ms']:>10.1f}{node['share']:>8.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the /chat pipeline")
+    parser.add_argument("--url", help="Target a running server instead of the in-process app")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests sent first")
+    parser.add_argument("--mix", default="dua=0.3,ask_hafiz=0.5,watch=0.2", help="Intent weights")
+    parser.add_argument("--repeat-ratio", type=float, default=0.5, help="Share of requests repeating an earlier query")
+    parser.add_argument("--data", default=DEFAULT_DATA, help="JSONL of labelled queries")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Write the JSON results here")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print_report(result)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"\n✓ Wrote results to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
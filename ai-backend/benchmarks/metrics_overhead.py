@@ -0,0 +1,138 @@
+"""
+Metrics Overhead Benchmark
+
+Measures what the pipeline metrics cost: timed_node() around every graph
+node and timed_llm_call() around every LLM call, on vs off.
+
+- per call: a no-op node / LLM call with and without the wrapper (the
+  "off" LLM call still applies the timeout via asyncio.wait_for, as the
+  graph would without metrics)
+- per request: the compiled two_step graph with both wrappers vs a graph
+  built with them replaced by pass-throughs, on unique (cache-missing)
+  queries against the fake LLM. The default 0 ms LLM latency is the worst
+  case; the overhead is also reported as a share of a request at
+  --request-ms (a typical real LLM round trip)
+
+Usage:
+    python benchmarks/metrics_overhead.py
+    python benchmarks/metrics_overhead.py --calls 200000 --requests 500 --request-ms 800
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Offline stand-ins: no API key or network needed
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("EMBEDDINGS_PROVIDER", "hashing")
+os.environ.setdefault("FAKE_LLM_LATENCY_MS", "0")
+
+from services.metrics import timed_llm_call, timed_node
+
+
+async def _noop_node(state):
+    return {}
+
+
+async def _noop_call():
+    return None
+
+
+async def _untimed_llm_call(node, call, timeout=None):
+    return await asyncio.wait_for(call(), timeout)
+
+
+async def per_call_us(calls: int, repeats: int = 5) -> dict:
+    """Best-of-repeats microseconds per no-op call, bare and wrapped"""
+    timed = timed_node("benchmark", _noop_node)
+    variants = {
+        "node_off_us": lambda: _noop_node({}),
+        "node_on_us": lambda: timed({}),
+        "llm_off_us": lambda: _untimed_llm_call("benchmark", _noop_call, 30.0),
+        "llm_on_us": lambda: timed_llm_call("benchmark", _noop_call, 30.0),
+    }
+    results = {name: float("inf") for name in variants}
+    for _ in range(repeats):
+        for name, fn in variants.items():
+            t0 = time.perf_counter()
+            for _ in range(calls):
+                await fn()
+            results[name] = min(results[name], 1e6 * (time.perf_counter() - t0) / calls)
+
+    results["node_overhead_us"] = results["node_on_us"] - results["node_off_us"]
+    results["llm_overhead_us"] = results["llm_on_us"] - results["llm_off_us"]
+    return results
+
+
+def build_app(metrics: bool):
+    """Compiled two_step graph with the metrics wrappers, or with pass-throughs"""
+    import graph
+
+    saved = graph.timed_node, graph.timed_llm_call
+    if not metrics:
+        graph.timed_node, graph.timed_llm_call = (lambda name, fn: fn), _untimed_llm_call
+    try:
+        return graph.build_graph("two_step")
+    finally:
+        graph.timed_node, graph.timed_llm_call = saved
+
+
+async def per_request_ms(requests: int) -> dict:
+    """Median ms per graph run with the metrics wrappers on and off (runs interleaved)"""
+    import graph
+    from services.deadline import new_deadline
+
+    apps = {"on": build_app(True), "off": build_app(False)}
+    latencies = {mode: [] for mode in apps}
+    run_id = uuid.uuid4().hex[:8]
+
+    for i in range(requests):
+        for mode, app in apps.items():
+            # Unique queries so every run misses the cache and calls the LLM
+            state = {
+                "query": f"benchmark {run_id} {mode} question {i} about patience",
+                "session_id": f"benchmark-{run_id}-{mode}-{i}",
+                "deadline": new_deadline()
+            }
+            t0 = time.perf_counter()
+            await app.ainvoke(state)
+            latencies[mode].append(1000 * (time.perf_counter() - t0))
+            graph.delete_conversation_history(state["session_id"])
+
+    return {mode: statistics.median(values) for mode, values in latencies.items()}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cost of timed_node / timed_llm_call")
+    parser.add_argument("--calls", type=int, default=100000, help="No-op calls per micro-benchmark")
+    parser.add_argument("--requests", type=int, default=200, help="Graph runs per mode")
+    parser.add_argument("--request-ms", type=float, default=800.0,
+                        help="Typical request latency to express the per-request overhead against")
+    args = parser.parse_args()
+
+    calls = await per_call_us(args.calls)
+    print("\n=== Per call (no-op) ===")
+    print(f"{'wrapper':<16}{'off (us)':>10}{'on (us)':>10}{'overhead (us)':>15}")
+    for name, key in (("timed_node", "node"), ("timed_llm_call", "llm")):
+        print(f"{name:<16}{calls[key + '_off_us']:>10.2f}{calls[key + '_on_us']:>10.2f}"
+              f"{calls[key + '_overhead_us']:>15.2f}")
+
+    await per_request_ms(5)  # imports, KB index and classifier load outside the timed runs
+    medians = await per_request_ms(args.requests)
+    on_ms, off_ms = medians["on"], medians["off"]
+    overhead_ms = on_ms - off_ms
+
+    print(f"\n=== Per request (two_step graph, {os.environ['FAKE_LLM_LATENCY_MS']} ms fake LLM) ===")
+    print(f"median off: {off_ms:.3f} ms   on: {on_ms:.3f} ms   overhead: {overhead_ms:+.3f} ms "
+          f"({100 * overhead_ms / off_ms:+.2f}%)")
+    print(f"as a share of a {args.request_ms:.0f} ms request: {100 * overhead_ms / args.request_ms:+.3f}%")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
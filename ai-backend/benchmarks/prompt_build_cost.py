@@ -0,0 +1,138 @@
+"""
+Per-Request Prompt Construction Cost: rebuilt vs prebuilt chains
+
+Before, every LLM node call built its system string, a new
+ChatPromptTemplate (parsing every message as a template, with history
+braces escaped first) and a new prompt | llm chain. graph.py now keeps
+the templates as module constants, builds the chains once per LLM
+(get_chain) and passes history through a MessagesPlaceholder.
+
+This times both paths up to the formatted messages the model receives
+(the LLM call itself is identical and left out): CPU time and bytes
+allocated per request, measured with time.process_time and tracemalloc.
+
+Usage:
+    python benchmarks/prompt_build_cost.py
+    python benchmarks/prompt_build_cost.py --iterations 5000 --history 8
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Offline stand-ins: no API key or network needed
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("EMBEDDINGS_PROVIDER", "hashing")
+
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+import graph
+
+QUERY = "How can I stay patient when my prayers seem unanswered?"
+LISTING = "\n".join(f"{i}. Lecture on patience part {i} (Omar Suleiman, 24:10)" for i in range(10))
+
+# node -> (prebuilt prompt, per-request variables, JSON output, uses history, old human message was the raw query)
+SCENARIOS = {
+    "analyzer": (graph.ANALYZER_PROMPT, {}, True, False, False),
+    "find_dua": (graph.DUA_PROMPT, {}, False, False, True),
+    "ask_hafiz": (graph.HAFIZ_PROMPT, {"quality_reminder": "", "output_format": graph.HAFIZ_JSON_FORMAT}, False, True, True),
+    "watch": (graph.WATCH_PROMPT, {"emphasis": ""}, True, False, False),
+    "watch_rerank": (graph.RERANK_PROMPT, {"listing": LISTING}, True, False, False),
+    "classify_and_answer": (graph.SINGLE_CALL_PROMPT, {}, False, True, False),
+}
+
+
+def sample_history(turns):
+    history = []
+    for i in range(turns):
+        history.append({"role": "user", "content": f"Question {i} about {{sabr}} and tawakkul in hard times?"})
+        history.append({"role": "assistant", "content": f"Assalamu alaikum. Answer {i}: " + "Be patient and trust Allah. " * 12})
+    return history
+
+
+def system_template(prompt):
+    return prompt.messages[0].prompt.template
+
+
+def rebuilt(name, history, llm):
+    """The old per-request path: f-string system, escaped history, new template and chain"""
+    prompt, variables, json_output, uses_history, raw_query = SCENARIOS[name]
+    system = system_template(prompt)
+    inline = {k: v for k, v in variables.items() if k != "listing"}  # old code f-string'ed these in
+    for key, value in inline.items():
+        system = system.replace("{" + key + "}", value)
+
+    messages = [("system", system)]
+    if uses_history:
+        for msg in history[-graph.HISTORY_WINDOW:]:
+            role = "human" if msg["role"] == "user" else "assistant"
+            messages.append((role, msg["content"].replace("{", "{{").replace("}", "}}")))
+    messages.append(("human", QUERY if raw_query else "{query}"))
+
+    template = ChatPromptTemplate.from_messages(messages)
+    chain = template | llm | JsonOutputParser() if json_output else template | llm
+    template_vars = {} if raw_query else {"query": QUERY}
+    if "listing" in variables:
+        template_vars["listing"] = variables["listing"]
+    return chain.first.invoke(template_vars)
+
+
+def prebuilt(name, history, llm):
+    """The current path: cached chain, variables only"""
+    _, variables, _, uses_history, _ = SCENARIOS[name]
+    inputs = {**variables, "query": QUERY}
+    if uses_history:
+        inputs["history"] = graph.history_messages(history)
+    return graph.get_chain(name).first.invoke(inputs)
+
+
+def measure(fn, name, history, llm, iterations):
+    """(CPU us per request, bytes allocated per request)"""
+    fn(name, history, llm)  # warm caches and lazy imports
+
+    t0 = time.process_time()
+    for _ in range(iterations):
+        fn(name, history, llm)
+    cpu_us = (time.process_time() - t0) / iterations * 1e6
+
+    samples = min(iterations, 200)
+    tracemalloc.start()
+    allocated = 0
+    for _ in range(samples):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        fn(name, history, llm)
+        allocated += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return cpu_us, allocated / samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-request prompt construction cost")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--history", type=int, default=4, help="Conversation turns (user + assistant) in history")
+    args = parser.parse_args()
+
+    llm = graph.get_llm()
+    history = sample_history(args.history)
+
+    # Same messages either way, so the model sees an identical prompt
+    for name in SCENARIOS:
+        assert rebuilt(name, history, llm).to_messages() == prebuilt(name, history, llm).to_messages(), name
+
+    print(f"\n{args.iterations} requests per node, {len(history)} history messages")
+    print(f"\n{'node':<22}{'rebuilt us':>12}{'prebuilt us':>13}{'speedup':>9}{'rebuilt KB':>12}{'prebuilt KB':>13}")
+    for name in SCENARIOS:
+        old_us, old_bytes = measure(rebuilt, name, history, llm, args.iterations)
+        new_us, new_bytes = measure(prebuilt, name, history, llm, args.iterations)
+        print(f"{name:<22}{old_us:>12.1f}{new_us:>13.1f}{old_us / new_us:>8.1f}x"
+              f"{old_bytes / 1024:>12.1f}{new_bytes / 1024:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Worker Startup Time
+
+Measures how long a fresh worker process takes until it can answer
+/health (importing main.py) and until the graph is warm (the steps of
+services/startup.warm_up), and breaks import cost down by package with
+python -X importtime. Every run is a new interpreter, as under autoscaling.
+
+Runs offline with the fake LLM and hashing embeddings unless
+LLM_PROVIDER / EMBEDDINGS_PROVIDER are set.
+
+Usage:
+    python benchmarks/startup_time.py
+    python benchmarks/startup_time.py --runs 10 --top 25 --out startup.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child: time to a servable app, then the warm-up steps
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+import main
+health_ms = (time.perf_counter() - t0) * 1000
+from services import startup
+startup.warm_up()
+print(json.dumps({"health_ms": health_ms, **startup.status()}))
+"""
+
+
+def child_env():
+    env = dict(os.environ)
+    env.setdefault("LLM_PROVIDER", "fake")
+    env.setdefault("EMBEDDINGS_PROVIDER", "hashing")
+    env["CACHE_WARMUP_ON_STARTUP"] = "false"
+    return env
+
+
+def probe_once():
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=child_env(), capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def import_times(module):
+    """{package: self ms} and {top-level import: cumulative ms} for importing module"""
+    err = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=child_env(), capture_output=True, text=True, check=True
+    ).stderr
+
+    by_package = defaultdict(float)
+    top_level = {}
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_field, cumulative_field, raw = line.split("|", 2)
+        self_us = int(self_field.split(":")[1])
+        cumulative_us = int(cumulative_field)
+        depth = (len(raw) - len(raw.lstrip(" ")) - 1) // 2
+        name = raw.strip()
+        by_package[name.split(".")[0]] += self_us / 1000
+        if depth == 0:
+            top_level[name] = cumulative_us / 1000
+    return dict(by_package), top_level
+
+
+def median(values):
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Break down worker startup time")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to time")
+    parser.add_argument("--top", type=int, default=15, help="Packages to list")
+    parser.add_argument("--out", help="Write results as JSON")
+    args = parser.parse_args()
+
+    runs = [probe_once() for _ in range(args.runs)]
+    steps = [step for step in runs[0]["timings_ms"] if step != "total"]
+    summary = {
+        "health_ms": median([run["health_ms"] for run in runs]),
+        "warm_up_ms": {step: median([run["timings_ms"][step] for run in runs]) for step in steps + ["total"]},
+        "graph_status": runs[-1]["status"],
+        "errors": runs[-1]["errors"],
+    }
+
+    print(f"\nMedian of {args.runs} fresh workers")
+    print(f"  {'import main (ready for /health)':<32}{summary['health_ms']:>8.0f} ms")
+    print(f"  {'graph warm-up (' + summary['graph_status'] + ')':<32}{summary['warm_up_ms']['total']:>8.0f} ms")
+    for step in steps:
+        print(f"    {step:<30}{summary['warm_up_ms'][step]:>8.0f} ms")
+    for step, error in summary["errors"].items():
+        print(f"    ✗ {step}: {error}")
+
+    for module in ("main", "graph"):
+        by_package, top_level = import_times(module)
+        summary[f"import_{module}"] = {"by_package_ms": by_package, "top_level_ms": top_level}
+        print(f"\nimport {module}: {sum(by_package.values()):.0f} ms, heaviest packages (self time)")
+        for package, ms in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"  {package:<32}{ms:>8.1f} ms")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
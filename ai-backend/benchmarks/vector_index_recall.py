@@ -0,0 +1,140 @@
+"""
+Vector Index Recall vs Latency and Memory
+
+Compares the compact index types of services/vector_index against the
+exact flat index on the vectors build_vector_store.py wrote to
+faiss_islamic_kb/. For every type and Matryoshka dimension it reports
+recall@1 / recall@k against exact search, single-query latency (as the KB
+fast path searches), index size and memory-mapped load time.
+
+The real index is small (one vector per KB entry), so by default the
+corpus is scaled up --scale times with noisy copies of the real vectors,
+the size the KB would be after growing 100x. Queries are noisy copies of
+random corpus vectors, so no embedding API calls are needed.
+
+Usage:
+    python benchmarks/vector_index_recall.py
+    python benchmarks/vector_index_recall.py --scale 1 --types flat,fp16,sq8 --dims full,768
+    python benchmarks/vector_index_recall.py --index .cache/faiss_kb_hashing --out recall.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import faiss
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.vector_index import INDEX_TYPES, build_index, read_index, truncate
+
+DEFAULT_INDEX = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "faiss_islamic_kb")
+
+
+def noisy_copies(vectors, count, relative_noise, rng):
+    """count unit vectors, each a random row of vectors plus noise of norm ~relative_noise"""
+    rows = vectors[rng.integers(0, len(vectors), count)]
+    noise = rng.standard_normal(rows.shape, dtype=np.float32) * (relative_noise / np.sqrt(rows.shape[1]))
+    out = np.ascontiguousarray(rows + noise, dtype="float32")
+    faiss.normalize_L2(out)
+    return out
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def evaluate(index, queries, truth, k):
+    """recall@1, recall@k and per-query latencies (us) searching one query at a time"""
+    found = np.empty_like(truth)
+    latencies = []
+    for i in range(len(queries)):
+        t0 = time.perf_counter()
+        _, ids = index.search(queries[i:i + 1], k)
+        latencies.append((time.perf_counter() - t0) * 1e6)
+        found[i] = ids[0]
+
+    recall_1 = float(np.mean(found[:, 0] == truth[:, 0]))
+    recall_k = float(np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)]))
+    return recall_1, recall_k, latencies
+
+
+def mmap_load_ms(index):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.faiss")
+        faiss.write_index(index, path)
+        t0 = time.perf_counter()
+        read_index(path, mmap=True)
+        return (time.perf_counter() - t0) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall vs latency/memory of compact KB index types")
+    parser.add_argument("--index", default=os.getenv("KB_INDEX_PATH", DEFAULT_INDEX), help="Flat index directory")
+    parser.add_argument("--types", default=",".join(INDEX_TYPES), help="Comma-separated index types")
+    parser.add_argument("--dims", default="full,1536,768", help="Comma-separated Matryoshka dimensions")
+    parser.add_argument("--scale", type=int, default=100, help="Corpus size as a multiple of the real index")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--doc-noise", type=float, default=0.6, help="Relative noise of synthetic corpus vectors")
+    parser.add_argument("--query-noise", type=float, default=0.4, help="Relative noise of queries")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Write results as JSON")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    flat = faiss.read_index(os.path.join(args.index, "index.faiss"))
+    base = flat.reconstruct_n(0, flat.ntotal)
+    corpus = base
+    if args.scale > 1:
+        corpus = np.vstack([base, noisy_copies(base, len(base) * (args.scale - 1), args.doc_noise, rng)])
+    queries = noisy_copies(corpus, args.queries, args.query_noise, rng)
+    print(f"\n{len(corpus)} vectors x {corpus.shape[1]} dims ({len(base)} real), "
+          f"{len(queries)} queries, k={args.k}")
+
+    exact = faiss.IndexFlatL2(corpus.shape[1])
+    exact.add(corpus)
+    _, truth = exact.search(queries, args.k)
+
+    dims_list = [None if d == "full" else int(d) for d in args.dims.split(",")]
+    results = []
+    print(f"\n{'type':<10}{'dims':>6}{'factory':>22}{'recall@1':>10}{f'recall@{args.k}':>10}"
+          f"{'p50 us':>9}{'p99 us':>9}{'MB':>9}{'B/vec':>8}{'build s':>9}{'mmap ms':>9}")
+    for kind in args.types.split(","):
+        for dims in dims_list:
+            t0 = time.perf_counter()
+            index, meta = build_index(corpus, kind, dims)
+            build_s = time.perf_counter() - t0
+
+            recall_1, recall_k, latencies = evaluate(index, truncate(queries, dims), truth, args.k)
+            size = faiss.serialize_index(index).size
+            row = {
+                "type": kind,
+                "dims": meta["dims"] or meta["source_dims"],
+                "factory": meta["factory"],
+                "recall_at_1": round(recall_1, 4),
+                f"recall_at_{args.k}": round(recall_k, 4),
+                "p50_us": round(percentile(latencies, 50), 1),
+                "p99_us": round(percentile(latencies, 99), 1),
+                "bytes": int(size),
+                "bytes_per_vector": round(size / len(corpus), 1),
+                "build_s": round(build_s, 2),
+                "mmap_load_ms": round(mmap_load_ms(index), 2),
+            }
+            results.append(row)
+            print(f"{kind:<10}{row['dims']:>6}{row['factory']:>22}{recall_1:>10.3f}{recall_k:>10.3f}"
+                  f"{row['p50_us']:>9.0f}{row['p99_us']:>9.0f}{size / 1e6:>9.2f}{row['bytes_per_vector']:>8.0f}"
+                  f"{build_s:>9.2f}{row['mmap_load_ms']:>9.2f}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"vectors": len(corpus), "queries": len(queries), "k": args.k, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
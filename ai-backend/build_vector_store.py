@@ -1,167 +1,232 @@
 """
-FIXED: Build Vector Store for RAG
-Uses correct embedding model name
+Build Vector Store for RAG (incremental)
+
+Each knowledge base entry is identified by a hash of its text, which is
+also its docstore ID in faiss_islamic_kb/. A rebuild only embeds entries
+that are new or changed, removes deleted ones from the existing index in
+place, and reuses vectors from the on-disk embedding cache
+(.cache/embeddings.sqlite) whenever it has them.
+
+Usage:
+    python build_vector_store.py
+    python build_vector_store.py --batch-size 64 --concurrency 8
+    python build_vector_store.py --full   # ignore the existing index
+    python build_vector_store.py --compact hnsw_sq8 --dims 768   # plus a compact serving copy
 """
 
-import os
+import argparse
+import asyncio
 import json
+import os
+import random
+import time
 from pathlib import Path
+
 from dotenv import load_dotenv
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_community.vectorstores import FAISS
 
+from services.embedding_cache import EmbeddingCache, content_hash
+from services.providers import embedding_model_name, embeddings_provider, get_embeddings
+from services.vector_index import INDEX_TYPES, compact, read_meta
+
 load_dotenv()
 
-print("="*60)
-print("BUILDING RAG VECTOR STORE")
-print("="*60)
-
-# --- Load Knowledge Base ---
-print("\n[1/5] Loading knowledge base...")
-
-kb_path = Path("islamic_knowledge_base.json")
-
-if not kb_path.exists():
-    print(f"✗ ERROR: {kb_path} not found!")
-    print("Please make sure islamic_knowledge_base.json is in the same directory")
-    exit(1)
-
-with open(kb_path, 'r', encoding='utf-8') as f:
-    knowledge_data = json.load(f)
-
-print(f"✓ Loaded {len(knowledge_data)} knowledge entries")
-
-# --- Prepare Text ---
-print("\n[2/5] Preparing texts for embeddings...")
-
-texts = []
-metadatas = []
-
-for entry in knowledge_data:
-    text = f"Topic: {entry['topic']}\nQuestion: {entry['question']}\nAnswer: {entry['answer']}"
-    texts.append(text)
-    
-    metadatas.append({
-        "topic": entry['topic'],
-        "question": entry['question']
-    })
-
-print(f"✓ Prepared {len(texts)} texts")
-
-# --- Create Embeddings with CORRECT model name ---
-print("\n[3/5] Creating embeddings...")
-
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    print("✗ ERROR: GEMINI_API_KEY not found in .env file")
-    exit(1)
-
-try:
-    # FIXED: Use correct model name
-    # Options: "models/embedding-001" or "models/text-embedding-004"
-    # We'll try both
-    
-    print("Trying embedding model: models/gemini-embedding-001")
-    embeddings = GoogleGenerativeAIEmbeddings(
-        model="models/gemini-embedding-001",  # ← FIXED: This is the correct one
-        google_api_key=api_key
-    )
-    
-    # Test if it works
-    test_embed = embeddings.embed_query("test")
-    print(f"✓ Embeddings model initialized (dimension: {len(test_embed)})")
-    
-except Exception as e:
-    print(f"✗ ERROR with models/embedding-001: {e}")
-    print("\nTrying alternative: models/text-embedding-004")
-    
-    try:
-        embeddings = GoogleGenerativeAIEmbeddings(
-            model="models/text-embedding-004",
-            google_api_key=api_key
-        )
-        test_embed = embeddings.embed_query("test")
-        print(f"✓ Embeddings model initialized (dimension: {len(test_embed)})")
-    except Exception as e2:
-        print(f"✗ ERROR: {e2}")
-        print("\nPlease check your Gemini API key and internet connection")
-        exit(1)
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_KB_PATH = BASE_DIR / "islamic_knowledge_base.json"
+DEFAULT_INDEX_PATH = BASE_DIR / "faiss_islamic_kb"
 
-# --- Build Vector Store ---
-print("\n[4/5] Building FAISS vector store (this may take 30-60 seconds)...")
-
-try:
-    vector_store = FAISS.from_texts(
-        texts=texts,
-        embedding=embeddings,
-        metadatas=metadatas
-    )
-    print("✓ Vector store created successfully!")
-    
-    # Save for later use
-    save_path = "faiss_islamic_kb"
-    vector_store.save_local(save_path)
-    print(f"✓ Vector store saved to '{save_path}' folder")
-    
-except Exception as e:
-    print(f"✗ ERROR building vector store: {e}")
-    import traceback
-    traceback.print_exc()
-    exit(1)
-
-# --- Test Similarity Search ---
-print("\n[5/5] Testing similarity search...")
-
-test_queries = [
+TEST_QUERIES = [
     "What is Ayat al-Kursi?",
     "How do I perform wudu?",
     "Tell me about Laylatul Qadr"
 ]
-
-print("\nRunning test searches:\n")
-
-for query in test_queries:
-    print(f"Query: '{query}'")
-    
-    results = vector_store.similarity_search(query, k=2)
-    
-    print(f"Found {len(results)} relevant results:")
-    for i, doc in enumerate(results, 1):
-        topic = doc.metadata.get('topic', 'Unknown')
-        question = doc.metadata.get('question', 'Unknown')
-        print(f"  {i}. [{topic}] {question}")
-    print()
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
 
 
+def entry_text(entry):
+    return f"Topic: {entry['topic']}\nQuestion: {entry['question']}\nAnswer: {entry['answer']}"
 
 
+def load_entries(kb_path):
+    """Return {hash: (text, metadata)} for every entry (duplicates collapse)"""
+    with open(kb_path, 'r', encoding='utf-8') as f:
+        knowledge_data = json.load(f)
 
+    entries = {}
+    for entry in knowledge_data:
+        text = entry_text(entry)
+        entries[content_hash(text)] = (text, {"topic": entry['topic'], "question": entry['question']})
+    return knowledge_data, entries
 
 
+def load_index(index_path, embeddings):
+    """Existing store plus {hash: docstore id}, or (None, {}) when there is none"""
+    if not (index_path / "index.faiss").exists():
+        return None, {}
+    if read_meta(index_path):
+        print(f"✗ ERROR: {index_path} is a compact copy; pass the flat index with --index")
+        exit(1)
 
+    store = FAISS.load_local(str(index_path), embeddings, allow_dangerous_deserialization=True)
+
+    # Indexes from the old full builder have random IDs; hash their text instead
+    indexed = {}
+    for doc_id in store.index_to_docstore_id.values():
+        doc = store.docstore.search(doc_id)
+        indexed[content_hash(doc.page_content)] = doc_id
+    return store, indexed
+
+
+async def embed_batch(embeddings, texts, retries):
+    """Embed one batch, retrying with exponential backoff and jitter"""
+    for attempt in range(retries + 1):
+        try:
+            return await embeddings.aembed_documents(texts)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = min(30.0, 2 ** attempt) * (0.5 + random.random())
+            print(f"  ⚠️ Batch of {len(texts)} failed ({e}), retry {attempt + 1}/{retries} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+async def embed_missing(embeddings, cache, todo, batch_size, concurrency, retries):
+    """Embed {hash: text} in concurrent batches, saving each batch to the cache as it lands"""
+    semaphore = asyncio.Semaphore(concurrency)
+    items = list(todo.items())
+    batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+    vectors = {}
+    done = 0
+
+    async def run(batch):
+        nonlocal done
+        async with semaphore:
+            result = await embed_batch(embeddings, [text for _, text in batch], retries)
+        embedded = {h: v for (h, _), v in zip(batch, result)}
+        cache.put_many(embedded)
+        vectors.update(embedded)
+        done += len(batch)
+        print(f"  embedded {done}/{len(items)}")
+
+    await asyncio.gather(*(run(batch) for batch in batches))
+    return vectors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally build the FAISS knowledge base index")
+    parser.add_argument("--kb", default=str(DEFAULT_KB_PATH), help="Knowledge base JSON")
+    parser.add_argument("--index", default=os.getenv("KB_INDEX_PATH", str(DEFAULT_INDEX_PATH)),
+                        help="FAISS index directory")
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("EMBED_BATCH_SIZE", "32")))
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("EMBED_CONCURRENCY", "4")))
+    parser.add_argument("--retries", type=int, default=5)
+    parser.add_argument("--full", action="store_true", help="Rebuild from scratch (embedding cache still used)")
+    parser.add_argument("--no-test", action="store_true", help="Skip the test searches")
+    parser.add_argument("--compact", choices=list(INDEX_TYPES),
+                        help="Also write a quantized / approximate copy for serving (KB_INDEX_PATH)")
+    parser.add_argument("--dims", type=int, help="Matryoshka truncation for the compact copy (e.g. 768)")
+    parser.add_argument("--compact-out", help="Compact copy directory (default: <index>-<type>[-<dims>])")
+    args = parser.parse_args()
+
+    print("="*60)
+    print("BUILDING RAG VECTOR STORE")
+    print("="*60)
+
+    # --- Load Knowledge Base ---
+    print("\n[1/5] Loading knowledge base...")
+
+    kb_path = Path(args.kb)
+    if not kb_path.exists():
+        print(f"✗ ERROR: {kb_path} not found!")
+        exit(1)
 
+    knowledge_data, entries = load_entries(kb_path)
+    print(f"✓ Loaded {len(knowledge_data)} knowledge entries ({len(entries)} unique)")
 
+    if embeddings_provider() == "gemini" and not os.getenv("GEMINI_API_KEY"):
+        print("✗ ERROR: GEMINI_API_KEY not found in .env file")
+        exit(1)
 
+    embeddings = get_embeddings()
+    index_path = Path(args.index)
+
+    # --- Diff against the existing index ---
+    print("\n[2/5] Comparing with existing index...")
+
+    store, indexed = (None, {}) if args.full else load_index(index_path, embeddings)
+    to_add = {h: entries[h] for h in entries if h not in indexed}
+    to_remove = [doc_id for h, doc_id in indexed.items() if h not in entries]
+    unchanged = len(entries) - len(to_add)
+
+    print(f"✓ {unchanged} unchanged | {len(to_add)} new or changed | {len(to_remove)} removed")
+
+    # --- Embeddings ---
+    print("\n[3/5] Creating embeddings...")
+
+    cache = EmbeddingCache(embedding_model_name())
+    vectors = cache.get_many(to_add)
+    missing = {h: text for h, (text, _) in to_add.items() if h not in vectors}
+    print(f"✓ Embedding cache: {len(vectors)} hits, {len(missing)} misses")
+
+    t0 = time.perf_counter()
+    if missing:
+        try:
+            vectors.update(asyncio.run(embed_missing(
+                embeddings, cache, missing, args.batch_size, args.concurrency, args.retries
+            )))
+        except Exception as e:
+            print(f"✗ ERROR creating embeddings: {e}")
+            print("Finished batches are cached; rerun to resume.")
+            exit(1)
+    elapsed = time.perf_counter() - t0
+
+    if missing:
+        print(f"✓ Embedded {len(missing)} entries in {elapsed:.1f}s "
+              f"({len(missing) / elapsed:.1f} entries/s, batch {args.batch_size} x {args.concurrency})")
+    cache.close()
+
+    # --- Update Vector Store ---
+    print("\n[4/5] Updating FAISS vector store...")
+
+    added = list(to_add)
+    text_embeddings = [(to_add[h][0], vectors[h]) for h in added]
+    metadatas = [to_add[h][1] for h in added]
+
+    if store is None:
+        if not added:
+            print("✗ ERROR: knowledge base is empty")
+            exit(1)
+        store = FAISS.from_embeddings(text_embeddings, embeddings, metadatas=metadatas, ids=added)
+    else:
+        if to_remove:
+            store.delete(to_remove)
+        if added:
+            store.add_embeddings(text_embeddings, metadatas=metadatas, ids=added)
+
+    if added or to_remove or args.full:
+        store.save_local(str(index_path))
+        print(f"✓ Saved {store.index.ntotal} entries to '{index_path}'")
+    else:
+        print("✓ Index already up to date")
+
+    if args.compact:
+        out = Path(args.compact_out or f"{index_path}-{args.compact}" + (f"-{args.dims}" if args.dims else ""))
+        meta = compact(index_path, out, args.compact, args.dims)
+        print(f"✓ Wrote {meta['factory']} copy ({meta['dims'] or meta['source_dims']} dims) to '{out}': "
+              f"{meta['bytes'] / 1e6:.2f} MB vs {meta['source_bytes'] / 1e6:.2f} MB flat")
+
+    # --- Test Similarity Search ---
+    if args.no_test:
+        return
+
+    print("\n[5/5] Testing similarity search...\n")
+
+    for query in TEST_QUERIES:
+        print(f"Query: '{query}'")
+        results = store.similarity_search(query, k=2)
+        for i, doc in enumerate(results, 1):
+            print(f"  {i}. [{doc.metadata.get('topic', 'Unknown')}] {doc.metadata.get('question', 'Unknown')}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Build the Video Catalogue
+
+Fetches recent uploads of the trusted channels from the YouTube Data API
+(v3) into video_catalogue.json for watch_node. Only real uploads from those
+channels are written, so the thumbnail (and the /vi/<id>/ link the frontend
+derives from it) always points at an existing video. Shorts are skipped.
+
+Rows already in the file keep any hand-edited tags; rerunning adds new
+uploads and refreshes titles and durations.
+
+Usage:
+    YOUTUBE_API_KEY=... python build_video_catalogue.py
+    python build_video_catalogue.py --per-channel 400
+    python build_video_catalogue.py --channel "Mufti Menk=UCxxxxxxxxxxxxxxxxxxxxxx"
+"""
+
+import argparse
+import json
+import os
+import re
+from pathlib import Path
+
+import httpx
+from dotenv import load_dotenv
+
+from services.video_catalogue import DEFAULT_PATH, TRUSTED_CHANNELS
+
+load_dotenv()
+
+API_URL = "https://www.googleapis.com/youtube/v3"
+PAGE_SIZE = 50  # API maximum for playlistItems and videos
+MIN_DURATION_S = 60  # shorter uploads are Shorts
+MAX_DESCRIPTION_CHARS = 300
+
+_DURATION_RE = re.compile(r"P(?:(\d+)D)?T?(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?")
+
+
+def parse_duration(iso):
+    """ISO 8601 duration (PT1H2M3S) -> seconds"""
+    match = _DURATION_RE.fullmatch(iso or "")
+    if not match:
+        return 0
+    days, hours, minutes, seconds = (int(g or 0) for g in match.groups())
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+
+def format_duration(seconds):
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+def api_get(client, resource, **params):
+    response = client.get(f"{API_URL}/{resource}", params=params)
+    response.raise_for_status()
+    return response.json()
+
+
+def resolve_channel(client, name):
+    """Channel ID of the top channel search result for name"""
+    items = api_get(client, "search", part="snippet", type="channel", q=name, maxResults=1).get("items", [])
+    if not items:
+        return None
+    print(f"  {name}: resolved to '{items[0]['snippet']['title']}' ({items[0]['id']['channelId']})")
+    return items[0]["id"]["channelId"]
+
+
+def upload_ids(client, channel_id, limit):
+    """Most recent video IDs from the channel's uploads playlist"""
+    channels = api_get(client, "channels", part="contentDetails", id=channel_id).get("items", [])
+    if not channels:
+        return []
+    playlist = channels[0]["contentDetails"]["relatedPlaylists"]["uploads"]
+
+    ids, page_token = [], None
+    while len(ids) < limit:
+        params = {"part": "contentDetails", "playlistId": playlist, "maxResults": PAGE_SIZE}
+        if page_token:
+            params["pageToken"] = page_token
+        page = api_get(client, "playlistItems", **params)
+        ids.extend(item["contentDetails"]["videoId"] for item in page.get("items", []))
+        page_token = page.get("nextPageToken")
+        if not page_token:
+            break
+    return ids[:limit]
+
+
+def fetch_videos(client, channel, ids):
+    """Catalogue rows for ids, Shorts dropped"""
+    rows = []
+    for i in range(0, len(ids), PAGE_SIZE):
+        page = api_get(client, "videos", part="snippet,contentDetails", id=",".join(ids[i:i + PAGE_SIZE]))
+        for item in page.get("items", []):
+            seconds = parse_duration(item["contentDetails"].get("duration"))
+            if seconds < MIN_DURATION_S:
+                continue
+            snippet = item["snippet"]
+            rows.append({
+                "video_id": item["id"],
+                "title": snippet["title"],
+                "channel": channel,
+                "duration": format_duration(seconds),
+                "tags": snippet.get("tags", []),
+                "description": snippet.get("description", "").split("\n")[0][:MAX_DESCRIPTION_CHARS],
+                "published": snippet.get("publishedAt", ""),
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch trusted-channel uploads into the video catalogue")
+    parser.add_argument("--out", default=os.getenv("VIDEO_CATALOGUE_PATH", str(DEFAULT_PATH)))
+    parser.add_argument("--per-channel", type=int, default=200, help="Most recent uploads per channel")
+    parser.add_argument("--channel", action="append", default=[], metavar="NAME=ID",
+                        help="Channel ID for a trusted channel instead of searching by name")
+    args = parser.parse_args()
+
+    api_key = os.getenv("YOUTUBE_API_KEY")
+    if not api_key:
+        print("✗ ERROR: YOUTUBE_API_KEY not found in .env file")
+        exit(1)
+
+    overrides = dict(spec.split("=", 1) for spec in args.channel)
+    unknown = set(overrides) - set(TRUSTED_CHANNELS)
+    if unknown:
+        print(f"✗ ERROR: not trusted channels: {', '.join(sorted(unknown))}")
+        exit(1)
+
+    out = Path(args.out)
+    existing = {}
+    if out.exists():
+        with open(out, "r", encoding="utf-8") as f:
+            existing = {row["video_id"]: row for row in json.load(f)}
+    print(f"✓ {len(existing)} videos in {out}")
+
+    fetched = {}
+    with httpx.Client(params={"key": api_key}, timeout=30) as client:
+        for channel in TRUSTED_CHANNELS:
+            channel_id = overrides.get(channel) or resolve_channel(client, channel)
+            if not channel_id:
+                print(f"  ⚠️ {channel}: channel not found, skipped")
+                continue
+            rows = fetch_videos(client, channel, upload_ids(client, channel_id, args.per_channel))
+            fetched.update((row["video_id"], row) for row in rows)
+            print(f"  ✓ {channel}: {len(rows)} videos")
+
+    for video_id, row in fetched.items():
+        old = existing.get(video_id)
+        if old:
+            row["tags"] = sorted(set(row["tags"]) | set(old.get("tags", [])))
+        existing[video_id] = row
+
+    catalogue = sorted(existing.values(), key=lambda row: (row["channel"], row.get("published", "")))
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(catalogue, f, ensure_ascii=False, indent=2)
+    print(f"✓ Wrote {len(catalogue)} videos to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,43 @@
 Main FastAPI Application with Cache Management (RAG removed)
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
+import os
+
+from services import startup
+
+# Optional cache warm-up in the background (see warm_cache.py for the offline job)
+CACHE_WARMUP_ON_STARTUP = os.getenv("CACHE_WARMUP_ON_STARTUP", "false").lower() == "true"
+_background_tasks = set()
+
+def _start_background(coro):
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Workers answer /health right away; the LLM client and graph load behind it
+    if startup.STARTUP_WARMUP:
+        _start_background(startup.warm_up_in_background())
+    if CACHE_WARMUP_ON_STARTUP:
+        from services.cache_warmer import warm_on_startup
+        _start_background(warm_on_startup())
+    
+    yield
+    
+    # Don't hold up shutdown for a warm-up that is still running
+    for task in list(_background_tasks):
+        task.cancel()
 
 app = FastAPI(
     title="Hafiz AI API",
     description="Islamic AI Assistant with Memory and Caching",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # CORS
@@ -20,13 +50,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Import routers
+# Import routers (graph.py is loaded by services.startup, not at import time)
 from routers.chat import router as chat_router
 from routers.cache import router as cache_router  # Cache endpoints
+from routers.metrics import router as metrics_router
 
 # Include routers
 app.include_router(chat_router)
 app.include_router(cache_router)
+app.include_router(metrics_router)
 
 @app.get("/")
 async def root():
@@ -36,22 +68,27 @@ async def root():
         "features": [
             "Conversation Memory",
             "Advanced Prompting",
-            "Response Caching"
+            "Response Caching",
+            "Token Streaming"
         ],
         "endpoints": {
             "chat": "/chat/",
+            "chat_stream": "/chat/stream",
             "cache_stats": "/cache/stats",
             "cache_invalidate": "/cache/invalidate",
-            "cache_health": "/cache/health"
+            "cache_health": "/cache/health",
+            "metrics": "/metrics",
+            "node_timings": "/metrics/nodes"
         }
     }
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (graph: cold | warming | ready | degraded | failed)"""
     return {
         "status": "healthy",
         "api": "running",
+        "graph": startup.status()["status"],
         "features": {
             "memory": True,
             "caching": True,
@@ -2,10 +2,57 @@
 Response Quality Evaluator
 
 Evaluates LLM responses based on quality criteria and triggers retries if needed.
+
+Keyword lists are compiled once into single alternation regexes, so each
+check is one pass over the text. evaluate_batch() scores large volumes
+(e.g. logged responses) across a process pool, and running this module
+scores a JSONL dump:
+
+    python response_evaluator.py responses.jsonl --out scored.jsonl --workers 8
 """
 
-from typing import Dict, Any, Tuple, List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Optional, Sequence, Tuple, List
+import argparse
+import json
+import os
 import re
+import time
+
+SOURCE_KEYWORDS = ["quran", "hadith", "sahih", "sunan", "bukhari", "muslim"]
+EVIDENCE_KEYWORDS = [
+    "quran", "hadith", "prophet", "pbuh", "allah",
+    "surah", "verse", "sahih", "sunnah", "narrated"
+]
+GREETINGS = ["assalamu", "salam", "dear brother", "dear sister"]
+ACTION_KEYWORDS = [
+    "should", "can", "try", "practice", "recite", "perform",
+    "remember", "avoid", "make", "pray", "read"
+]
+STOP_WORDS = frozenset({'what', 'is', 'the', 'how', 'can', 'i', 'a', 'an', 'in', 'on', 'to', 'for', 'of'})
+GENERIC_TITLES = ("Islamic Video", "Watch This", "Must Watch")
+APPROVED_CHANNELS = [
+    "yaqeen institute", "bayyinah institute", "mufti menk",
+    "omar suleiman", "nouman ali khan", "yasir qadhi"
+]
+
+
+def _any_of(keywords: List[str]) -> "re.Pattern":
+    """One regex matching any keyword as a substring (same as any(k in text))"""
+    return re.compile("|".join(re.escape(k) for k in keywords))
+
+
+ARABIC_RE = re.compile(r'[\u0600-\u06FF]')
+DIGITS_RE = re.compile(r'\d+')
+CITATION_RE = re.compile(r'\d+:\d+|\d+\.\d+')
+SOURCE_RE = _any_of(SOURCE_KEYWORDS)
+EVIDENCE_RE = _any_of(EVIDENCE_KEYWORDS)
+GREETING_RE = _any_of(GREETINGS)
+ACTION_RE = _any_of(ACTION_KEYWORDS)
+APPROVED_CHANNEL_RE = _any_of(APPROVED_CHANNELS)
+
+# Below this many items a process pool costs more than it saves
+MIN_PARALLEL_BATCH = 256
 
 class ResponseEvaluator:
     """Evaluates response quality based on content type"""
@@ -47,7 +94,7 @@ class ResponseEvaluator:
         if "arabic" in dua and dua["arabic"]:
             arabic_text = dua["arabic"]
             # Check if it contains Arabic characters
-            has_arabic = bool(re.search(r'[\u0600-\u06FF]', arabic_text))
+            has_arabic = bool(ARABIC_RE.search(arabic_text))
             # Check length (should be at least 10 characters)
             proper_length = len(arabic_text) >= 10
             
@@ -87,10 +134,7 @@ class ResponseEvaluator:
         if "source" in dua and dua["source"]:
             source = dua["source"]
             # Check if source is specific (contains numbers or specific reference)
-            has_reference = bool(re.search(r'\d+', source)) or any(
-                keyword in source.lower() 
-                for keyword in ["quran", "hadith", "sahih", "sunan", "bukhari", "muslim"]
-            )
+            has_reference = bool(DIGITS_RE.search(source)) or bool(SOURCE_RE.search(source.lower()))
             
             if has_reference and len(source) >= 8:
                 score += 0.15
@@ -138,6 +182,7 @@ class ResponseEvaluator:
             return (0.0, ["No text content"])
         
         text = response["text"]
+        text_lower = text.lower()
         score += 0.10  # Has text field
         
         # Length check (20%)
@@ -157,17 +202,11 @@ class ResponseEvaluator:
             issues.append("Response very long")
         
         # Islamic evidence (20%)
-        has_evidence = any(
-            keyword in text.lower()
-            for keyword in [
-                "quran", "hadith", "prophet", "pbuh", "allah", 
-                "surah", "verse", "sahih", "sunnah", "narrated"
-            ]
-        )
+        has_evidence = bool(EVIDENCE_RE.search(text_lower))
         
         if has_evidence:
             # Check if specific citations
-            has_citation = bool(re.search(r'\d+:\d+|\d+\.\d+', text))
+            has_citation = bool(CITATION_RE.search(text))
             if has_citation:
                 score += 0.20
             else:
@@ -181,11 +220,9 @@ class ResponseEvaluator:
         # Check if key words from query appear in response
         query_words = set(query.lower().split())
         # Remove common words
-        stop_words = {'what', 'is', 'the', 'how', 'can', 'i', 'a', 'an', 'in', 'on', 'to', 'for', 'of'}
-        key_words = query_words - stop_words
+        key_words = query_words - STOP_WORDS
         
         if key_words:
-            text_lower = text.lower()
             relevance_count = sum(1 for word in key_words if word in text_lower)
             relevance_ratio = relevance_count / len(key_words)
             
@@ -202,10 +239,7 @@ class ResponseEvaluator:
         
         # Structure (15%)
         # Check for paragraphs, greeting, closing
-        has_greeting = any(
-            greeting in text.lower()[:100]
-            for greeting in ["assalamu", "salam", "dear brother", "dear sister"]
-        )
+        has_greeting = bool(GREETING_RE.search(text_lower[:100]))
         has_paragraphs = text.count('\n\n') >= 1 or char_count > 200
         
         if has_greeting and has_paragraphs:
@@ -217,11 +251,7 @@ class ResponseEvaluator:
             issues.append("Could improve structure (greeting/paragraphs)")
         
         # Actionable advice (15%)
-        action_keywords = [
-            "should", "can", "try", "practice", "recite", "perform", 
-            "remember", "avoid", "make", "pray", "read"
-        ]
-        has_action = any(keyword in text.lower() for keyword in action_keywords)
+        has_action = bool(ACTION_RE.search(text_lower))
         
         if has_action:
             score += 0.15
@@ -290,9 +320,7 @@ class ResponseEvaluator:
             if "title" in video and video["title"]:
                 title = video["title"]
                 # Title should be at least 20 chars and not generic
-                is_specific = len(title) >= 20 and title not in [
-                    "Islamic Video", "Watch This", "Must Watch"
-                ]
+                is_specific = len(title) >= 20 and title not in GENERIC_TITLES
                 if is_specific:
                     specific_titles += 1
         
@@ -304,16 +332,11 @@ class ResponseEvaluator:
             issues.append("Titles are too generic")
         
         # Approved channels (20%)
-        approved_channels = [
-            "yaqeen institute", "bayyinah institute", "mufti menk",
-            "omar suleiman", "nouman ali khan", "yasir qadhi"
-        ]
-        
         approved_count = 0
         for video in videos:
             if "channel" in video and video["channel"]:
                 channel = video["channel"].lower()
-                if any(approved in channel for approved in approved_channels):
+                if APPROVED_CHANNEL_RE.search(channel):
                     approved_count += 1
         
         if approved_count == video_count:
@@ -367,7 +390,94 @@ class ResponseEvaluator:
             "issues": issues,
             "recommendation": recommendation
         }
+    
+    def evaluate_batch(
+        self,
+        responses: Sequence[Dict[str, Any]],
+        intents: Sequence[str],
+        queries: Optional[Sequence[str]] = None,
+        workers: Optional[int] = None,
+        chunksize: int = 64
+    ) -> List[Dict[str, Any]]:
+        """
+        Evaluate many responses, results in input order
+        
+        Same results as calling evaluate() per item. Batches of at least
+        MIN_PARALLEL_BATCH items are spread over `workers` processes
+        (default: CPU count); workers=1 always scores in-process.
+        """
+        if queries is None:
+            queries = [""] * len(responses)
+        if not (len(responses) == len(intents) == len(queries)):
+            raise ValueError("responses, intents and queries must have the same length")
+        
+        items = list(zip(responses, intents, queries))
+        workers = workers or os.cpu_count() or 1
+        
+        if workers == 1 or len(items) < MIN_PARALLEL_BATCH:
+            return [self.evaluate(response, intent, query) for response, intent, query in items]
+        
+        chunks = [items[i:i + chunksize] for i in range(0, len(items), chunksize)]
+        # Workers get a pickled copy of this evaluator (thresholds included), once each
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self,)) as pool:
+            results = []
+            for chunk_results in pool.map(_evaluate_chunk, chunks):
+                results.extend(chunk_results)
+        return results
+
+
+_worker_evaluator: Optional[ResponseEvaluator] = None
+
+
+def _init_worker(worker_evaluator: ResponseEvaluator):
+    global _worker_evaluator
+    _worker_evaluator = worker_evaluator
+
+
+def _evaluate_chunk(items: List[Tuple[Dict[str, Any], str, str]]) -> List[Dict[str, Any]]:
+    # Runs in pool workers, with the evaluator evaluate_batch was called on
+    return [_worker_evaluator.evaluate(response, intent, query) for response, intent, query in items]
 
 
 # Global evaluator instance
-evaluator = ResponseEvaluator()
\ No newline at end of file
+evaluator = ResponseEvaluator()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a JSONL dump of responses")
+    parser.add_argument("path", help='JSONL rows with "response", "intent" and optional "query"')
+    parser.add_argument("--out", help="Write each row plus its \"evaluation\" here")
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: CPU count)")
+    args = parser.parse_args()
+    
+    with open(args.path, "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    
+    t0 = time.perf_counter()
+    results = evaluator.evaluate_batch(
+        [row["response"] for row in rows],
+        [row["intent"] for row in rows],
+        [row.get("query", "") for row in rows],
+        workers=args.workers
+    )
+    elapsed = time.perf_counter() - t0
+    
+    print(f"Scored {len(rows)} responses in {elapsed:.2f}s ({len(rows) / elapsed if elapsed else 0:.0f}/s)")
+    
+    by_intent = {}
+    for row, result in zip(rows, results):
+        by_intent.setdefault(row["intent"], []).append(result)
+    for intent, intent_results in sorted(by_intent.items()):
+        mean = sum(r["score"] for r in intent_results) / len(intent_results)
+        passed = sum(r["passed"] for r in intent_results) / len(intent_results)
+        print(f"  {intent:<10} n={len(intent_results):<6} mean score {mean:.3f} | passed {passed:.1%}")
+    
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            for row, result in zip(rows, results):
+                f.write(json.dumps({**row, "evaluation": result}, ensure_ascii=False) + "\n")
+        print(f"✓ Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
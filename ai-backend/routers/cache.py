@@ -8,6 +8,8 @@ from fastapi import APIRouter
 from pydantic import BaseModel
 from typing import Optional
 
+from services.startup import get_graph
+
 router = APIRouter(prefix="/cache", tags=["cache"])
 
 class CacheInvalidateRequest(BaseModel):
@@ -26,14 +28,24 @@ async def get_cache_stats():
     - total_requests: Total cache requests
     - hit_rate: Cache hit percentage
     - cache_size: Number of entries in cache
+    - evictions / expired: Entries dropped by LRU budget / TTL
+    - coalesced: Requests that joined an identical in-flight LLM call
+    - bytes_used / max_bytes: Approximate memory use and budget
+    - per_intent: Hits, misses and hit rate per intent
+    - knowledge_base: KB fast-path lookups, hits and hit_ratio
+    - dua_catalogue / video_catalogue: Catalogue lookups, hits, hit_ratio and LLM-failure fallbacks
     """
-    from graph import response_cache
+    graph = await get_graph()
+    response_cache = graph.response_cache
     
-    stats = response_cache.get_stats()
+    stats = await response_cache.aget_stats()
     
     return {
         "status": "success",
         "cache_stats": stats,
+        "knowledge_base": graph.knowledge_base.get_stats(),
+        "dua_catalogue": graph.dua_catalogue.get_stats(),
+        "video_catalogue": graph.video_catalogue.get_stats(),
         "message": f"Cache hit rate: {stats['hit_rate']}"
     }
 
@@ -46,21 +58,23 @@ async def invalidate_cache(request: CacheInvalidateRequest):
     - clear_all: Clear entire cache
     - query + intent: Invalidate specific entry
     """
-    from graph import response_cache
+    response_cache = (await get_graph()).response_cache
     
     if request.clear_all:
-        response_cache.invalidate()
+        removed = await response_cache.ainvalidate()
         return {
             "status": "success",
             "message": "All cache entries cleared",
-            "action": "clear_all"
+            "action": "clear_all",
+            "removed": removed
         }
     elif request.query:
-        response_cache.invalidate(query=request.query, intent=request.intent)
+        removed = await response_cache.ainvalidate(query=request.query, intent=request.intent)
         return {
             "status": "success",
             "message": f"Cache invalidated for query: {request.query[:50]}...",
-            "action": "invalidate_query"
+            "action": "invalidate_query",
+            "removed": removed
         }
     else:
         return {
@@ -73,15 +87,15 @@ async def cleanup_expired():
     """
     Manually trigger cleanup of expired cache entries
     """
-    from graph import response_cache
+    response_cache = (await get_graph()).response_cache
     
-    response_cache.cleanup_expired()
-    stats = response_cache.get_stats()
+    removed = await response_cache.acleanup_expired()
     
     return {
         "status": "success",
         "message": "Expired entries cleaned up",
-        "current_cache_size": stats["cache_size"]
+        "removed": removed,
+        "current_cache_size": len(response_cache)
     }
 
 @router.get("/health")
@@ -89,9 +103,9 @@ async def cache_health():
     """
     Check cache health status
     """
-    from graph import response_cache
+    response_cache = (await get_graph()).response_cache
     
-    stats = response_cache.get_stats()
+    stats = await response_cache.aget_stats()
     
     # Determine health status
     hit_rate_numeric = float(stats['hit_rate'].rstrip('%'))
@@ -3,27 +3,38 @@ Chat Router with Session Management for Memory
 """
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Union, List, Dict, Any
+from typing import Optional, Union, List, Dict, Any, Set
+import asyncio
+import json
 import os
 import sys
+import time
 import traceback
 import uuid
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-try:
-    from graph import app as graph_app
-    print("✓ Graph with memory loaded")
-except ImportError as e:
-    print(f"✗ Graph import error: {e}")
-    graph_app = None
+from services.deadline import new_deadline, remaining
+from services.metrics import record_node, timed_node
+from services.query_normalizer import normalize_query
+from services.startup import get_graph
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+# Per-worker cap on concurrent graph runs (each run holds up to two LLM calls)
+MAX_CONCURRENT_CHATS = int(os.getenv("CHAT_MAX_CONCURRENCY", "32"))
+chat_semaphore = asyncio.Semaphore(MAX_CONCURRENT_CHATS)
+
+# /chat/batch: items per request, and graph runs in flight per batch
+MAX_BATCH_ITEMS = int(os.getenv("CHAT_BATCH_MAX_ITEMS", "500"))
+BATCH_CONCURRENCY = int(os.getenv("CHAT_BATCH_CONCURRENCY", "8"))
+
 class ChatRequest(BaseModel):
     message: str
     session_id: Optional[str] = None  # NEW: Optional session ID
+    timeout_ms: Optional[int] = None  # Response budget, capped by CHAT_MAX_DEADLINE_MS
 
 class ChatResponse(BaseModel):
     response: str
@@ -31,6 +42,41 @@ class ChatResponse(BaseModel):
     metadata: Optional[Union[Dict[str, Any], List[Dict[str, Any]]]] = None
     session_id: str  # NEW: Return session ID
 
+class BatchItem(BaseModel):
+    message: str
+    session_id: Optional[str] = None
+
+class BatchRequest(BaseModel):
+    items: List[BatchItem]
+    concurrency: Optional[int] = None  # Capped by CHAT_BATCH_CONCURRENCY
+    timeout_ms: Optional[int] = None  # Per item, counted from when it starts running
+    stream: bool = False  # NDJSON, one result per line as items finish
+
+class BatchItemResult(BaseModel):
+    index: int
+    response: Optional[str] = None
+    type: Optional[str] = None
+    metadata: Optional[Union[Dict[str, Any], List[Dict[str, Any]]]] = None
+    session_id: Optional[str] = None
+    cached: bool = False  # Answered from response_cache without an LLM call
+    duplicate_of: Optional[int] = None  # Index of the identical item whose run this reuses
+    error: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    results: List[BatchItemResult]
+    summary: Dict[str, Any]
+
+async def _require_graph():
+    """graph module (loaded off the event loop if the startup warm-up hasn't finished)"""
+    try:
+        return await get_graph()
+    except ImportError as e:
+        print(f"✗ Graph import error: {e}")
+        raise HTTPException(
+            status_code=500, 
+            detail="AI Graph not initialized."
+        )
+
 @router.post("/", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """
@@ -42,38 +88,27 @@ async def chat(request: ChatRequest):
     print(f"\n{'='*50}")
     print(f"Message: {request.message}")
     
-    if not graph_app:
-        raise HTTPException(
-            status_code=500, 
-            detail="AI Graph not initialized."
-        )
+    graph = await _require_graph()
     
     # Generate or use provided session ID
     session_id = request.session_id or str(uuid.uuid4())
     print(f"Session ID: {session_id}")
     print(f"{'='*50}\n")
     
+    # The budget starts on arrival, so time queued for the semaphore counts
+    deadline = new_deadline(request.timeout_ms)
+    
     try:
-        # Invoke graph with session ID
-        result = graph_app.invoke({
-            "query": request.message,
-            "session_id": session_id  # NEW: Pass session ID
-        })
-        
-        final_output = result.get("final_output", {})
-        
-        response = {
-            "response": final_output.get("content", "I processed your request."),
-            "type": final_output.get("type", "text"),
-            "metadata": final_output.get("metadata", None),
-            "session_id": session_id  # NEW: Return session ID
-        }
+        response = await _run_chat(graph, request.message, session_id, deadline)
         
         print(f"Response type: {response['type']}")
         print(f"Session: {session_id}\n")
         
         return response
         
+    except asyncio.TimeoutError:
+        print(f"\n✗ Deadline exceeded for session {session_id}")
+        raise HTTPException(status_code=504, detail="Response deadline exceeded")
     except Exception as e:
         print(f"\n✗ ERROR: {str(e)}")
         traceback.print_exc()
@@ -83,15 +118,262 @@ async def chat(request: ChatRequest):
             detail=f"Error: {str(e)}"
         )
 
+async def _run_chat(graph, message: str, session_id: str, deadline: float) -> Dict[str, Any]:
+    """One graph run -> /chat response body (asyncio.TimeoutError if the graph gets stuck)"""
+    # Run graph asynchronously so LLM calls don't block the event loop
+    async with chat_semaphore:
+        # Nodes fall back on their own at the deadline; this only catches a stuck graph
+        result = await asyncio.wait_for(graph.get_app().ainvoke({
+            "query": message,
+            "session_id": session_id,  # NEW: Pass session ID
+            "deadline": deadline
+        }), max(0.0, remaining(deadline)) + 1)
+    
+    final_output = result.get("final_output", {})
+    
+    return {
+        "response": final_output.get("content", "I processed your request."),
+        "type": final_output.get("type", "text"),
+        "metadata": final_output.get("metadata", None),
+        "session_id": session_id  # NEW: Return session ID
+    }
+
+def _sse(event: str, data: Any) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def _run_node(graph, name: str, state: Dict[str, Any]):
+    """
+    Run graph.<name>_node as the compiled graph would: timed under name for
+    /metrics/nodes, with sync nodes (session store I/O) in a worker thread
+    """
+    node = timed_node(name, getattr(graph, f"{name}_node"))
+    if asyncio.iscoroutinefunction(node):
+        state.update(await node(state))
+    else:
+        state.update(await asyncio.to_thread(node, state))
+
+async def _stream_chat(message: str, session_id: str, deadline: float):
+    """
+    Run the graph nodes step by step, emitting SSE events:
+    intent -> delta* (ask_hafiz) or card (dua/watch) -> quality -> done
+    
+    Always takes the two_step path whatever GRAPH_MODE is: the analyzer's
+    intent event comes first, and single_call's structured answer can't be
+    streamed token by token.
+    """
+    graph = await get_graph()
+    
+    async with chat_semaphore:
+        try:
+            state = {"query": message, "session_id": session_id, "deadline": deadline}
+            await _run_node(graph, "load_memory", state)
+            await _run_node(graph, "analyzer", state)
+            
+            intent = state.get("intent", "ask_hafiz")
+            yield _sse("intent", {"intent": intent, "session_id": session_id})
+            
+            if intent in ("dua", "watch"):
+                await _run_node(graph, "find_dua" if intent == "dua" else "watch", state)
+                card = graph.finalizer_node(state)["final_output"]
+                yield _sse("card", card)
+            else:
+                state["intent"] = "ask_hafiz"
+                await _run_node(graph, "kb_lookup", state)
+                if state.get("kb_hit"):
+                    yield _sse("delta", {"text": state["response"]["text"]})
+                else:
+                    t0 = time.perf_counter()
+                    async for update in graph.stream_ask_hafiz(state):
+                        if "delta" in update:
+                            yield _sse("delta", {"text": update["delta"]})
+                        else:
+                            state.update(update)
+                    record_node("ask_hafiz", time.perf_counter() - t0)
+            
+            yield _sse("quality", {"score": state.get("quality_score", 0.0)})
+            
+            await _run_node(graph, "update_memory", state)
+            await _run_node(graph, "finalizer", state)
+            final_output = state["final_output"]
+            
+            yield _sse("done", {
+                "response": final_output.get("content", "I processed your request."),
+                "type": final_output.get("type", "text"),
+                "metadata": final_output.get("metadata", None),
+                "session_id": session_id
+            })
+        except Exception as e:
+            print(f"\n✗ STREAM ERROR: {str(e)}")
+            traceback.print_exc()
+            yield _sse("error", {"detail": f"Error: {str(e)}"})
+
+@router.post("/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming chat endpoint (Server-Sent Events)
+    
+    Events:
+    - intent: detected intent and session ID
+    - delta: text tokens as they arrive (ask_hafiz)
+    - card: complete dua/video card (dua, watch)
+    - quality: evaluator score
+    - done: final response, same shape as POST /chat/
+    """
+    await _require_graph()
+    
+    session_id = request.session_id or str(uuid.uuid4())
+    print(f"\n[STREAM] Message: {request.message} | Session: {session_id}")
+    
+    return StreamingResponse(
+        _stream_chat(request.message, session_id, new_deadline(request.timeout_ms)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _cached_messages(graph, messages: List[str]) -> Set[str]:
+    """
+    Messages the graph would answer from response_cache (no LLM call).
+    Only holds for a new conversation: with history the graph skips the cache.
+    Reads the cache backend; run it in a worker thread.
+    """
+    from services.cache_warmer import expected_intent
+    
+    cache = graph.response_cache
+    return {message for message in messages
+            if cache.peek(message, expected_intent(message, cache)) is not None}
+
+async def _run_batch(graph, request: BatchRequest, emit):
+    """
+    Run every item of a batch, calling emit(result) as each finishes
+    
+    - items without a session_id are deduplicated on the normalized message
+      (the cache key); one run answers all copies
+    - items sharing a session_id run in order, as one conversation
+    - session-less runs the cache can answer skip the batch's concurrency
+      limit (session items may have history, which bypasses the cache)
+    - a failing item reports its error; the others carry on
+    """
+    limit = asyncio.Semaphore(max(1, min(request.concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY)))
+    stats = {"runs": 0, "cache_hits": 0, "errors": 0}
+    
+    async def run(index: int, session_id: Optional[str]) -> Dict[str, Any]:
+        message = request.items[index].message
+        fresh = session_id is None
+        session_id = session_id or str(uuid.uuid4())
+        stats["runs"] += 1
+        try:
+            cached = fresh and message in cached_messages
+            if cached:
+                stats["cache_hits"] += 1
+                response = await _run_chat(graph, message, session_id, new_deadline(request.timeout_ms))
+            else:
+                async with limit:
+                    response = await _run_chat(graph, message, session_id, new_deadline(request.timeout_ms))
+            return {**response, "cached": cached, "error": None}
+        except asyncio.TimeoutError:
+            error = "Response deadline exceeded"
+        except Exception as e:
+            error = f"Error: {str(e)}"
+        stats["errors"] += 1
+        print(f"[BATCH] ✗ Item {index}: {error}")
+        return {"response": None, "type": None, "metadata": None, "session_id": session_id,
+                "cached": False, "error": error}
+    
+    async def run_unique(indexes: List[int]):
+        result = await run(indexes[0], None)
+        for index in indexes:
+            emit({"index": index, **result, "duplicate_of": indexes[0] if index != indexes[0] else None})
+    
+    async def run_session(session_id: str, indexes: List[int]):
+        for index in indexes:
+            emit({"index": index, **await run(index, session_id), "duplicate_of": None})
+    
+    unique: Dict[str, List[int]] = {}
+    sessions: Dict[str, List[int]] = {}
+    for index, item in enumerate(request.items):
+        if item.session_id:
+            sessions.setdefault(item.session_id, []).append(index)
+        else:
+            unique.setdefault(normalize_query(item.message), []).append(index)
+    
+    # One off-loop pass over the cache for every session-less run
+    cached_messages = await asyncio.to_thread(
+        _cached_messages, graph, [request.items[indexes[0]].message for indexes in unique.values()]
+    )
+    
+    await asyncio.gather(
+        *(run_unique(indexes) for indexes in unique.values()),
+        *(run_session(session_id, indexes) for session_id, indexes in sessions.items())
+    )
+    return stats
+
+@router.post("/batch", response_model=BatchResponse)
+async def chat_batch(request: BatchRequest):
+    """
+    Answer many messages in one call
+    
+    Items run concurrently (up to `concurrency`, capped by
+    CHAT_BATCH_CONCURRENCY); identical session-less messages are answered
+    once, cached answers are served first, and items with the same
+    session_id run in order. Results come back in request order, or with
+    stream=true as NDJSON lines (each with its `index`) as they finish.
+    An item that fails carries an `error` instead of failing the batch.
+    """
+    if not request.items:
+        raise HTTPException(status_code=400, detail="Batch has no items")
+    if len(request.items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_ITEMS} items per batch")
+    
+    graph = await _require_graph()
+    print(f"\n[BATCH] {len(request.items)} items (stream: {request.stream})")
+    
+    if request.stream:
+        return StreamingResponse(_stream_batch(graph, request), media_type="application/x-ndjson")
+    
+    t0 = time.perf_counter()
+    results: List[Optional[Dict[str, Any]]] = [None] * len(request.items)
+    
+    def emit(result: Dict[str, Any]):
+        results[result["index"]] = result
+    
+    stats = await _run_batch(graph, request, emit)
+    return {"results": results, "summary": _batch_summary(request, stats, t0)}
+
+async def _stream_batch(graph, request: BatchRequest):
+    """NDJSON lines as items finish, then a final {"summary": ...} line"""
+    t0 = time.perf_counter()
+    queue: asyncio.Queue = asyncio.Queue()
+    runner = asyncio.create_task(_run_batch(graph, request, queue.put_nowait))
+    
+    try:
+        for _ in range(len(request.items)):
+            yield json.dumps(await queue.get(), ensure_ascii=False) + "\n"
+        stats = await runner
+        yield json.dumps({"summary": _batch_summary(request, stats, t0)}) + "\n"
+    finally:
+        # Client went away: stop starting new graph runs
+        runner.cancel()
+
+def _batch_summary(request: BatchRequest, stats: Dict[str, int], t0: float) -> Dict[str, Any]:
+    return {
+        "items": len(request.items),
+        "runs": stats["runs"],
+        "deduplicated": len(request.items) - stats["runs"],
+        "cache_hits": stats["cache_hits"],
+        "errors": stats["errors"],
+        "elapsed_s": round(time.perf_counter() - t0, 3)
+    }
+
 # NEW: Get conversation history endpoint
 @router.get("/session/{session_id}/history")
 async def get_session_history(session_id: str):
     """
     Get conversation history for a session
     """
-    from graph import get_conversation_history
+    graph = await _require_graph()
     
-    history = get_conversation_history(session_id)
+    history = graph.get_conversation_history(session_id)
     
     return {
         "session_id": session_id,
@@ -105,10 +387,9 @@ async def clear_session(session_id: str):
     """
     Clear conversation history for a session
     """
-    from graph import conversation_sessions
+    graph = await _require_graph()
     
-    if session_id in conversation_sessions:
-        del conversation_sessions[session_id]
+    if graph.delete_conversation_history(session_id):
         return {"message": f"Session {session_id} cleared", "success": True}
     else:
         return {"message": f"Session {session_id} not found", "success": False}
\ No newline at end of file
@@ -0,0 +1,48 @@
+"""
+Metrics Router
+
+Endpoints exposing pipeline timings for load tests and monitoring
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+@router.get("", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """
+    All counters and histograms in the Prometheus text exposition format
+    
+    - hafiz_node_duration_seconds: per-node latency histogram
+    - hafiz_llm_calls_total / hafiz_llm_call_duration_seconds: LLM calls by node
+    - hafiz_retries_total / hafiz_fallbacks_total: quality retries and fallbacks
+    - hafiz_cache_requests_total / hafiz_cache_events_total: response cache
+    - hafiz_kb_lookups_total: knowledge base fast path
+    - hafiz_evaluator_score: quality score histogram per intent
+    """
+    from services.metrics import registry
+    
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@router.get("/nodes")
+async def get_node_timings():
+    """
+    Per-node wall-clock timings since startup (or the last reset)
+    
+    Returns for each graph node:
+    - count: Runs
+    - total_s / mean_ms / max_s: Time spent
+    - share: Fraction of all node time spent in this node
+    """
+    from services.metrics import node_timings
+    
+    return {"status": "success", "nodes": node_timings.get_stats()}
+
+@router.post("/nodes/reset")
+async def reset_node_timings():
+    """Zero the per-node timings (e.g. between benchmark runs)"""
+    from services.metrics import node_timings
+    
+    node_timings.reset()
+    return {"status": "success"}
@@ -0,0 +1,224 @@
+"""
+Cache Backends
+
+Shared (L2) storage behind the in-process ResponseCache. Every uvicorn
+worker on a host opens the same SQLite file, so entries written by one
+worker are hits for the others and survive restarts and deploys.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_SQLITE_PATH = Path(__file__).resolve().parent.parent / ".cache" / "response_cache.sqlite"
+DEFAULT_SQLITE_MAX_BYTES = 256 * 1024 * 1024
+
+# (value, intent, expires_at)
+BackendRow = Tuple[Dict[str, Any], str, float]
+
+
+class CacheBackend:
+    """
+    Interface for a shared cache tier
+
+    Methods that drop entries return the removed keys so the caller can keep
+    dependent indexes (the semantic tier) in step.
+    """
+
+    def get(self, key: str) -> Optional[BackendRow]:
+        raise NotImplementedError
+
+    def peek(self, key: str) -> Optional[BackendRow]:
+        """get() without counting it as an access"""
+        raise NotImplementedError
+
+    def expires_at(self, key: str) -> Optional[float]:
+        """Expiry of a live entry without counting it as an access"""
+        raise NotImplementedError
+
+    def set(self, key: str, value: Dict[str, Any], intent: str, expires_at: float, size: int) -> List[str]:
+        """Store an entry, returns keys evicted to stay within budget"""
+        raise NotImplementedError
+
+    def delete(self, keys: List[str]) -> List[str]:
+        raise NotImplementedError
+
+    def delete_intent(self, intent: str) -> List[str]:
+        raise NotImplementedError
+
+    def clear(self) -> int:
+        raise NotImplementedError
+
+    def delete_expired(self) -> List[str]:
+        raise NotImplementedError
+
+    def hot_entries(self, limit: int) -> List[Tuple[str, Dict[str, Any], str, float]]:
+        """Most frequently hit live entries as (key, value, intent, expires_at)"""
+        raise NotImplementedError
+
+    def get_stats(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    SQLite (WAL mode) cache shared by all local workers
+
+    WAL lets readers in every worker proceed while one writes. Rows carry
+    their own expires_at; the table is kept under max_bytes by evicting
+    expired rows first, then least recently accessed ones.
+    """
+
+    EVICT_BATCH = 64
+
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.path = Path(path or os.getenv("CACHE_SQLITE_PATH", DEFAULT_SQLITE_PATH))
+        if max_bytes is None:
+            max_bytes = int(os.getenv("CACHE_SQLITE_MAX_BYTES", DEFAULT_SQLITE_MAX_BYTES))
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                intent TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache (last_access)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_expires_at ON cache (expires_at)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections aren't shareable
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _read(self, conn: sqlite3.Connection, key: str, now: float):
+        return conn.execute(
+            "SELECT value, intent, expires_at FROM cache WHERE key = ? AND expires_at > ?",
+            (key, now)
+        ).fetchone()
+
+    def get(self, key: str) -> Optional[BackendRow]:
+        conn = self._conn()
+        now = time.time()
+        row = self._read(conn, key, now)
+        if row is None:
+            return None
+
+        conn.execute("UPDATE cache SET last_access = ?, hits = hits + 1 WHERE key = ?", (now, key))
+        conn.commit()
+        return json.loads(row[0]), row[1], row[2]
+
+    def peek(self, key: str) -> Optional[BackendRow]:
+        row = self._read(self._conn(), key, time.time())
+        return (json.loads(row[0]), row[1], row[2]) if row is not None else None
+
+    def expires_at(self, key: str) -> Optional[float]:
+        row = self._conn().execute(
+            "SELECT expires_at FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: Dict[str, Any], intent: str, expires_at: float, size: int) -> List[str]:
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, intent, value, size, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, intent, json.dumps(value, ensure_ascii=False, default=str), size, expires_at, time.time())
+            )
+        return self._enforce_budget(conn)
+
+    def _enforce_budget(self, conn: sqlite3.Connection) -> List[str]:
+        evicted = []
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return evicted
+
+        evicted.extend(self.delete_expired())
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+
+        while total > self.max_bytes:
+            rows = conn.execute(
+                "SELECT key, size FROM cache ORDER BY last_access LIMIT ?", (self.EVICT_BATCH,)
+            ).fetchall()
+            if not rows:
+                break
+            batch = []
+            for key, size in rows:
+                batch.append(key)
+                total -= size
+                if total <= self.max_bytes:
+                    break
+            evicted.extend(self.delete(batch))
+
+        return evicted
+
+    def delete(self, keys: List[str]) -> List[str]:
+        if not keys:
+            return []
+        conn = self._conn()
+        placeholders = ",".join("?" * len(keys))
+        with conn:
+            existing = [r[0] for r in conn.execute(
+                f"SELECT key FROM cache WHERE key IN ({placeholders})", keys
+            )]
+            conn.execute(f"DELETE FROM cache WHERE key IN ({placeholders})", keys)
+        return existing
+
+    def delete_intent(self, intent: str) -> List[str]:
+        conn = self._conn()
+        with conn:
+            keys = [r[0] for r in conn.execute("SELECT key FROM cache WHERE intent = ?", (intent,))]
+            conn.execute("DELETE FROM cache WHERE intent = ?", (intent,))
+        return keys
+
+    def clear(self) -> int:
+        conn = self._conn()
+        with conn:
+            return conn.execute("DELETE FROM cache").rowcount
+
+    def delete_expired(self) -> List[str]:
+        conn = self._conn()
+        now = time.time()
+        with conn:
+            keys = [r[0] for r in conn.execute("SELECT key FROM cache WHERE expires_at <= ?", (now,))]
+            conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+        return keys
+
+    def hot_entries(self, limit: int) -> List[Tuple[str, Dict[str, Any], str, float]]:
+        rows = self._conn().execute(
+            "SELECT key, value, intent, expires_at FROM cache WHERE expires_at > ? "
+            "ORDER BY hits DESC, last_access DESC LIMIT ?",
+            (time.time(), limit)
+        ).fetchall()
+        return [(key, json.loads(value), intent, expires_at) for key, value, intent, expires_at in rows]
+
+    def get_stats(self) -> Dict[str, Any]:
+        entries, total = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache"
+        ).fetchone()
+        return {
+            "backend": "sqlite",
+            "path": str(self.path),
+            "entries": entries,
+            "bytes_used": total,
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,282 @@
+"""
+Cache Warm-up
+
+Runs popular queries (the top logged queries plus every question in
+islamic_knowledge_base.json) through the graph so their answers are in
+response_cache before real users ask. Nodes store their own results under
+the usual intent keys, so the warm entries are exactly what /chat would
+have cached.
+
+Questions the KB fast path answers are skipped, as their answers never go
+through the cache. Entries that are still fresh are skipped; ones expiring
+within refresh_within seconds are dropped and regenerated. Used by warm_cache.py
+(against the shared SQLite backend) and by the optional startup hook in
+main.py (CACHE_WARMUP_ON_STARTUP).
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+import asyncio
+import json
+import os
+import time
+import uuid
+
+KB_PATH = Path(__file__).resolve().parent.parent / "islamic_knowledge_base.json"
+
+DEFAULT_TOP = 200
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RATE = 2.0  # graph runs started per second
+DEFAULT_REFRESH_WITHIN = 3600  # seconds of TTL below which an entry is regenerated
+PROGRESS_EVERY = 25
+
+
+def kb_questions(path: Path = KB_PATH) -> List[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return [entry["question"] for entry in json.load(f)]
+    except (OSError, ValueError, KeyError) as e:
+        print(f"[WARMUP] Could not read {path}: {e}")
+        return []
+
+
+def top_queries(path: str, limit: int = DEFAULT_TOP) -> List[str]:
+    """
+    Most popular logged queries: JSONL rows with "query" (and optionally
+    "count", sorted by it) or one plain query per line, most popular first
+    """
+    rows = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                row = json.loads(line)
+                rows.append((row["query"], row.get("count", 0)))
+            else:
+                rows.append((line, 0))
+
+    if any(count for _, count in rows):
+        rows.sort(key=lambda row: -row[1])
+    return [query for query, _ in rows[:limit]]
+
+
+def warmup_queries(queries_path: Optional[str] = None, top: int = DEFAULT_TOP, include_kb: bool = True) -> List[str]:
+    """Top logged queries first, then KB questions, duplicates (case/whitespace) removed"""
+    queries = top_queries(queries_path, top) if queries_path else []
+    if include_kb:
+        queries += kb_questions()
+
+    seen = set()
+    unique = []
+    for query in queries:
+        key = query.lower().strip()
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(query)
+    return unique
+
+
+class RateLimiter:
+    """Spaces acquisitions at least 1/rate seconds apart (rate <= 0: unlimited)"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+
+def expected_intent(query: str, response_cache=None) -> str:
+    """
+    Intent the graph will route to: cached analyzer result, else the local
+    classifier's guess. Reads the cache backend; call from a worker thread.
+    """
+    from services.intent_classifier import intent_classifier
+
+    if response_cache is None:
+        from graph import response_cache
+
+    cached = response_cache.peek(query, intent="analyzer")
+    if cached:
+        return cached["intent"]
+    return intent_classifier.classify(query)[0]
+
+
+def expected_intents(queries: List[str], response_cache=None) -> Dict[str, str]:
+    return {query: expected_intent(query, response_cache) for query in queries}
+
+
+def _stored_query_vectors(model: str, hashes: List[str]) -> Dict[str, List[float]]:
+    from services.embedding_cache import EmbeddingCache
+
+    cache = EmbeddingCache(model)
+    try:
+        return cache.get_many(hashes)
+    finally:
+        cache.close()
+
+
+def _store_query_vectors(model: str, vectors: Dict[str, List[float]]):
+    from services.embedding_cache import EmbeddingCache
+
+    cache = EmbeddingCache(model)
+    try:
+        cache.put_many(vectors)
+    finally:
+        cache.close()
+
+
+async def kb_answered(knowledge_base, queries: List[str], concurrency: int = DEFAULT_CONCURRENCY) -> Set[str]:
+    """
+    Queries the KB fast path answers on its own, so there is no response to
+    cache. Query embeddings are kept in the EmbeddingCache (under a "query:"
+    model name), so reruns don't embed the same questions again.
+    """
+    from services.embedding_cache import content_hash
+    from services.providers import embedding_model_name
+
+    if not queries or not await asyncio.to_thread(knowledge_base.preload):
+        return set()
+
+    model = f"query:{embedding_model_name()}"
+    texts = {content_hash(knowledge_base.query_text(q)): knowledge_base.query_text(q) for q in queries}
+    vectors = await asyncio.to_thread(_stored_query_vectors, model, list(texts))
+
+    semaphore = asyncio.Semaphore(concurrency)
+    embedded = {}
+
+    async def embed(h: str):
+        async with semaphore:
+            try:
+                embedded[h] = await knowledge_base.embedder.aembed_query(texts[h])
+            except Exception as e:
+                print(f"[WARMUP] ✗ Embedding {texts[h]!r}: {e}")
+
+    await asyncio.gather(*(embed(h) for h in texts if h not in vectors))
+    if embedded:
+        await asyncio.to_thread(_store_query_vectors, model, embedded)
+        vectors.update(embedded)
+
+    answered = set()
+    for query in queries:
+        vector = vectors.get(content_hash(knowledge_base.query_text(query)))
+        match = knowledge_base.search_vector(vector) if vector is not None else None
+        if match is not None and match["similarity"] >= knowledge_base.threshold:
+            answered.add(query)
+    return answered
+
+
+async def warm(
+    queries: List[str],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    rate: float = DEFAULT_RATE,
+    refresh_within: float = DEFAULT_REFRESH_WITHIN,
+    dry_run: bool = False
+) -> Dict[str, Any]:
+    """
+    Warm the cache for queries; returns counts of
+    - fresh: already cached with more than refresh_within seconds left
+    - warmed / refreshed: generated and now cached (refreshed = replaced a
+      nearly expired entry)
+    - kb: answered by the KB fast path, which never needs the cache (not run)
+    - uncached: answered without a cache write (catalogue hit, or the
+      answer failed the quality check)
+    - failed: the graph raised
+    """
+    from services.deadline import new_deadline
+    from services.startup import get_graph
+
+    graph = await get_graph()
+    graph_app, response_cache = graph.get_app(), graph.response_cache
+
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = RateLimiter(rate)
+    stats = {"total": len(queries), "fresh": 0, "warmed": 0, "refreshed": 0, "kb": 0, "uncached": 0, "failed": 0}
+    done = 0
+    t0 = time.perf_counter()
+
+    def progress(final: bool = False):
+        if final or done % PROGRESS_EVERY == 0:
+            counts = " ".join(f"{k}={v}" for k, v in stats.items() if k != "total")
+            print(f"[WARMUP] {done}/{len(queries)} ({time.perf_counter() - t0:.1f}s) {counts}")
+
+    # Cache reads go through the backend (SQLite for warm_cache.py): keep them off the loop
+    intents = await asyncio.to_thread(expected_intents, queries, response_cache)
+    kb_hits = set()
+    if graph.KB_FAST_PATH_ENABLED:
+        kb_hits = await kb_answered(
+            graph.knowledge_base, [q for q in queries if intents[q] == "ask_hafiz"], concurrency
+        )
+
+    async def run(query: str):
+        nonlocal done
+        intent = intents[query]
+        remaining = await response_cache.attl_remaining(query, intent)
+
+        if query in kb_hits:
+            stats["kb"] += 1
+        elif remaining is not None and remaining > refresh_within:
+            stats["fresh"] += 1
+        elif dry_run:
+            stats["refreshed" if remaining is not None else "warmed"] += 1
+        else:
+            async with semaphore:
+                await limiter.acquire()
+                if remaining is not None:
+                    await response_cache.ainvalidate(query, intent)
+
+                session_id = f"warmup-{uuid.uuid4()}"
+                try:
+                    result = await graph_app.ainvoke({
+                        "query": query,
+                        "session_id": session_id,
+                        "deadline": new_deadline()
+                    })
+                    cached = await response_cache.attl_remaining(query, result.get("intent", intent)) is not None
+                    if not cached:
+                        stats["uncached"] += 1
+                    else:
+                        stats["refreshed" if remaining is not None else "warmed"] += 1
+                except Exception as e:
+                    stats["failed"] += 1
+                    print(f"[WARMUP] ✗ {query!r}: {e or type(e).__name__}")
+                finally:
+                    await asyncio.to_thread(graph.delete_conversation_history, session_id)
+
+        done += 1
+        progress()
+
+    await asyncio.gather(*(run(query) for query in queries))
+    progress(final=True)
+    stats["elapsed_s"] = round(time.perf_counter() - t0, 2)
+    return stats
+
+
+async def warm_on_startup():
+    """Startup hook: warm in the background with the CACHE_WARMUP_* settings"""
+    queries = warmup_queries(
+        os.getenv("CACHE_WARMUP_QUERIES") or None,
+        int(os.getenv("CACHE_WARMUP_TOP", DEFAULT_TOP))
+    )
+    print(f"[WARMUP] Warming {len(queries)} queries in the background")
+    try:
+        await warm(
+            queries,
+            concurrency=int(os.getenv("CACHE_WARMUP_CONCURRENCY", DEFAULT_CONCURRENCY)),
+            rate=float(os.getenv("CACHE_WARMUP_RATE", DEFAULT_RATE)),
+            refresh_within=float(os.getenv("CACHE_WARMUP_REFRESH_WITHIN", DEFAULT_REFRESH_WITHIN)),
+        )
+    except Exception as e:
+        print(f"[WARMUP] ✗ Startup warm-up failed: {e}")
@@ -0,0 +1,51 @@
+"""
+Request Deadlines
+
+Each /chat request gets an absolute deadline (time.monotonic() based),
+carried through the graph in AgentState["deadline"]. Nodes derive their LLM
+call timeouts from the remaining budget and skip work it can't cover, so
+a hung provider call can't hold a worker past the request's budget.
+"""
+
+from typing import Optional
+import os
+import time
+
+DEFAULT_DEADLINE_MS = 20000
+MAX_DEADLINE_MS = 60000
+
+# Upper bound for any single LLM call, with or without a deadline
+DEFAULT_LLM_CALL_TIMEOUT_MS = 30000
+
+# Kept back for parsing, memory update and writing the response
+RESERVE_MS = 100
+
+# Below this much budget an LLM call isn't worth starting
+MIN_CALL_MS = 250
+
+LLM_CALL_TIMEOUT_S = int(os.getenv("LLM_CALL_TIMEOUT_MS", DEFAULT_LLM_CALL_TIMEOUT_MS)) / 1000
+
+
+def new_deadline(timeout_ms: Optional[int] = None) -> float:
+    """Deadline for a request: its own timeout_ms (capped) or CHAT_DEADLINE_MS"""
+    if timeout_ms is None:
+        timeout_ms = int(os.getenv("CHAT_DEADLINE_MS", DEFAULT_DEADLINE_MS))
+    timeout_ms = min(timeout_ms, int(os.getenv("CHAT_MAX_DEADLINE_MS", MAX_DEADLINE_MS)))
+    return time.monotonic() + timeout_ms / 1000
+
+
+def remaining(deadline: Optional[float]) -> float:
+    """Seconds left before the deadline (inf without one)"""
+    if deadline is None:
+        return float("inf")
+    return deadline - time.monotonic()
+
+
+def has_budget(deadline: Optional[float], seconds: float = MIN_CALL_MS / 1000) -> bool:
+    """Whether `seconds` of work still fits before the reserve"""
+    return remaining(deadline) - RESERVE_MS / 1000 >= seconds
+
+
+def call_timeout(deadline: Optional[float]) -> float:
+    """Timeout for the next LLM call: remaining budget minus reserve, capped"""
+    return max(0.0, min(LLM_CALL_TIMEOUT_S, remaining(deadline) - RESERVE_MS / 1000))
@@ -0,0 +1,128 @@
+"""
+Local Dua Catalogue
+
+Curated duas from dua_catalogue.json (Arabic, transliteration, translation,
+source, context), tagged by situation. An in-memory inverted index over the
+situations, keywords and titles lets find_dua_node answer common requests
+("dua for travelling", "what to say after eating") in well under a
+millisecond, and only the queries no entry covers go to the LLM.
+
+Scores are the idf-weighted share of the query's terms an entry covers
+(situation tags count most, then keywords, then title words), so 1.0 means
+every meaningful word of the query matched a situation tag.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import os
+import threading
+
+from services.text_index import InvertedIndex
+
+DEFAULT_PATH = Path(__file__).resolve().parent.parent / "dua_catalogue.json"
+DEFAULT_MIN_SCORE = 0.55
+
+# Served when the LLM fails and nothing in the catalogue matches the query at all
+DEFAULT_ENTRY_ID = "anxiety_grief"
+
+RESPONSE_FIELDS = ("arabic", "transliteration", "translation", "source", "context")
+
+# Field weights in the index
+SITUATION_WEIGHT = 3.0
+KEYWORD_WEIGHT = 2.0
+TITLE_WEIGHT = 1.0
+
+# Request phrasing ("can you give me a dua for...") carries no situation
+STOP_WORDS = frozenset("""
+a about against am an and any are ask at be by can could did do does dua duah duas duaa doa
+during feel for from get give go help how i if im in is it just me my need of on or our please
+prayer prophet recite say says seek seeking should share some someone something supplication
+supplications t tell that the them they this time times to today tomorrow tonight us want we
+what when which while who will with would you your
+""".split())
+
+
+def dua_response(entry: Dict[str, Any]) -> Dict[str, str]:
+    """The find_dua_node response payload for a catalogue entry"""
+    return {field: entry[field] for field in RESPONSE_FIELDS}
+
+
+class DuaCatalogue:
+    """Lazily loaded catalogue with a term -> {entry index: weight} index"""
+
+    def __init__(self, path: Optional[str] = None, min_score: Optional[float] = None):
+        self.path = Path(path or os.getenv("DUA_CATALOGUE_PATH", DEFAULT_PATH))
+        if min_score is None:
+            min_score = float(os.getenv("DUA_CATALOGUE_MIN_SCORE", DEFAULT_MIN_SCORE))
+        self.min_score = min_score
+
+        self.entries: List[Dict[str, Any]] = []
+        self._index = InvertedIndex(STOP_WORDS)
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.stats = {"lookups": 0, "hits": 0, "fallbacks": 0}
+
+    def _load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[DUA] ✗ Could not read catalogue {self.path}: {e}")
+                entries = []
+
+            index = InvertedIndex(STOP_WORDS)
+            for i, entry in enumerate(entries):
+                index.add(i, [
+                    (" ".join(entry.get("situations", [])), SITUATION_WEIGHT),
+                    (" ".join(entry.get("keywords", [])), KEYWORD_WEIGHT),
+                    (entry.get("title", ""), TITLE_WEIGHT),
+                ])
+            self._index = index.finalize()
+            self.entries = entries
+            self._loaded = True
+            print(f"[DUA] ✓ Catalogue: {len(entries)} duas, {len(index.postings)} terms")
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[Dict[str, Any], float]]:
+        """Top-k (entry, score) pairs, best first; score in [0, 1]"""
+        if not self._loaded:
+            self._load()
+        return [(self.entries[i], score) for i, score in self._index.search(query, k)]
+
+    def match(self, query: str) -> Optional[Dict[str, Any]]:
+        """Best entry only when it clears min_score"""
+        self.stats["lookups"] += 1
+        results = self.search(query, k=1)
+        if not results or results[0][1] < self.min_score:
+            if results:
+                print(f"[DUA] ✗ Catalogue best {results[0][1]:.2f} < {self.min_score} ({results[0][0]['id']})")
+            return None
+
+        entry, score = results[0]
+        self.stats["hits"] += 1
+        print(f"[DUA] ✓ Catalogue {score:.2f} [{entry['id']}]")
+        return entry
+
+    def closest(self, query: str) -> Optional[Dict[str, Any]]:
+        """Best entry at any score, else the default entry (None if the catalogue is empty)"""
+        self.stats["fallbacks"] += 1
+        results = self.search(query, k=1)
+        if results:
+            return results[0][0]
+        return next((e for e in self.entries if e.get("id") == DEFAULT_ENTRY_ID), None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["lookups"]
+        return {
+            **self.stats,
+            "hit_ratio": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            "min_score": self.min_score,
+            "entries": len(self.entries),
+        }
+
+
+# Global catalogue instance
+dua_catalogue = DuaCatalogue()
@@ -0,0 +1,72 @@
+"""
+Embedding Cache
+
+Persistent store of document embeddings keyed by (model, content hash), so
+rebuilding an index only pays for entries whose text actually changed.
+"""
+
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+import hashlib
+import os
+import sqlite3
+
+DEFAULT_SQLITE_PATH = Path(__file__).resolve().parent.parent / ".cache" / "embeddings.sqlite"
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """SQLite table of float32 vectors; one instance per build, single-threaded"""
+
+    def __init__(self, model: str, path: Optional[str] = None):
+        self.model = model
+        self.path = Path(path or os.getenv("EMBEDDING_CACHE_PATH", DEFAULT_SQLITE_PATH))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, hash)
+            )
+        """)
+        self._conn.commit()
+
+    def get_many(self, hashes: Iterable[str]) -> Dict[str, List[float]]:
+        hashes = list(hashes)
+        found = {}
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(hashes), 500):
+            chunk = hashes[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+                [self.model, *chunk]
+            )
+            for h, blob in rows:
+                vector = array("f")
+                vector.frombytes(blob)
+                found[h] = vector.tolist()
+        return found
+
+    def put_many(self, vectors: Dict[str, List[float]]):
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, hash, vector) VALUES (?, ?, ?)",
+                [(self.model, h, array("f", v).tobytes()) for h, v in vectors.items()]
+            )
+
+    def __len__(self) -> int:
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM embeddings WHERE model = ?", (self.model,)
+        ).fetchone()[0]
+
+    def close(self):
+        self._conn.close()
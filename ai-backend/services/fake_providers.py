@@ -0,0 +1,243 @@
+"""
+Offline Provider Stand-ins
+
+Deterministic replacements for the Gemini chat model and embeddings so the
+ai-backend can be benchmarked and profiled without network access or an
+API key. Selected through services.providers:
+
+    LLM_PROVIDER=fake           -> FakeChatModel
+    EMBEDDINGS_PROVIDER=hashing -> HashingEmbeddings
+"""
+
+from typing import Any, AsyncIterator, Iterator, List, Optional
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+# Matches the shipped faiss_islamic_kb index (gemini-embedding-001)
+DEFAULT_EMBEDDING_DIM = 3072
+
+# Buckets each token/trigram feature is spread over (sparse random projection)
+PROJECTION_NNZ = 8
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+DUA_PAYLOAD = {
+    "arabic": "رَبَّنَا آتِنَا فِي الدُّنْيَا حَسَنَةً وَفِي الْآخِرَةِ حَسَنَةً وَقِنَا عَذَابَ النَّارِ",
+    "transliteration": "Rabbana atina fid-dunya hasanatan wa fil-akhirati hasanatan wa qina adhaban-nar",
+    "translation": "Our Lord, give us in this world that which is good and in the Hereafter that which is good and protect us from the punishment of the Fire",
+    "source": "Quran 2:201",
+    "context": "This comprehensive dua from Surah Al-Baqarah was among the most frequent supplications of the Prophet (PBUH) and can be recited at any time, especially between the Yemeni corner and the Black Stone."
+}
+HAFIZ_TEXT = (
+    "Assalamu alaikum, dear friend. This is a simulated answer used for benchmarking. "
+    "The Prophet (PBUH) taught us that the most beloved deeds to Allah are those done consistently, "
+    "even if small (Sahih Bukhari 6464). You should try to build one small habit today.\n\n"
+    "May Allah make it easy for you."
+)
+VIDEO_PAYLOAD = {
+    "videos": [
+        {"title": "Simulated lecture on patience and gratitude", "channel": "Yaqeen Institute", "thumbnail": "https://i.ytimg.com/vi/x/hqdefault.jpg", "duration": "12:00"},
+        {"title": "Simulated lecture on the meaning of tawakkul", "channel": "Omar Suleiman", "thumbnail": "https://i.ytimg.com/vi/y/hqdefault.jpg", "duration": "15:00"},
+        {"title": "Simulated reflection on Surah Al-Kahf", "channel": "Bayyinah Institute", "thumbnail": "https://i.ytimg.com/vi/z/hqdefault.jpg", "duration": "20:00"}
+    ]
+}
+INTENT_PAYLOADS = {"dua": DUA_PAYLOAD, "ask_hafiz": {"text": HAFIZ_TEXT}, "watch": VIDEO_PAYLOAD}
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Feature-hashing embedder (word unigrams + character trigrams)
+
+    Every feature is hashed to PROJECTION_NNZ signed buckets, i.e. a sparse
+    random projection of the bag of features, then L2-normalised. Identical
+    texts embed identically across runs and machines, and texts sharing words
+    land close together, so similarity thresholds behave plausibly.
+    """
+
+    def __init__(self, dim: Optional[int] = None, latency_ms: Optional[float] = None):
+        self.dim = dim or int(os.getenv("FAKE_EMBEDDING_DIM", DEFAULT_EMBEDDING_DIM))
+        if latency_ms is None:
+            latency_ms = float(os.getenv("FAKE_EMBEDDING_LATENCY_MS", "0"))
+        self.latency_s = latency_ms / 1000
+
+    def _features(self, text: str) -> List[str]:
+        tokens = TOKEN_RE.findall(text.lower())
+        features = [f"w:{t}" for t in tokens]
+        for token in tokens:
+            padded = f"#{token}#"
+            features.extend(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        return features
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        for feature in self._features(text):
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=4 * PROJECTION_NNZ).digest()
+            for i in range(PROJECTION_NNZ):
+                bucket = int.from_bytes(digest[4 * i:4 * i + 4], "little")
+                vector[bucket % self.dim] += 1.0 if bucket & 0x80000000 else -1.0
+
+        norm = math.sqrt(sum(v * v for v in vector))
+        if norm == 0:
+            vector[0], norm = 1.0, 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        return [self._embed(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+def canned_response(messages: List[BaseMessage]) -> str:
+    """Pick the reply a real model would give based on which prompt is in use"""
+    from services.intent_classifier import intent_classifier
+
+    system = messages[0].content if messages else ""
+    query = messages[-1].content if messages else ""
+
+    if "Classify into" in system:
+        return json.dumps({"intent": intent_classifier.classify(query)[0]})
+    if "In ONE step" in system:
+        intent = intent_classifier.classify(query)[0]
+        return json.dumps({"intent": intent, "payload": INTENT_PAYLOADS[intent]}, ensure_ascii=False)
+    if "authentic duas" in system:
+        return json.dumps(DUA_PAYLOAD, ensure_ascii=False)
+    if "rank video candidates" in system:
+        return json.dumps({"picks": [0, 1, 2]})
+    if "content curator" in system:
+        return json.dumps(VIDEO_PAYLOAD, ensure_ascii=False)
+    if "plain text" in system:
+        return HAFIZ_TEXT
+    return json.dumps({"text": HAFIZ_TEXT}, ensure_ascii=False)
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model returning canned per-intent payloads after a simulated delay
+
+    latency_distribution:
+    - fixed:     always latency_ms
+    - uniform:   latency_ms +/- latency_jitter_ms
+    - normal:    mean latency_ms, stddev latency_jitter_ms (floored at 0)
+    - lognormal: median latency_ms, sigma latency_sigma (long tail)
+
+    Delays come from one RNG seeded with `seed`, so a run with the same call
+    order reproduces the same latencies. error_rate makes that share of
+    calls raise, for exercising retries and fallbacks. blocking=True sleeps
+    synchronously even in async calls, like a sync client on the event loop.
+    """
+
+    latency_ms: float = 300.0
+    latency_distribution: str = "fixed"
+    latency_jitter_ms: float = 50.0
+    latency_sigma: float = 0.5
+    error_rate: float = 0.0
+    stream_chunk_chars: int = 24
+    seed: int = 0
+    blocking: bool = False
+
+    _rng: random.Random = PrivateAttr()
+    _rng_lock: Any = PrivateAttr()
+    _calls: int = PrivateAttr(default=0)
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._rng = random.Random(self.seed)
+        self._rng_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "FakeChatModel":
+        return cls(
+            latency_ms=float(os.getenv("FAKE_LLM_LATENCY_MS", "300")),
+            latency_distribution=os.getenv("FAKE_LLM_LATENCY_DIST", "fixed"),
+            latency_jitter_ms=float(os.getenv("FAKE_LLM_LATENCY_JITTER_MS", "50")),
+            latency_sigma=float(os.getenv("FAKE_LLM_LATENCY_SIGMA", "0.5")),
+            error_rate=float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+            seed=int(os.getenv("FAKE_LLM_SEED", "0")),
+        )
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def calls(self) -> int:
+        return self._calls
+
+    def _draw(self):
+        """Return (delay in seconds, whether this call fails)"""
+        with self._rng_lock:
+            self._calls += 1
+            if self.latency_distribution == "uniform":
+                ms = self._rng.uniform(self.latency_ms - self.latency_jitter_ms, self.latency_ms + self.latency_jitter_ms)
+            elif self.latency_distribution == "normal":
+                ms = self._rng.gauss(self.latency_ms, self.latency_jitter_ms)
+            elif self.latency_distribution == "lognormal":
+                ms = self._rng.lognormvariate(math.log(max(self.latency_ms, 1e-3)), self.latency_sigma)
+            else:
+                ms = self.latency_ms
+            fails = self.error_rate > 0 and self._rng.random() < self.error_rate
+        return max(0.0, ms) / 1000, fails
+
+    def _result(self, messages: List[BaseMessage], fails: bool) -> ChatResult:
+        if fails:
+            raise RuntimeError("Simulated LLM failure")
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=canned_response(messages)))])
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        delay, fails = self._draw()
+        time.sleep(delay)
+        return self._result(messages, fails)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        delay, fails = self._draw()
+        if self.blocking:
+            time.sleep(delay)
+        else:
+            await asyncio.sleep(delay)
+        return self._result(messages, fails)
+
+    def _chunks(self, text: str) -> Iterator[str]:
+        for start in range(0, len(text), self.stream_chunk_chars):
+            yield text[start:start + self.stream_chunk_chars]
+
+    async def _astream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        # Time to first token is the drawn latency; the rest trickles out quickly
+        delay, fails = self._draw()
+        await asyncio.sleep(delay)
+        if fails:
+            raise RuntimeError("Simulated LLM failure")
+        for piece in self._chunks(canned_response(messages)):
+            await asyncio.sleep(0)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+
+    def _stream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        delay, fails = self._draw()
+        time.sleep(delay)
+        if fails:
+            raise RuntimeError("Simulated LLM failure")
+        for piece in self._chunks(canned_response(messages)):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
@@ -0,0 +1,179 @@
+"""
+Hedged Generation
+
+Instead of waiting for a full LLM call to fail the quality check before
+retrying, fire backup candidates concurrently and take the first one that
+passes ResponseEvaluator, cancelling the rest.
+
+Per intent (CACHE_TTL_<INTENT>-style env overrides):
+- HEDGE_CANDIDATES_<INTENT>: most candidates per request (default 2, i.e.
+  the original call plus one retry)
+- HEDGE_DELAY_MS_<INTENT>: when to fire the next candidate
+    off  - only after the previous one fails (sequential retry, the default)
+    0    - all candidates at once
+    p90  - after the observed p90 LLM latency for the intent
+    <ms> - after a fixed delay
+  A candidate that errors or fails the check always triggers the next one.
+
+With a request deadline, a candidate is only started while the remaining
+budget covers it: the first needs MIN_CALL_MS, backups the intent's
+observed median latency.
+"""
+
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import os
+
+from services.deadline import MIN_CALL_MS, has_budget
+from services.metrics import registry
+
+DEFAULT_CANDIDATES = 2
+DEFAULT_DELAY = "off"
+
+# p90 needs some history; until then the fixed fallback delay is used
+P90_WINDOW = 200
+P90_MIN_SAMPLES = 20
+P90_FALLBACK_MS = 2000
+
+hedge_outcomes = registry.counter(
+    "hafiz_hedge_total",
+    "Hedged generations by winner (primary / backup) or none_passed / failed / no_budget",
+    ["intent", "outcome"]
+)
+hedge_candidates = registry.counter(
+    "hafiz_hedge_candidates_total", "Candidate generations launched", ["intent"]
+)
+
+# (result, evaluation) produced by one candidate
+Candidate = Tuple[Dict[str, Any], Dict[str, Any]]
+
+
+class HedgePolicy:
+    def __init__(self, intent: str):
+        self.intent = intent
+        key = intent.upper()
+        self.candidates = int(os.getenv(f"HEDGE_CANDIDATES_{key}", os.getenv("HEDGE_CANDIDATES", DEFAULT_CANDIDATES)))
+        self.delay = os.getenv(f"HEDGE_DELAY_MS_{key}", os.getenv("HEDGE_DELAY_MS", DEFAULT_DELAY)).strip().lower()
+        self._latencies = deque(maxlen=P90_WINDOW)
+        self.stats = {
+            "primary": 0, "backup": 0, "none_passed": 0, "failed": 0, "no_budget": 0,
+            "launched": 0, "skipped_for_deadline": 0
+        }
+
+    def observe(self, seconds: float):
+        self._latencies.append(seconds)
+
+    def delay_s(self) -> Optional[float]:
+        """Seconds before firing the next candidate, None = only on failure"""
+        if self.delay == "off":
+            return None
+        if self.delay == "p90":
+            if len(self._latencies) < P90_MIN_SAMPLES:
+                return P90_FALLBACK_MS / 1000
+            ordered = sorted(self._latencies)
+            return ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))]
+        return float(self.delay) / 1000
+
+    def expected_latency_s(self) -> float:
+        """Median observed latency, the budget a backup needs to be worth firing"""
+        if len(self._latencies) < P90_MIN_SAMPLES:
+            return MIN_CALL_MS / 1000
+        ordered = sorted(self._latencies)
+        return ordered[len(ordered) // 2]
+
+    def record(self, outcome: str):
+        self.stats[outcome] += 1
+        hedge_outcomes.inc(self.intent, outcome)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "candidates": self.candidates, "delay": self.delay, "current_delay_s": self.delay_s()}
+
+
+async def hedged(
+    policy: HedgePolicy,
+    attempt: Callable[[int], Awaitable[Candidate]],
+    candidates: Optional[int] = None,
+    deadline: Optional[float] = None
+) -> Tuple[Optional[Candidate], int]:
+    """
+    Run attempt(0), attempt(1), ... under the policy
+
+    Returns (candidate, index) for the first candidate whose evaluation
+    passed, else the best-scoring one that completed (index -1 if none
+    passed), else (None, -1) when every attempt raised or none fit the
+    deadline. attempt() is expected to bound its own call by the deadline.
+    """
+    limit = max(1, candidates if candidates is not None else policy.candidates)
+    delay = policy.delay_s()
+    loop = asyncio.get_running_loop()
+
+    running: Dict["asyncio.Task[Candidate]", int] = {}
+    started: Dict[int, float] = {}
+    best: Optional[Candidate] = None
+
+    def launch() -> bool:
+        nonlocal limit
+        index = len(started)
+        needed = MIN_CALL_MS / 1000 if index == 0 else policy.expected_latency_s()
+        if not has_budget(deadline, needed):
+            limit = index  # nothing more fits before the deadline
+            policy.stats["skipped_for_deadline"] += 1
+            print(f"[HEDGE] {policy.intent} candidate {index} skipped, deadline too close")
+            return False
+        started[index] = loop.time()
+        running[asyncio.ensure_future(attempt(index))] = index
+        policy.stats["launched"] += 1
+        hedge_candidates.inc(policy.intent)
+        return True
+
+    launch()
+    if delay == 0:
+        while len(started) < limit:
+            launch()
+
+    try:
+        while running:
+            timeout = None
+            if delay is not None and len(started) < limit:
+                timeout = max(0.0, started[len(started) - 1] + delay - loop.time())
+
+            done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                launch()  # hedge delay elapsed
+                continue
+
+            failures = 0
+            for task in done:
+                index = running.pop(task)
+                try:
+                    candidate = task.result()
+                except Exception as e:
+                    print(f"[HEDGE] {policy.intent} candidate {index} failed: {e or type(e).__name__}")
+                    failures += 1
+                    continue
+
+                policy.observe(loop.time() - started[index])
+                _, evaluation = candidate
+                if evaluation["passed"]:
+                    policy.record("primary" if index == 0 else "backup")
+                    if index > 0:
+                        print(f"[HEDGE] {policy.intent} backup candidate {index} won")
+                    return candidate, index
+                failures += 1
+                if best is None or evaluation["score"] > best[1]["score"]:
+                    best = candidate
+
+            # Each failed candidate brings in the next one right away
+            for _ in range(failures):
+                if len(started) < limit:
+                    launch()
+
+        if best is not None:
+            policy.record("none_passed")
+        else:
+            policy.record("failed" if started else "no_budget")
+        return best, -1
+    finally:
+        for task in running:
+            task.cancel()
@@ -0,0 +1,198 @@
+"""
+Local Intent Classifier
+
+In-process replacement for the analyzer LLM call. Keyword/regex rules catch
+explicit requests ("dua for travel", "lectures about patience") and
+questions ("can I make dua in English?"); everything else goes through a
+small multinomial Naive Bayes model trained on seed examples plus the
+questions in islamic_knowledge_base.json.
+
+classify() returns (intent, confidence); analyzer_node only falls back to
+the LLM when the confidence is below its threshold. Model guesses are capped
+at MODEL_MAX_CONFIDENCE, so only a rule can skip the LLM.
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import json
+import math
+import re
+import threading
+
+INTENTS = ("dua", "ask_hafiz", "watch")
+
+KB_PATH = Path(__file__).resolve().parent.parent / "islamic_knowledge_base.json"
+
+_DUA_WORD = r"(?:dua|duas|duaa|du'a|du'as|doa|supplications?|invocations?)"
+
+# "Share a reminder about patience" wants words, "youtube reminders" wants videos
+_MEDIA = r"(?:videos?|lectures?|clips?|documentar(?:y|ies)|khutbahs?|podcasts?|talks?|(?<=youtube )reminders?|(?<=video )reminders?|episodes?)"
+
+# Question openers, and the ones that are really requests ("is there a dua
+# for...", "can you...", "what is the best dua for...")
+_QUESTION = r"(?:is|are|was|were|am|does|do|did|should|shall|must|may|might|can|could|would|will|why|how|(?:what|who|when|where)(?:'s|\s+(?:is|are|was|does|do|did)))"
+_REQUEST_OPENER = (
+    rf"(?:(?:is|are) there|do you (?:have|know)|(?:can|could|would|will) (?:you|u)|(?:can|may) i (?:get|have)"
+    rf"|what (?:should|can|do) i (?:say|recite|read)"
+    rf"|what(?:'s|\s+is|\s+are)\s+(?:a|an|the|some)\s+(?:\w+\s+)?{_DUA_WORD}\s+(?:for|to|when|before|after|against|upon|on|while|during))\b"
+)
+
+# Explicit requests - (pattern, intent, confidence). Watch and dua rules need
+# a request shape: "is it haram to watch TV" or "can I make dua in English?"
+# are questions for Hafiz, and a bare mention of youtube is not a request for
+# videos. Questions are matched after the watch rules, before the dua rules.
+RULES = [
+    (re.compile(rf"\b(?:show me|recommend|suggest|find me|send me|give me|share|looking for|any good|some good)\b.*\b{_MEDIA}\b"), "watch", 0.95),
+    (re.compile(rf"^\s*(?:(?:a|an|some|any|short|good|youtube|islamic)\s+)*{_MEDIA}\s+(?:about|on|for|by|from|of|to|explaining|covering|that)\b"), "watch", 0.95),
+    (re.compile(r"\b(?:something|anything|what) (?:to|i can|should i) (?:watch|listen to)\b"), "watch", 0.9),
+    (re.compile(rf"\b(?:want|like|need) to (?:watch|listen to) (?:something|a|an|some|{_MEDIA})\b"), "watch", 0.9),
+    (re.compile(r"\b(?:series|speakers?|channels?)\b.*\b(?:about|on|for|by)\b"), "watch", 0.8),
+    (re.compile(rf"^\s*(?!{_REQUEST_OPENER}){_QUESTION}\b"), "ask_hafiz", 0.9),
+    (re.compile(rf"\b{_DUA_WORD}\s+(?:for|to|when|before|after|against|upon|on|while|during|of|in)\b"), "dua", 0.95),
+    (re.compile(rf"\b(?:what|which|give me|share|teach me|tell me|recommend|need|want|best|a|any|some)\s+(?:\w+\s+)?{_DUA_WORD}\b"), "dua", 0.9),
+    (re.compile(rf"^\s*{_DUA_WORD}\b"), "dua", 0.9),
+    (re.compile(r"\bwhat (?:should i|can i|do i|to) (?:say|recite|read) (?:when|before|after|for|if|to|upon)\b"), "dua", 0.85),
+]
+
+# Seed examples for the statistical model (labels as the analyzer prompt defines them)
+SEED_EXAMPLES = {
+    "dua": [
+        "dua for anxiety", "dua when anxious", "what dua for stress", "dua for travelling",
+        "give me a dua for my exams", "supplication before sleeping", "dua for a sick friend",
+        "what should I recite when I am worried", "dua for forgiveness", "prayer for my parents",
+        "dua for breaking fast", "dua for laylatul qadr", "dua for rain", "dua for patience",
+        "i need a dua for grief", "dua for a new job", "dua for protection from evil eye",
+        "what to say when entering the mosque", "dua after wudu", "dua for debt relief",
+        "help me with a dua for my marriage", "dua for guidance in decisions istikhara",
+        "a dua for my child", "what do i say when someone sneezes", "dua for the deceased",
+    ],
+    "ask_hafiz": [
+        "what is ramadan", "how do i perform wudu", "is it permissible to eat before fajr",
+        "why do muslims fast", "what breaks the fast", "how many rakats in taraweeh",
+        "what is zakat and who must pay it", "when is laylatul qadr", "explain tawakkul",
+        "what does islam say about kindness to parents", "how do i make up missed fasts",
+        "can i pray with shoes on", "who was the first prophet", "what is the meaning of taqwa",
+        "i feel distant from allah what should i do", "how can i be more consistent in prayer",
+        "what is the ruling on music", "tell me about the companions", "when are duas most accepted",
+        "what is the importance of friday", "how do i repent sincerely", "what is sadaqah jariyah",
+        "what happens after death", "is it sunnah to eat dates at iftar", "how to deal with anger in islam",
+    ],
+    "watch": [
+        "videos about patience", "show me lectures on the seerah", "recommend a talk about hope",
+        "youtube lectures on tafsir", "something to watch about ramadan", "mufti menk on anxiety",
+        "omar suleiman series on the hereafter", "nouman ali khan surah kahf", "yaqeen institute videos on doubt",
+        "a lecture about marriage", "clips about gratitude", "bayyinah quran reflections",
+        "i want to watch something about the prophets", "lectures for the last ten nights",
+        "short reminders to watch", "khutbah about forgiveness", "documentary about hajj",
+        "yasir qadhi seerah episodes", "motivational islamic videos", "talks on raising children",
+    ],
+}
+
+# Highest confidence the model alone may report; below the analyzer's
+# INTENT_CONFIDENCE_THRESHOLD so unmatched queries still reach the LLM
+MODEL_MAX_CONFIDENCE = 0.8
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def match_rules(query: str) -> Optional[Tuple[str, float]]:
+    """Return the first (intent, confidence) rule hit: watch, then questions, then dua"""
+    text = query.lower()
+    for pattern, intent, confidence in RULES:
+        if pattern.search(text):
+            return intent, confidence
+    return None
+
+
+class NaiveBayes:
+    """Multinomial Naive Bayes with Laplace smoothing over unigrams + bigrams"""
+
+    def __init__(self):
+        self.word_counts: Dict[str, Dict[str, int]] = {i: {} for i in INTENTS}
+        self.totals: Dict[str, int] = {i: 0 for i in INTENTS}
+        self.doc_counts: Dict[str, int] = {i: 0 for i in INTENTS}
+        self.vocab = set()
+
+    @staticmethod
+    def features(text: str) -> List[str]:
+        tokens = tokenize(text)
+        return tokens + [f"{a}_{b}" for a, b in zip(tokens, tokens[1:])]
+
+    def fit(self, examples: List[Tuple[str, str]]) -> "NaiveBayes":
+        for text, intent in examples:
+            self.doc_counts[intent] += 1
+            for feature in self.features(text):
+                counts = self.word_counts[intent]
+                counts[feature] = counts.get(feature, 0) + 1
+                self.totals[intent] += 1
+                self.vocab.add(feature)
+        return self
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        features = [f for f in self.features(text) if f in self.vocab]
+        total_docs = sum(self.doc_counts.values())
+        vocab_size = len(self.vocab)
+
+        scores = {}
+        for intent in INTENTS:
+            log_prob = 0.0
+            counts = self.word_counts[intent]
+            denominator = self.totals[intent] + vocab_size
+            for feature in features:
+                log_prob += math.log((counts.get(feature, 0) + 1) / denominator)
+            # Average over features so long queries don't become overconfident
+            if features:
+                log_prob /= len(features)
+            scores[intent] = log_prob + math.log(self.doc_counts[intent] / total_docs) / max(len(features), 1)
+
+        # Softmax over the per-feature averages, scaled x4 to spread them into usable confidences
+        top = max(scores.values())
+        exp = {i: math.exp((s - top) * 4) for i, s in scores.items()}
+        norm = sum(exp.values())
+        return {i: v / norm for i, v in exp.items()}
+
+
+class IntentClassifier:
+    """Rules first, then Naive Bayes; trained lazily on first use"""
+
+    def __init__(self, kb_path: Path = KB_PATH):
+        self.kb_path = kb_path
+        self._model: Optional[NaiveBayes] = None
+        self._lock = threading.Lock()
+
+    def _training_examples(self) -> List[Tuple[str, str]]:
+        examples = [(text, intent) for intent, texts in SEED_EXAMPLES.items() for text in texts]
+        try:
+            with open(self.kb_path, "r", encoding="utf-8") as f:
+                for entry in json.load(f):
+                    question = entry["question"]
+                    rule = match_rules(question)
+                    examples.append((question, rule[0] if rule else "ask_hafiz"))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[INTENT] Could not read {self.kb_path}: {e}")
+        return examples
+
+    @property
+    def model(self) -> NaiveBayes:
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = NaiveBayes().fit(self._training_examples())
+        return self._model
+
+    def classify(self, query: str) -> Tuple[str, float]:
+        rule = match_rules(query)
+        if rule:
+            return rule
+
+        probabilities = self.model.predict_proba(query)
+        intent = max(probabilities, key=probabilities.get)
+        return intent, min(probabilities[intent], MODEL_MAX_CONFIDENCE)
+
+
+# Global classifier instance
+intent_classifier = IntentClassifier()
@@ -0,0 +1,145 @@
+"""
+Knowledge Base Fast Path
+
+Similarity search over the curated Q&A index in faiss_islamic_kb/ (built by
+build_vector_store.py). A confident match is answered straight from the
+curated answer, skipping the LLM entirely.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import asyncio
+import os
+import threading
+
+DEFAULT_INDEX_PATH = Path(__file__).resolve().parent.parent / "faiss_islamic_kb"
+DEFAULT_THRESHOLD = 0.85
+
+
+def format_kb_answer(entry: Dict[str, str]) -> str:
+    """Wrap a curated answer in Hafiz's greeting/closing structure"""
+    return (
+        f"Assalamu alaikum, dear friend. That is a beautiful question to ask.\n\n"
+        f"{entry['answer']}\n\n"
+        f"May Allah increase you in beneficial knowledge and make it easy for you to act upon it."
+    )
+
+
+class KnowledgeBase:
+    """
+    Lazily loaded LangChain FAISS store over islamic_knowledge_base.json
+
+    Similarity is reported as cosine: the index stores unit-length Gemini
+    embeddings, so a squared L2 distance d maps to cos = 1 - d / 2. The
+    path may also be a compact copy from services/vector_index (quantized,
+    HNSW/IVF, truncated dimensions); query vectors are truncated to match.
+    """
+
+    def __init__(self, path: Optional[str] = None, embedder=None, threshold: Optional[float] = None):
+        self.path = Path(path or os.getenv("KB_INDEX_PATH", DEFAULT_INDEX_PATH))
+        self._embedder = embedder
+        if threshold is None:
+            threshold = float(os.getenv("KB_CONFIDENCE_THRESHOLD", DEFAULT_THRESHOLD))
+        self.threshold = threshold
+        self.mmap = os.getenv("KB_INDEX_MMAP", "true").lower() == "true"
+
+        self._store = None
+        self._meta = {}
+        self._load_failed = False
+        self._lock = threading.Lock()
+        self.stats = {"lookups": 0, "hits": 0, "errors": 0}
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            from services.providers import get_embeddings
+            self._embedder = get_embeddings()
+        return self._embedder
+
+    def _load(self):
+        with self._lock:
+            if self._store is None and not self._load_failed:
+                from services.vector_index import load_store
+
+                try:
+                    store, self._meta = load_store(self.path, self.embedder, mmap=self.mmap)
+                    self._store = store  # published after _meta, which search() reads unlocked
+                    print(f"[KB] ✓ Loaded {self._store.index.ntotal} entries from {self.path} "
+                          f"({self._meta.get('factory', 'Flat')})")
+                except Exception as e:
+                    self._load_failed = True
+                    print(f"[KB] ✗ Could not load {self.path}: {e}")
+        return self._store
+
+    def preload(self) -> bool:
+        """Load the index now (blocking) instead of on the first lookup"""
+        return self._load() is not None
+
+    def _similarity(self, score: float) -> float:
+        from langchain_community.vectorstores.utils import DistanceStrategy
+
+        if self._store.distance_strategy == DistanceStrategy.MAX_INNER_PRODUCT:
+            return score
+        return max(0.0, 1.0 - score / 2)
+
+    async def search(self, query: str) -> Optional[Dict[str, Any]]:
+        """Return the closest entry with its cosine similarity, or None"""
+        store = self._store or await asyncio.to_thread(self._load)
+        if store is None:
+            return None
+
+        vector = await self.embedder.aembed_query(self.query_text(query))
+        return self.search_vector(vector)
+
+    @staticmethod
+    def query_text(query: str) -> str:
+        """The text search() embeds for query"""
+        return query.lower().strip()
+
+    def search_vector(self, vector: List[float]) -> Optional[Dict[str, Any]]:
+        """search() for an already embedded query (the index must be loaded)"""
+        if self._meta.get("dims"):
+            from services.vector_index import truncate_query
+            vector = truncate_query(vector, self._meta["dims"])
+        results = self._store.similarity_search_with_score_by_vector(vector, k=1)
+        if not results:
+            return None
+
+        doc, score = results[0]
+        return {
+            "topic": doc.metadata.get("topic", ""),
+            "question": doc.metadata.get("question", ""),
+            "answer": doc.page_content.split("\nAnswer: ", 1)[-1],
+            "similarity": self._similarity(score),
+        }
+
+    async def lookup(self, query: str, threshold: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Return the best entry only when it clears the confidence threshold"""
+        if threshold is None:
+            threshold = self.threshold
+        self.stats["lookups"] += 1
+        try:
+            match = await self.search(query)
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"[KB] Search error: {e}")
+            return None
+
+        if match is None or match["similarity"] < threshold:
+            if match:
+                print(f"[KB] ✗ Best match {match['similarity']:.3f} < {threshold}")
+            return None
+
+        self.stats["hits"] += 1
+        print(f"[KB] ✓ {match['similarity']:.3f} [{match['topic']}] {match['question']}")
+        return match
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["lookups"]
+        return {
+            **self.stats,
+            "hit_ratio": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            "threshold": self.threshold,
+            "loaded": self._store is not None,
+            "index": self._meta.get("factory", "Flat") if self._store is not None else None,
+        }
@@ -0,0 +1,232 @@
+"""
+Pipeline Metrics
+
+Per-node wall-clock timings for the LangGraph pipeline. build_graph() wraps
+every node with timed_node(), and /metrics/nodes reports the totals so a
+load test can see where request time goes.
+
+Counters and histograms are exported at /metrics in the Prometheus text
+format. They are a few dict updates under a lock per observation: about
+2-3 us per wrapped node or LLM call, within run-to-run noise of a whole
+offline graph run (benchmarks/metrics_overhead.py, metrics on vs off).
+"""
+
+from bisect import bisect_left
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import threading
+import time
+
+# Seconds; spans in-process nodes (sub-ms) up to slow LLM calls
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SCORE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for values, total in sorted(self.samples().items()):
+            lines.append(f"{self.name}{_labels(self.labels, values)} {_number(total)}")
+        return lines
+
+
+class CallbackCounter(Counter):
+    """Counter read at scrape time from stats another component already keeps"""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str], fn: Callable[[], Dict[Tuple[str, ...], float]]):
+        super().__init__(name, help, labels)
+        self.fn = fn
+
+    def samples(self) -> Dict[Tuple[str, ...], float]:
+        return self.fn()
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: (list(v[0]), v[1], v[2]) for k, v in self._series.items()}
+
+        for values, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labels, values, le)} {cumulative}")
+            inf = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.labels, values, inf)} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, values)} {repr(float(total))}")
+            lines.append(f"{self.name}_count{_labels(self.labels, values)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+node_duration = registry.histogram(
+    "hafiz_node_duration_seconds", "Wall-clock time per LangGraph node run", ["node"]
+)
+llm_calls = registry.counter(
+    "hafiz_llm_calls_total", "LLM calls by node and outcome (ok / error / timeout)", ["node", "outcome"]
+)
+llm_duration = registry.histogram(
+    "hafiz_llm_call_duration_seconds", "LLM call latency by node", ["node"]
+)
+retries = registry.counter(
+    "hafiz_retries_total", "Regenerations after a failed quality check", ["intent"]
+)
+fallbacks = registry.counter(
+    "hafiz_fallbacks_total", "Responses served from a fallback instead of the LLM", ["intent", "reason"]
+)
+evaluator_scores = registry.histogram(
+    "hafiz_evaluator_score", "ResponseEvaluator scores of generated responses", ["intent"], SCORE_BUCKETS
+)
+
+
+class NodeTimings:
+    """Count / total / max seconds per node name (thread- and loop-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._nodes: Dict[str, Dict[str, float]] = {}
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            node = self._nodes.setdefault(name, {"count": 0, "total_s": 0.0, "max_s": 0.0})
+            node["count"] += 1
+            node["total_s"] += seconds
+            node["max_s"] = max(node["max_s"], seconds)
+
+    def reset(self):
+        with self._lock:
+            self._nodes.clear()
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            total = sum(node["total_s"] for node in self._nodes.values())
+            return {
+                name: {
+                    **node,
+                    "mean_ms": 1000 * node["total_s"] / node["count"] if node["count"] else 0.0,
+                    "share": node["total_s"] / total if total else 0.0,
+                }
+                for name, node in self._nodes.items()
+            }
+
+
+node_timings = NodeTimings()
+
+
+def record_node(name: str, seconds: float):
+    """Record one run of a node (for steps timed_node can't wrap, e.g. a token stream)"""
+    node_timings.record(name, seconds)
+    node_duration.observe(seconds, name)
+
+
+def timed_node(name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap a sync or async graph node so each run is recorded under name"""
+    if asyncio.iscoroutinefunction(fn):
+        @wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                record_node(name, time.perf_counter() - t0)
+        return async_wrapper
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            record_node(name, time.perf_counter() - t0)
+    return wrapper
+
+
+async def timed_llm_call(node: str, call: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+    """Await an LLM call (cancelled after timeout seconds), counting it and its latency under node"""
+    t0 = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(call(), timeout)
+    except asyncio.TimeoutError:
+        llm_calls.inc(node, "timeout")
+        raise
+    except Exception:
+        llm_calls.inc(node, "error")
+        raise
+    finally:
+        llm_duration.observe(time.perf_counter() - t0, node)
+    llm_calls.inc(node, "ok")
+    return result
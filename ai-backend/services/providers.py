@@ -0,0 +1,129 @@
+"""
+Model Providers
+
+Shared, lazily created model clients used across the ai-backend.
+
+LLM_PROVIDER (gemini | fake) and EMBEDDINGS_PROVIDER (gemini | hashing)
+swap in the deterministic offline stand-ins from services/fake_providers.py.
+"""
+
+from collections import OrderedDict
+from typing import List
+import os
+import threading
+
+from langchain_core.embeddings import Embeddings
+
+CHAT_MODEL = "gemini-2.5-flash"
+EMBEDDING_MODEL = "models/gemini-embedding-001"
+
+# Recent query embeddings shared by the semantic cache and the knowledge base
+QUERY_MEMO_SIZE = 1024
+
+_embeddings = None
+_embeddings_lock = threading.Lock()
+
+
+class MemoizedEmbeddings(Embeddings):
+    """
+    Wraps an Embeddings client with an LRU memo for single-query embeddings,
+    so the cache and KB lookups of one request pay for one embedding call
+    """
+
+    def __init__(self, inner: Embeddings, size: int = QUERY_MEMO_SIZE):
+        self.inner = inner
+        self.size = size
+        self._memo: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _recall(self, text: str):
+        with self._lock:
+            vector = self._memo.get(text)
+            if vector is not None:
+                self._memo.move_to_end(text)
+            return vector
+
+    def _remember(self, text: str, vector: List[float]):
+        with self._lock:
+            self._memo[text] = vector
+            if len(self._memo) > self.size:
+                self._memo.popitem(last=False)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.inner.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.inner.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = self._recall(text)
+        if vector is None:
+            vector = self.inner.embed_query(text)
+            self._remember(text, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        vector = self._recall(text)
+        if vector is None:
+            vector = await self.inner.aembed_query(text)
+            self._remember(text, vector)
+        return vector
+
+
+def llm_provider() -> str:
+    return os.getenv("LLM_PROVIDER", "gemini").lower()
+
+
+def embeddings_provider() -> str:
+    return os.getenv("EMBEDDINGS_PROVIDER", "gemini").lower()
+
+
+def embedding_model_name() -> str:
+    """Identifies the vectors get_embeddings() produces (embedding cache key)"""
+    if embeddings_provider() == "hashing":
+        from services.fake_providers import HashingEmbeddings
+        return f"hashing-{HashingEmbeddings().dim}"
+    return EMBEDDING_MODEL
+
+
+def get_chat_model():
+    """Create the chat model graph.py runs its chains against"""
+    if llm_provider() == "fake":
+        from services.fake_providers import FakeChatModel
+        return FakeChatModel.from_env()
+
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY not found in .env")
+
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(
+        model=CHAT_MODEL,
+        temperature=0.3,
+        google_api_key=api_key
+    )
+
+
+def get_embeddings() -> Embeddings:
+    """
+    Return the process-wide embeddings client (LangChain Embeddings interface)
+
+    Created on first use so importing this module never needs network access
+    or an API key.
+    """
+    global _embeddings
+    if _embeddings is None:
+        with _embeddings_lock:
+            if _embeddings is None:
+                if embeddings_provider() == "hashing":
+                    from services.fake_providers import HashingEmbeddings
+                    inner = HashingEmbeddings()
+                else:
+                    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+                    inner = GoogleGenerativeAIEmbeddings(
+                        model=EMBEDDING_MODEL,
+                        google_api_key=os.getenv("GEMINI_API_KEY")
+                    )
+                _embeddings = MemoizedEmbeddings(inner)
+    return _embeddings
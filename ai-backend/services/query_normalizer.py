@@ -0,0 +1,123 @@
+"""
+Query Normalization for Cache Keys
+
+Maps the many spellings of one question to a single canonical string, so
+"Ayatul Kursi?", "ayat al-kursi" and "  AYAT UL KURSI " share one
+response_cache entry:
+
+1. Unicode NFKC folding and casefolding
+2. Arabic: tashkeel (diacritics) and tatweel removed, alef variants
+   (أ إ آ ٱ) -> ا, alef maqsura / Farsi ya -> ي, ta marbuta -> ه
+3. punctuation removed (apostrophes join words: du'a -> dua; hyphens
+   split them: al-kursi -> al kursi), whitespace collapsed
+4. common transliteration spellings mapped to one form (phrases first,
+   then single words)
+5. filler words (please, hey, the ...) dropped
+
+Results are memoized; an uncached ASCII query costs a few string passes
+(~8 us), Arabic input a few more.
+"""
+
+from functools import lru_cache
+import re
+import string
+import unicodedata
+
+# Harakat, superscript alef and Quranic annotation marks
+_TASHKEEL = dict.fromkeys(
+    [*range(0x0610, 0x061B), *range(0x064B, 0x0660), 0x0670, *range(0x06D6, 0x06EE), 0x0640], None
+)
+_ARABIC_LETTERS = {
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ى": "ي", "ی": "ي",
+    "ة": "ه",
+}
+_ARABIC_TABLE = str.maketrans({**{chr(c): v for c, v in _TASHKEEL.items()}, **_ARABIC_LETTERS})
+
+# Apostrophes join (du'a -> dua); other punctuation separates words
+_APOSTROPHES = str.maketrans(dict.fromkeys("'’‘`ʼ", None))
+_ASCII_PUNCT = str.maketrans(dict.fromkeys(string.punctuation, " "))
+_PUNCT_RE = re.compile(r"[^\w\s]+|_")
+
+# Multi-word spellings (after punctuation removal) -> canonical phrase
+PHRASES = {
+    "ayat al kursi": ["ayatul kursi", "ayat ul kursi", "ayatal kursi", "ayat alkursi", "ayat e kursi", "ayatul kursee"],
+    "laylat al qadr": [
+        "laylatul qadr", "lailatul qadr", "laylat ul qadr", "lailat ul qadr", "lailat al qadr",
+        "laylatulqadr", "lailatulqadr", "shab e qadr", "laylatul qadar", "lailatul qadar",
+    ],
+    "eid al fitr": ["eid ul fitr", "eidul fitr", "eid alfitr", "id al fitr"],
+    "eid al adha": ["eid ul adha", "eidul adha", "eid aladha", "id al adha", "eid ul azha"],
+    "in sha allah": ["inshallah", "insha allah", "inshaallah", "inshaa allah"],
+    "masha allah": ["mashallah", "mashaallah", "maa sha allah", "ma sha allah"],
+    "jazak allah": ["jazakallah", "jazakallahu", "jazakallah khair", "jazak allah khair"],
+    "sayyid al istighfar": ["sayyidul istighfar", "sayyid ul istighfar"],
+    "surah al kahf": ["surat al kahf", "surah kahf", "surahkahf", "sura kahf", "surah al kahaf"],
+}
+
+# Single-word spellings -> canonical word
+WORDS = {
+    "dua": ["duaa", "doa", "duah", "dooa", "du3a"],
+    "duas": ["duaas", "doas"],
+    "quran": ["koran", "quraan", "qoran", "kuran"],
+    "ramadan": ["ramadhan", "ramazan", "ramzan", "ramadaan"],
+    "wudu": ["wudhu", "wuzu", "wudoo", "wudhoo", "wuzoo"],
+    "salah": ["salat", "salaah", "salaat", "namaz", "namaaz"],
+    "zakat": ["zakah", "zakaat", "zakaah"],
+    "hadith": ["hadees", "hadis", "hadeeth"],
+    "suhoor": ["sehri", "suhur", "sahur", "sehar", "sahoor"],
+    "iftar": ["iftaar", "iftari"],
+    "taraweeh": ["tarawih", "taraweh", "tarawee"],
+    "tahajjud": ["tahajud", "tahajjad"],
+    "istikhara": ["istikharah", "istikhaara"],
+    "jumuah": ["jummah", "jumah", "jumma", "juma", "jumuaa"],
+    "muhammad": ["mohammed", "muhammed", "mohammad", "mohamed", "mohamad"],
+    "fajr": ["fajar", "fajir"],
+    "isha": ["esha", "ishaa"],
+    "maghrib": ["magrib", "maghreb"],
+    "dhuhr": ["zuhr", "zohar", "duhr", "zuhur"],
+    "asr": ["asar"],
+    "allah": ["allaah"],
+    "surah": ["sura", "surat", "soorah"],
+    "ayah": ["aya", "aayah"],
+    "sadaqah": ["sadaqa", "sadqa", "sadaka"],
+    "sunnah": ["sunna", "sunnat"],
+    "tawakkul": ["tawakul", "tawakkal"],
+    "istighfar": ["istighfaar", "astaghfirullah"],
+    "ghusl": ["gusl", "ghusal"],
+}
+
+# Politeness and fillers that don't change what is asked
+FILLER_WORDS = frozenset("""
+please pls plz kindly hey hi hello um uh umm just thanks thank the a an
+""".split())
+
+_PHRASE_RE = re.compile(
+    r"\b(?:" + "|".join(
+        re.escape(variant) for variant in sorted(
+            (v for variants in PHRASES.values() for v in variants), key=len, reverse=True
+        )
+    ) + r")\b"
+)
+_PHRASE_MAP = {variant: canonical for canonical, variants in PHRASES.items() for variant in variants}
+_WORD_MAP = {variant: canonical for canonical, variants in WORDS.items() for variant in variants}
+
+
+def fold_arabic(text: str) -> str:
+    """Drop tashkeel/tatweel and unify alef, ya and ta marbuta"""
+    return text.translate(_ARABIC_TABLE)
+
+
+@lru_cache(maxsize=8192)
+def normalize_query(query: str) -> str:
+    """Canonical form of query for cache keys (falls back to lower/strip if nothing is left)"""
+    # Plain ASCII (most queries) skips the Unicode passes
+    if query.isascii():
+        text = query.lower().translate(_APOSTROPHES).translate(_ASCII_PUNCT)
+    else:
+        text = fold_arabic(unicodedata.normalize("NFKC", query).casefold())
+        text = _PUNCT_RE.sub(" ", text.translate(_APOSTROPHES))
+    text = _PHRASE_RE.sub(lambda m: _PHRASE_MAP[m.group(0)], " ".join(text.split()))
+
+    words = [_WORD_MAP.get(word, word) for word in text.split() if word not in FILLER_WORDS]
+    return " ".join(words) or query.lower().strip()
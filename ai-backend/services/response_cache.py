@@ -0,0 +1,461 @@
+"""
+Response Cache
+
+Memory-bounded LRU cache with per-intent TTLs for LLM responses.
+Implements the API used by graph.py nodes and routers/cache.py.
+An optional SemanticCache tier (services/semantic_cache.py) is consulted
+on exact-match misses by aget() and kept in step on every removal.
+An optional shared backend (services/cache_backends.py) sits behind the
+in-process LRU as L2, so entries survive restarts and are shared by workers.
+"""
+
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+
+from services.deadline import call_timeout
+from services.query_normalizer import normalize_query
+from services.singleflight import SingleFlight
+
+# Default time-to-live per intent (seconds)
+DEFAULT_TTLS = {
+    "analyzer": 7 * 24 * 3600,   # intent of a query rarely changes
+    "dua": 7 * 24 * 3600,        # duas are stable content
+    "ask_hafiz": 24 * 3600,
+    "watch": 24 * 3600,
+}
+DEFAULT_TTL = 3600
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# With a shared backend, L1 copies are re-read from L2 after this long so an
+# invalidation on one worker reaches the others
+DEFAULT_L1_TTL = 60
+DEFAULT_PRELOAD_KEYS = 500
+
+# Most an aget() waits on the semantic tier's query embedding before calling it a miss
+DEFAULT_SEMANTIC_TIMEOUT_MS = 500
+
+# Rough per-entry bookkeeping cost (dict slot, OrderedDict link, entry object)
+ENTRY_OVERHEAD_BYTES = 200
+
+
+class CacheEntry:
+    __slots__ = ("value", "intent", "expires_at", "size")
+
+    def __init__(self, value: Dict[str, Any], intent: str, expires_at: float, size: int):
+        self.value = value
+        self.intent = intent
+        self.expires_at = expires_at
+        self.size = size
+
+
+class ResponseCache:
+    """
+    LRU cache bounded by an approximate byte budget
+
+    - get/set are O(1) (OrderedDict move_to_end / popitem)
+    - entries expire after the TTL configured for their intent
+    - a lock makes every operation safe from threads and the event loop
+      (no operation awaits, so it never blocks on I/O while held)
+    - aget/aset additionally use the semantic tier when one is attached
+    - with a backend, async callers use the a* variants (aget, aset,
+      apeek, attl_remaining, ainvalidate, acleanup_expired, aget_stats),
+      which do the SQLite I/O in a worker thread instead of on the loop
+    - coalesce() shares one in-flight computation per (intent, query) key
+    - with a backend, the in-process LRU is an L1 in front of it; the
+      backend is the source of truth for what exists
+    """
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        ttls: Optional[Dict[str, int]] = None,
+        default_ttl: int = DEFAULT_TTL,
+        backend=None,
+        l1_ttl: Optional[int] = None
+    ):
+        if max_bytes is None:
+            max_bytes = int(os.getenv("CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+
+        self.ttls = dict(DEFAULT_TTLS)
+        for intent in DEFAULT_TTLS:
+            env_ttl = os.getenv(f"CACHE_TTL_{intent.upper()}")
+            if env_ttl:
+                self.ttls[intent] = int(env_ttl)
+        self.ttls.update(ttls or {})
+
+        # Spelling variants of a query share one key (services/query_normalizer.py)
+        self.normalize = os.getenv("CACHE_NORMALIZE_QUERIES", "true").lower() == "true"
+
+        self.backend = backend  # Optional CacheBackend (L2)
+        if l1_ttl is None:
+            l1_ttl = int(os.getenv("CACHE_L1_TTL", DEFAULT_L1_TTL))
+        self.l1_ttl = l1_ttl
+
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.bytes_used = 0
+        self.stats = {
+            "hits": 0, "misses": 0, "l2_hits": 0, "semantic_hits": 0, "semantic_timeouts": 0,
+            "evictions": 0, "expired": 0, "preloaded": 0
+        }
+        self.intent_stats: Dict[str, Dict[str, int]] = {}
+        self.semantic = None  # Optional SemanticCache
+        self.semantic_timeout = int(os.getenv("SEMANTIC_CACHE_TIMEOUT_MS", DEFAULT_SEMANTIC_TIMEOUT_MS)) / 1000
+        self.inflight = SingleFlight()
+
+    def _make_key(self, query: str, intent: str = "") -> str:
+        canonical = normalize_query(query) if self.normalize else query.lower().strip()
+        return hashlib.md5(f"{intent}:{canonical}".encode()).hexdigest()
+
+    def _entry_size(self, key: str, data: Dict[str, Any]) -> int:
+        payload = json.dumps(data, ensure_ascii=False, default=str)
+        return len(payload.encode("utf-8")) + len(key) + ENTRY_OVERHEAD_BYTES
+
+    def _record(self, intent: str, outcome: str):
+        self.stats[outcome] += 1
+        counters = self.intent_stats.setdefault(intent or "default", {"hits": 0, "misses": 0})
+        counters[outcome] += 1
+
+    def _remove(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes_used -= entry.size
+        return entry
+
+    def _notify_removed(self, keys: List[str]):
+        # Called outside self._lock so the semantic tier can take its own lock
+        if self.semantic is not None and keys:
+            self.semantic.discard(keys)
+
+    def _store_l1(self, key: str, value: Dict[str, Any], intent: str, expires_at: float, size: int) -> List[str]:
+        """Insert into the in-process LRU, returns keys evicted from it"""
+        if self.backend is not None:
+            expires_at = min(expires_at, time.time() + self.l1_ttl)
+
+        evicted_keys = []
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = CacheEntry(value, intent, expires_at, size)
+            self.bytes_used += size
+
+            # Evict least recently used entries until back under budget
+            while self.bytes_used > self.max_bytes:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self.bytes_used -= evicted.size
+                self.stats["evictions"] += 1
+                evicted_keys.append(evicted_key)
+        return evicted_keys
+
+    def _lookup_l1(self, key: str) -> Optional[Dict[str, Any]]:
+        """Live L1 value, marked recently used; an expired one is dropped"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at > time.time():
+                self._entries.move_to_end(key)
+                return entry.value
+            self._remove(key)
+            self.stats["expired"] += 1
+
+        if self.backend is None:
+            self._notify_removed([key])
+        return None
+
+    def _fill_l1(self, key: str, row) -> Optional[Dict[str, Any]]:
+        """Copy a backend row into L1, returns its value"""
+        if row is None:
+            return None
+
+        value, intent, expires_at = row
+        self._store_l1(key, value, intent, expires_at, self._entry_size(key, value))
+        with self._lock:
+            self.stats["l2_hits"] += 1
+        return value
+
+    def _lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a live entry's value and mark it recently used (no stats)"""
+        value = self._lookup_l1(key)
+        if value is not None or self.backend is None:
+            return value
+        return self._fill_l1(key, self.backend.get(key))
+
+    async def _alookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """_lookup() with the backend read in a worker thread, off the event loop"""
+        value = self._lookup_l1(key)
+        if value is not None or self.backend is None:
+            return value
+        return self._fill_l1(key, await asyncio.to_thread(self.backend.get, key))
+
+    def get(self, query: str, intent: str = "") -> Optional[Dict[str, Any]]:
+        value = self._lookup(self._make_key(query, intent))
+        with self._lock:
+            self._record(intent, "hits" if value is not None else "misses")
+
+        print(f"[CACHE] ✓ HIT" if value is not None else f"[CACHE] ✗ MISS")
+        return value
+
+    async def aget(self, query: str, intent: str = "", deadline: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        get() that falls back to the semantic tier on an exact miss. The
+        semantic lookup embeds the query, so it gets at most semantic_timeout
+        (less if the request deadline is closer); running out is a miss.
+        """
+        value = await self._alookup(self._make_key(query, intent))
+
+        if value is None and self.semantic is not None:
+            try:
+                similar_key = await asyncio.wait_for(
+                    self.semantic.lookup(query, intent), min(self.semantic_timeout, call_timeout(deadline))
+                )
+            except asyncio.TimeoutError:
+                with self._lock:
+                    self.stats["semantic_timeouts"] += 1
+                print("[CACHE] ✗ Semantic lookup timed out")
+                similar_key = None
+            if similar_key is not None:
+                value = await self._alookup(similar_key)
+                if value is None:
+                    self._notify_removed([similar_key])
+                else:
+                    with self._lock:
+                        self.stats["semantic_hits"] += 1
+
+        with self._lock:
+            self._record(intent, "hits" if value is not None else "misses")
+
+        print(f"[CACHE] ✓ HIT" if value is not None else f"[CACHE] ✗ MISS")
+        return value
+
+    def _prepare(self, query: str, data: Dict[str, Any], intent: str):
+        """(key, expires_at, size) for a new entry, None if it exceeds the budget"""
+        key = self._make_key(query, intent)
+        size = self._entry_size(key, data)
+
+        if size > self.max_bytes:
+            print(f"[CACHE] ✗ SKIPPED (entry {size} bytes exceeds budget)")
+            return None
+        return key, time.time() + self.ttls.get(intent, self.default_ttl), size
+
+    def _stored(self, l1_evicted: List[str], l2_evicted: Optional[List[str]]):
+        # L1 evictions are still in L2; with a backend only L2 evictions are real removals
+        if l2_evicted is None:
+            self._notify_removed(l1_evicted)
+        else:
+            with self._lock:
+                for key in l2_evicted:
+                    self._remove(key)
+            self._notify_removed(l2_evicted)
+        print(f"[CACHE] 💾 STORED")
+
+    def set(self, query: str, data: Dict[str, Any], intent: str = "") -> Optional[str]:
+        """Store a response, returns its key (None if it exceeds the budget)"""
+        prepared = self._prepare(query, data, intent)
+        if prepared is None:
+            return None
+
+        key, expires_at, size = prepared
+        l1_evicted = self._store_l1(key, data, intent, expires_at, size)
+        l2_evicted = None
+        if self.backend is not None:
+            l2_evicted = self.backend.set(key, data, intent, expires_at, size)
+        self._stored(l1_evicted, l2_evicted)
+        return key
+
+    async def aset(self, query: str, data: Dict[str, Any], intent: str = ""):
+        """set() with the backend write in a worker thread; also indexes the query in the semantic tier"""
+        prepared = self._prepare(query, data, intent)
+        if prepared is None:
+            return
+
+        key, expires_at, size = prepared
+        l1_evicted = self._store_l1(key, data, intent, expires_at, size)
+        l2_evicted = None
+        if self.backend is not None:
+            l2_evicted = await asyncio.to_thread(self.backend.set, key, data, intent, expires_at, size)
+        self._stored(l1_evicted, l2_evicted)
+
+        if self.semantic is not None:
+            await self.semantic.add(query, key, intent)
+
+    async def _off_loop(self, method: Callable[..., Any], *args: Any) -> Any:
+        """Run a backend-touching method in a worker thread (inline without a backend)"""
+        if self.backend is None:
+            return method(*args)
+        return await asyncio.to_thread(method, *args)
+
+    async def coalesce(self, query: str, intent: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Run compute() once for all concurrent callers with the same cache key"""
+        return await self.inflight.do(self._make_key(query, intent), compute)
+
+    def invalidate(self, query: Optional[str] = None, intent: Optional[str] = None) -> int:
+        """
+        Remove entries and return how many were removed
+
+        - no arguments: clear everything
+        - intent only: every entry of that intent
+        - query (+ optional intent): that query under one or all intents
+        """
+        if query is None and intent is None:
+            with self._lock:
+                removed = len(self._entries)
+                self._entries.clear()
+                self.bytes_used = 0
+            # Outside the lock, like the keyed branch: get/set shouldn't wait on disk I/O
+            if self.semantic is not None:
+                self.semantic.clear()
+            if self.backend is not None:
+                removed = self.backend.clear()
+            return removed
+
+        with self._lock:
+            if query is None:
+                keys = [k for k, e in self._entries.items() if e.intent == intent]
+            elif intent is not None:
+                keys = [self._make_key(query, intent)]
+            else:
+                intents = set(self.ttls) | {""}
+                keys = [self._make_key(query, i) for i in intents]
+
+            removed_keys = [key for key in keys if self._remove(key) is not None]
+
+        if self.backend is not None:
+            if query is None:
+                removed_keys = self.backend.delete_intent(intent)
+            else:
+                removed_keys = self.backend.delete(keys)
+
+        self._notify_removed(removed_keys)
+        return len(removed_keys)
+
+    async def ainvalidate(self, query: Optional[str] = None, intent: Optional[str] = None) -> int:
+        return await self._off_loop(self.invalidate, query, intent)
+
+    def cleanup_expired(self) -> int:
+        """Drop all expired entries, returns the number removed"""
+        now = time.time()
+        with self._lock:
+            expired = [k for k, e in self._entries.items() if e.expires_at <= now]
+            for key in expired:
+                self._remove(key)
+            self.stats["expired"] += len(expired)
+
+        if self.backend is not None:
+            expired = self.backend.delete_expired()
+
+        self._notify_removed(expired)
+
+        if expired:
+            print(f"[CACHE] 🧹 Removed {len(expired)} expired entries")
+        return len(expired)
+
+    async def acleanup_expired(self) -> int:
+        return await self._off_loop(self.cleanup_expired)
+
+    def peek(self, query: str, intent: str = "") -> Optional[Dict[str, Any]]:
+        """
+        Exact-match value for maintenance jobs: no hit/miss stats, no LRU
+        bump, no L1 fill and no backend access count
+        """
+        key = self._make_key(query, intent)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > time.time():
+                return entry.value
+
+        if self.backend is None:
+            return None
+        row = self.backend.peek(key)
+        return row[0] if row is not None else None
+
+    async def apeek(self, query: str, intent: str = "") -> Optional[Dict[str, Any]]:
+        return await self._off_loop(self.peek, query, intent)
+
+    def ttl_remaining(self, query: str, intent: str = "") -> Optional[float]:
+        """Seconds until the entry for (query, intent) expires, None if absent (no stats, no LRU bump)"""
+        key = self._make_key(query, intent)
+        if self.backend is not None:
+            # L1 expiry is capped at l1_ttl; the backend holds the real one
+            expires_at = self.backend.expires_at(key)
+        else:
+            with self._lock:
+                entry = self._entries.get(key)
+                expires_at = entry.expires_at if entry is not None else None
+
+        if expires_at is None:
+            return None
+        remaining = expires_at - time.time()
+        return remaining if remaining > 0 else None
+
+    async def attl_remaining(self, query: str, intent: str = "") -> Optional[float]:
+        return await self._off_loop(self.ttl_remaining, query, intent)
+
+    def warm_start(self, limit: Optional[int] = None) -> int:
+        """Preload the hottest backend entries into L1 in one batch"""
+        if self.backend is None:
+            return 0
+        if limit is None:
+            limit = int(os.getenv("CACHE_PRELOAD_KEYS", DEFAULT_PRELOAD_KEYS))
+
+        loaded = 0
+        for key, value, intent, expires_at in self.backend.hot_entries(limit):
+            self._store_l1(key, value, intent, expires_at, self._entry_size(key, value))
+            loaded += 1
+
+        with self._lock:
+            self.stats["preloaded"] += loaded
+        print(f"[CACHE] 🔥 Preloaded {loaded} hot entries from {type(self.backend).__name__}")
+        return loaded
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.stats["hits"]
+            misses = self.stats["misses"]
+            total = hits + misses
+
+            per_intent = {}
+            for intent, counters in self.intent_stats.items():
+                intent_total = counters["hits"] + counters["misses"]
+                per_intent[intent] = {
+                    **counters,
+                    "hit_rate": f"{(counters['hits'] / intent_total * 100) if intent_total else 0:.2f}%"
+                }
+
+            stats = {
+                "hits": hits,
+                "misses": misses,
+                "total_requests": total,
+                "hit_rate": f"{(hits / total * 100) if total else 0:.2f}%",
+                "cache_size": len(self._entries),
+                "l2_hits": self.stats["l2_hits"],
+                "semantic_hits": self.stats["semantic_hits"],
+                "semantic_timeouts": self.stats["semantic_timeouts"],
+                "coalesced": self.inflight.stats["coalesced"],
+                "evictions": self.stats["evictions"],
+                "expired": self.stats["expired"],
+                "preloaded": self.stats["preloaded"],
+                "bytes_used": self.bytes_used,
+                "max_bytes": self.max_bytes,
+                "ttls": dict(self.ttls),
+                "per_intent": per_intent,
+            }
+
+        if self.backend is not None:
+            stats["backend"] = self.backend.get_stats()
+        if self.semantic is not None:
+            stats["semantic"] = self.semantic.get_stats()
+        return stats
+
+    async def aget_stats(self) -> Dict[str, Any]:
+        return await self._off_loop(self.get_stats)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,161 @@
+"""
+Semantic Cache
+
+Embedding-similarity tier in front of the exact-match ResponseCache.
+Keeps one FAISS index per intent of previously answered queries; a new
+query whose cosine similarity to a stored one clears the threshold reuses
+that query's cached response ("dua for anxiety" ~ "dua when anxious").
+
+Only cache keys are stored here - the responses themselves live in the
+ResponseCache, which tells this tier whenever it drops a key.
+"""
+
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set
+import math
+import os
+import threading
+
+from services.query_normalizer import normalize_query
+
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import FAISS
+
+DEFAULT_THRESHOLD = 0.92
+DEFAULT_INTENTS = "dua,ask_hafiz,watch"
+
+
+class SemanticCache:
+    """
+    Per-intent FAISS (inner product on L2-normalised vectors = cosine) index
+
+    The embedder is any LangChain Embeddings object; pass a local one to run
+    without network access. Defaults to services.providers.get_embeddings(),
+    whose query memo means a lookup miss followed by add() embeds only once.
+    """
+
+    def __init__(
+        self,
+        embedder=None,
+        threshold: Optional[float] = None,
+        intents: Optional[Iterable[str]] = None
+    ):
+        self._embedder = embedder
+        if threshold is None:
+            threshold = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", DEFAULT_THRESHOLD))
+        self.threshold = threshold
+        if intents is None:
+            intents = os.getenv("SEMANTIC_CACHE_INTENTS", DEFAULT_INTENTS).split(",")
+        self.intents: Set[str] = {i.strip() for i in intents if i.strip()}
+
+        self._stores: Dict[str, "FAISS"] = {}
+        self._keys: Dict[str, str] = {}  # cache key -> intent
+        self._lock = threading.RLock()
+        self.stats = {"lookups": 0, "hits": 0, "indexed": 0, "removed": 0, "errors": 0}
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            from services.providers import get_embeddings
+            self._embedder = get_embeddings()
+        return self._embedder
+
+    async def _embed(self, query: str) -> List[float]:
+        """
+        Unit-length embedding of the normalized query (the cache key's text,
+        so spelling variants embed alike); inner product is cosine similarity
+        """
+        vector = await self.embedder.aembed_query(normalize_query(query))
+        norm = math.sqrt(sum(x * x for x in vector))
+        return [x / norm for x in vector] if norm else list(vector)
+
+    async def lookup(self, query: str, intent: str) -> Optional[str]:
+        """Return the cache key of the closest stored query above threshold"""
+        if intent not in self.intents or intent not in self._stores:
+            return None
+
+        self.stats["lookups"] += 1
+        try:
+            vector = await self._embed(query)
+            with self._lock:
+                store = self._stores.get(intent)
+                if store is None or not store.index_to_docstore_id:
+                    return None
+                results = store.similarity_search_with_score_by_vector(vector, k=1)
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"[SEMANTIC] Lookup error: {e}")
+            return None
+
+        if not results:
+            return None
+
+        doc, score = results[0]
+        if score < self.threshold:
+            print(f"[SEMANTIC] ✗ Closest match {score:.3f} < {self.threshold}")
+            return None
+
+        self.stats["hits"] += 1
+        print(f"[SEMANTIC] ✓ Match {score:.3f}: {doc.page_content[:60]}")
+        return doc.metadata["key"]
+
+    async def add(self, query: str, key: str, intent: str):
+        """Index a query whose response was just stored under key"""
+        if intent not in self.intents:
+            return
+
+        try:
+            vector = await self._embed(query)
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"[SEMANTIC] Embedding error: {e}")
+            return
+
+        from langchain_community.vectorstores import FAISS
+        from langchain_community.vectorstores.utils import DistanceStrategy
+
+        with self._lock:
+            if key in self._keys:
+                return
+
+            store = self._stores.get(intent)
+            if store is None:
+                self._stores[intent] = FAISS.from_embeddings(
+                    [(query, vector)],
+                    embedding=self.embedder,
+                    metadatas=[{"key": key}],
+                    ids=[key],
+                    distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+                )
+            else:
+                store.add_embeddings([(query, vector)], metadatas=[{"key": key}], ids=[key])
+
+            self._keys[key] = intent
+            self.stats["indexed"] += 1
+
+    def discard(self, keys: Iterable[str]):
+        """Drop keys the exact-match cache no longer holds"""
+        with self._lock:
+            by_intent: Dict[str, List[str]] = {}
+            for key in keys:
+                intent = self._keys.pop(key, None)
+                if intent is not None:
+                    by_intent.setdefault(intent, []).append(key)
+
+            for intent, intent_keys in by_intent.items():
+                self._stores[intent].delete(ids=intent_keys)
+                self.stats["removed"] += len(intent_keys)
+
+    def clear(self):
+        with self._lock:
+            self._stores.clear()
+            self._keys.clear()
+
+    def get_stats(self) -> Dict[str, object]:
+        lookups = self.stats["lookups"]
+        return {
+            **self.stats,
+            "size": len(self._keys),
+            "threshold": self.threshold,
+            "intents": sorted(self.intents),
+            "hit_rate": f"{(self.stats['hits'] / lookups * 100) if lookups else 0:.2f}%",
+        }
@@ -0,0 +1,274 @@
+"""
+Session Store
+
+Bounded, concurrency-safe conversation memory keyed by session ID.
+
+- at most max_sessions sessions, least recently used evicted first
+- sessions idle for longer than idle_ttl are dropped
+- each session is a fixed-size ring (deque maxlen) with O(1) append
+- per-session locks, so concurrent requests on one session can't lose
+  each other's messages
+- optional SQLite backend so history survives restarts and is shared
+  across local workers
+"""
+
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_MAX_SESSIONS = 10000
+DEFAULT_IDLE_TTL = 24 * 3600
+DEFAULT_HISTORY_SIZE = 6
+DEFAULT_SQLITE_PATH = Path(__file__).resolve().parent.parent / ".cache" / "sessions.sqlite"
+
+# With a backend, idle sessions are purged opportunistically every N appends
+BACKEND_CLEANUP_EVERY = 1000
+
+Message = Dict[str, str]
+
+
+class Session:
+    __slots__ = ("messages", "lock", "last_active")
+
+    def __init__(self, history_size: int, messages: Optional[List[Message]] = None):
+        self.messages = deque(messages or [], maxlen=history_size)
+        self.lock = threading.Lock()
+        self.last_active = time.time()
+
+
+class SQLiteSessionBackend:
+    """Sessions persisted in SQLite (WAL), trimmed to the ring size on append"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or os.getenv("SESSION_SQLITE_PATH", DEFAULT_SQLITE_PATH))
+        self._local = threading.local()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS messages (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                timestamp TEXT
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                last_active REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, seq)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_last_active ON sessions (last_active)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, session_id: str, limit: int, active_since: float = 0.0) -> List[Message]:
+        """Newest limit messages, oldest first; none if the session was last active before active_since"""
+        rows = self._conn().execute(
+            "SELECT role, content, timestamp FROM messages WHERE session_id = ? AND EXISTS "
+            "(SELECT 1 FROM sessions WHERE session_id = ? AND last_active >= ?) ORDER BY seq DESC LIMIT ?",
+            (session_id, session_id, active_since, limit)
+        ).fetchall()
+        return [{"role": r, "content": c, "timestamp": t} for r, c, t in reversed(rows)]
+
+    def append(self, session_id: str, messages: List[Message], keep: int) -> bool:
+        """Add messages and trim the session to keep; True if the session is new"""
+        conn = self._conn()
+        with conn:
+            created = conn.execute(
+                "SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone() is None
+            conn.executemany(
+                "INSERT INTO messages (session_id, role, content, timestamp) VALUES (?, ?, ?, ?)",
+                [(session_id, m["role"], m["content"], m.get("timestamp")) for m in messages]
+            )
+            conn.execute(
+                "DELETE FROM messages WHERE session_id = ? AND seq NOT IN "
+                "(SELECT seq FROM messages WHERE session_id = ? ORDER BY seq DESC LIMIT ?)",
+                (session_id, session_id, keep)
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, last_active) VALUES (?, ?)",
+                (session_id, time.time())
+            )
+        return created
+
+    def delete(self, session_id: str) -> bool:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            return conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,)).rowcount > 0
+
+    def delete_idle(self, cutoff: float) -> int:
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "DELETE FROM messages WHERE session_id IN "
+                "(SELECT session_id FROM sessions WHERE last_active < ?)", (cutoff,)
+            )
+            return conn.execute("DELETE FROM sessions WHERE last_active < ?", (cutoff,)).rowcount
+
+    def delete_lru(self, keep: int) -> int:
+        """Drop all but the keep most recently active sessions"""
+        conn = self._conn()
+        with conn:
+            if conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] <= keep:
+                return 0
+            stale = "SELECT session_id FROM sessions ORDER BY last_active DESC LIMIT -1 OFFSET ?"
+            conn.execute(f"DELETE FROM messages WHERE session_id IN ({stale})", (keep,))
+            return conn.execute(f"DELETE FROM sessions WHERE session_id IN ({stale})", (keep,)).rowcount
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+class SessionStore:
+    """
+    In-memory LRU of sessions, or a thin layer over a persistent backend
+
+    With a backend every read goes to it, so a session continued on another
+    worker always sees the latest turns. Reads skip sessions idle for longer
+    than idle_ttl (their rows are purged every BACKEND_CLEANUP_EVERY appends)
+    and starting a new session evicts the least recently active ones over
+    max_sessions.
+    """
+
+    def __init__(
+        self,
+        max_sessions: Optional[int] = None,
+        idle_ttl: Optional[int] = None,
+        history_size: Optional[int] = None,
+        backend: Optional[SQLiteSessionBackend] = None
+    ):
+        self.max_sessions = max_sessions or int(os.getenv("SESSION_MAX_SESSIONS", DEFAULT_MAX_SESSIONS))
+        self.idle_ttl = idle_ttl or int(os.getenv("SESSION_IDLE_TTL", DEFAULT_IDLE_TTL))
+        self.history_size = history_size or int(os.getenv("SESSION_HISTORY_SIZE", DEFAULT_HISTORY_SIZE))
+        self.backend = backend
+
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"evicted": 0, "expired": 0}
+        self._appends = 0
+
+    def _session(self, session_id: str, create: bool) -> Optional[Session]:
+        """Fetch (or create) a session and mark it most recently used"""
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None and now - session.last_active > self.idle_ttl:
+                del self._sessions[session_id]
+                self.stats["expired"] += 1
+                session = None
+
+            if session is None:
+                if not create:
+                    return None
+                session = Session(self.history_size)
+                self._sessions[session_id] = session
+                self._evict()
+            else:
+                self._sessions.move_to_end(session_id)
+
+            session.last_active = now
+            return session
+
+    def _evict(self):
+        # Oldest first: idle sessions, then anything over the session cap
+        now = time.time()
+        while self._sessions:
+            oldest_id, oldest = next(iter(self._sessions.items()))
+            if now - oldest.last_active > self.idle_ttl:
+                self.stats["expired"] += 1
+            elif len(self._sessions) > self.max_sessions:
+                self.stats["evicted"] += 1
+            else:
+                break
+            del self._sessions[oldest_id]
+
+    def get(self, session_id: str) -> List[Message]:
+        """Return a copy of the session's recent messages (oldest first)"""
+        if self.backend is not None:
+            return self.backend.load(session_id, self.history_size, time.time() - self.idle_ttl)
+
+        session = self._session(session_id, create=False)
+        if session is None:
+            return []
+        with session.lock:
+            return list(session.messages)
+
+    def append(self, session_id: str, messages: List[Message]):
+        """Atomically append one turn's messages; the ring drops the oldest"""
+        if self.backend is not None:
+            if self.backend.append(session_id, messages, self.history_size):
+                self.stats["evicted"] += self.backend.delete_lru(self.max_sessions)
+            self._appends += 1
+            if self._appends % BACKEND_CLEANUP_EVERY == 0:
+                self.stats["expired"] += self.cleanup_idle()
+            return
+
+        session = self._session(session_id, create=True)
+        with session.lock:
+            session.messages.extend(messages)
+
+    def replace(self, session_id: str, history: List[Message]):
+        """Overwrite a session's history (keeps the newest history_size messages)"""
+        if self.backend is not None:
+            self.backend.delete(session_id)
+            self.backend.append(session_id, history[-self.history_size:], self.history_size)
+            self.stats["evicted"] += self.backend.delete_lru(self.max_sessions)
+            return
+
+        session = self._session(session_id, create=True)
+        with session.lock:
+            session.messages.clear()
+            session.messages.extend(history)
+
+    def delete(self, session_id: str) -> bool:
+        if self.backend is not None:
+            return self.backend.delete(session_id)
+
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def cleanup_idle(self) -> int:
+        """Drop idle sessions, returns how many were removed"""
+        if self.backend is not None:
+            return self.backend.delete_idle(time.time() - self.idle_ttl)
+
+        with self._lock:
+            before = len(self._sessions)
+            self._evict()
+            return before - len(self._sessions)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "sessions": self.backend.count() if self.backend is not None else len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "idle_ttl": self.idle_ttl,
+            "history_size": self.history_size,
+            "backend": "sqlite" if self.backend is not None else "memory",
+        }
+
+    def __contains__(self, session_id: str) -> bool:
+        if self.backend is not None:
+            return bool(self.backend.load(session_id, 1, time.time() - self.idle_ttl))
+        return self._session(session_id, create=False) is not None
+
+    def __len__(self) -> int:
+        return self.get_stats()["sessions"]
@@ -0,0 +1,40 @@
+"""
+Single-Flight Request Coalescing
+
+Concurrent callers asking for the same key share one in-flight computation
+instead of each firing their own LLM call (e.g. a trending question that
+misses the cache dozens of times in the same second).
+"""
+
+from typing import Any, Awaitable, Callable, Dict
+import asyncio
+
+
+class SingleFlight:
+    """
+    Deduplicate concurrent async work by key
+
+    The shared computation runs as its own task and every caller awaits it
+    through asyncio.shield, so a leader whose request is cancelled (client
+    disconnect) doesn't cancel the result the followers are waiting for.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, "asyncio.Future[Any]"] = {}
+        self.stats = {"leaders": 0, "coalesced": 0}
+
+    async def do(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            print(f"[SINGLEFLIGHT] ⇄ Joined in-flight request")
+            return await asyncio.shield(task)
+
+        task = asyncio.ensure_future(compute())
+        self._inflight[key] = task
+        self.stats["leaders"] += 1
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {**self.stats, "in_flight": len(self._inflight)}
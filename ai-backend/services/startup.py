@@ -0,0 +1,103 @@
+"""
+Worker Startup
+
+Keeps graph.py (LangChain, LangGraph, the chat model client, the compiled
+graphs and the KB index) off the import path of main.py, so a new worker
+answers /health as soon as FastAPI is up. The heavy parts load in
+warm_up(), either from the background task main.py starts on startup
+(STARTUP_WARMUP) or, failing that, on the first request that needs them.
+
+warm_up() runs in a worker thread and records how long each step took;
+status() reports it for /health and benchmarks/startup_time.py.
+"""
+
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import os
+import threading
+import time
+
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "true").lower() == "true"
+
+_graph = None
+_lock = threading.Lock()
+_state: Dict[str, Any] = {"status": "cold", "timings_ms": {}, "errors": {}}
+
+
+def _step(name: str, fn: Callable[[], Any]) -> Optional[Any]:
+    """Run one warm-up step, recording its duration (and error, which is not raised)"""
+    t0 = time.perf_counter()
+    try:
+        return fn()
+    except Exception as e:
+        _state["errors"][name] = str(e) or type(e).__name__
+        print(f"[STARTUP] ✗ {name}: {_state['errors'][name]}")
+        return None
+    finally:
+        _state["timings_ms"][name] = round((time.perf_counter() - t0) * 1000, 1)
+
+
+def _import_graph():
+    import graph
+    return graph
+
+
+def warm_up():
+    """
+    Import graph.py, create the LLM client, compile the graph and load the
+    KB index (blocking, idempotent). Returns the graph module; raises only
+    if graph.py itself cannot be imported. A missing API key leaves the
+    worker "degraded": KB and catalogue answers still work.
+    """
+    global _graph
+    if _graph is not None:
+        return _graph
+
+    with _lock:
+        if _graph is not None:
+            return _graph
+
+        _state["status"] = "warming"
+        _state["errors"].clear()
+        t0 = time.perf_counter()
+        graph = _step("import_graph", _import_graph)
+        if graph is None:
+            _state["status"] = "failed"
+            raise ImportError(f"graph.py failed to import: {_state['errors']['import_graph']}")
+
+        _step("llm_client", graph.get_llm)
+        _step("compile_graph", graph.get_app)
+        if graph.KB_FAST_PATH_ENABLED:
+            _step("kb_index", graph.knowledge_base.preload)
+
+        _state["timings_ms"]["total"] = round((time.perf_counter() - t0) * 1000, 1)
+        _state["status"] = "degraded" if _state["errors"] else "ready"
+        steps = ", ".join(f"{k}={v:.0f}ms" for k, v in _state["timings_ms"].items() if k != "total")
+        print(f"[STARTUP] ✓ Graph {_state['status']} in {_state['timings_ms']['total']:.0f}ms ({steps})")
+
+        _graph = graph
+        return graph
+
+
+async def get_graph():
+    """The graph module, warmed up in a worker thread the first time so the event loop keeps serving"""
+    if _graph is not None:
+        return _graph
+    return await asyncio.to_thread(warm_up)
+
+
+async def warm_up_in_background():
+    """Startup task: warm up without delaying the worker's first /health"""
+    try:
+        await asyncio.to_thread(warm_up)
+    except Exception as e:
+        print(f"[STARTUP] ✗ Warm-up failed: {e}")
+
+
+def status() -> Dict[str, Any]:
+    """cold | warming | ready | degraded | failed, with per-step timings and errors"""
+    return {
+        "status": _state["status"],
+        "timings_ms": dict(_state["timings_ms"]),
+        "errors": dict(_state["errors"]),
+    }
@@ -0,0 +1,88 @@
+"""
+Inverted Term Index
+
+Small in-memory keyword index shared by the local catalogues (duas,
+videos). Documents are added as weighted text fields; a query scores each
+document by the idf-weighted share of the query's terms it covers, so 1.0
+means every meaningful query word matched a top-weighted field.
+"""
+
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+import math
+import re
+
+_TOKEN_RE = re.compile(r"[a-z]+")
+
+
+def stem(word: str) -> str:
+    """Light suffix stripping so travelling/travel and nights/night share a term"""
+    if len(word) > 5 and word.endswith("ing"):
+        word = word[:-3]
+        if len(word) > 3 and word[-1] == word[-2]:
+            word = word[:-1]
+    elif len(word) > 4 and word.endswith("ied"):
+        word = word[:-3] + "y"
+    elif len(word) > 4 and word.endswith("ies"):
+        word = word[:-3] + "y"
+    elif len(word) > 4 and word.endswith("ed"):
+        word = word[:-2]
+    elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        word = word[:-1]
+    return word
+
+
+def terms(text: str, stop_words: FrozenSet[str] = frozenset()) -> List[str]:
+    """Stemmed terms of text without stop words (duplicates removed, order kept)"""
+    seen = {}
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token not in stop_words:
+            seen.setdefault(stem(token), None)
+    return list(seen)
+
+
+class InvertedIndex:
+    """term -> {doc: best field weight}, with idf computed once by finalize()"""
+
+    def __init__(self, stop_words: FrozenSet[str] = frozenset()):
+        self.stop_words = stop_words
+        self.postings: Dict[str, Dict[int, float]] = {}
+        self.idf: Dict[str, float] = {}
+        self.max_weight = 1.0
+        self.unknown_idf = 0.0
+        self.size = 0
+
+    def add(self, doc: int, fields: Iterable[Tuple[str, float]]):
+        for text, weight in fields:
+            self.max_weight = max(self.max_weight, weight)
+            for term in terms(text, self.stop_words):
+                postings = self.postings.setdefault(term, {})
+                postings[doc] = max(postings.get(doc, 0.0), weight)
+        self.size += 1
+
+    def finalize(self) -> "InvertedIndex":
+        total = max(self.size, 1)
+        self.idf = {term: math.log(1 + total / len(postings)) for term, postings in self.postings.items()}
+        # A query word no document knows counts like the rarest indexed term
+        self.unknown_idf = math.log(1 + total)
+        return self
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[int, float]]:
+        """Top-k (doc, score) pairs, best first; score in [0, 1]"""
+        query_terms = terms(query, self.stop_words)
+        if not query_terms:
+            return []
+
+        total = 0.0
+        scores: Dict[int, float] = {}
+        for term in query_terms:
+            postings = self.postings.get(term)
+            if postings is None:
+                total += self.unknown_idf
+                continue
+            idf = self.idf[term]
+            total += idf
+            for doc, weight in postings.items():
+                scores[doc] = scores.get(doc, 0.0) + idf * weight / self.max_weight
+
+        ranked = sorted(scores.items(), key=lambda item: -item[1])[:k]
+        return [(doc, score / total) for doc, score in ranked]
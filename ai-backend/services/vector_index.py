@@ -0,0 +1,195 @@
+"""
+Compact Vector Indexes for the Knowledge Base
+
+build_vector_store.py keeps faiss_islamic_kb/ as an exact, incrementally
+updated IndexFlatL2 (float32, brute force). This module derives compact
+copies of it for serving:
+
+- quantized storage: fp16 / sq8 scalar quantization, or PQ
+- approximate search: HNSW graphs and IVF inverted lists (optionally
+  combined with quantization)
+- Matryoshka truncation: gemini-embedding-001 vectors keep most of their
+  meaning in the leading dimensions, so the first `dims` are kept and
+  re-normalised (3072 -> 768 is 4x smaller before quantization)
+
+A compact directory holds the same index.faiss / index.pkl pair as the
+LangChain store plus vector_index.json describing how it was built; the
+query side reads that file to truncate query vectors the same way.
+load_store() memory-maps index.faiss where faiss supports it, so worker
+processes share one copy of the vectors through the page cache instead of
+each reading the whole file into RAM.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+import json
+import math
+import os
+import pickle
+import shutil
+
+import faiss
+import numpy as np
+
+META_FILE = "vector_index.json"
+
+# kind -> faiss index_factory description (filled in by factory_string)
+INDEX_TYPES = {
+    "flat": "Flat",
+    "fp16": "SQfp16",
+    "sq8": "SQ8",
+    "pq": "PQ{m}x{nbits}",
+    "hnsw": "HNSW{M}",
+    "hnsw_sq8": "HNSW{M}_SQ8",
+    "ivf": "IVF{nlist},Flat",
+    "ivf_sq8": "IVF{nlist},SQ8",
+    "ivf_pq": "IVF{nlist},PQ{m}x{nbits}",
+}
+
+HNSW_M = 32  # graph neighbours per node
+PQ_SUBVECTOR_DIMS = 16  # dimensions per PQ sub-quantizer
+MIN_POINTS_PER_CENTROID = 39  # faiss warns below this when training k-means
+DEFAULT_NPROBE = 8
+DEFAULT_EF_SEARCH = 64
+
+
+def _pq_subquantizers(dims: int) -> int:
+    """Largest divisor of dims that is at most dims / PQ_SUBVECTOR_DIMS"""
+    for m in range(max(1, dims // PQ_SUBVECTOR_DIMS), 0, -1):
+        if dims % m == 0:
+            return m
+    return 1
+
+
+def factory_string(kind: str, dims: int, n: int) -> str:
+    """index_factory description for kind, sized for n vectors of dims"""
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {kind!r} (choose from {', '.join(INDEX_TYPES)})")
+
+    # k-means needs at least as many points as centroids (2**nbits for PQ)
+    nlist = max(1, min(int(4 * math.sqrt(n)), n // MIN_POINTS_PER_CENTROID))
+    nbits = max(1, min(8, int(math.log2(max(n, 2)))))
+    return INDEX_TYPES[kind].format(m=_pq_subquantizers(dims), nbits=nbits, M=HNSW_M, nlist=nlist)
+
+
+def truncate(vectors: np.ndarray, dims: Optional[int] = None) -> np.ndarray:
+    """Keep the first dims columns (Matryoshka) and L2-normalise the rows again"""
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    if dims and dims < vectors.shape[1]:
+        vectors = np.ascontiguousarray(vectors[:, :dims])
+        faiss.normalize_L2(vectors)
+    return vectors
+
+
+def truncate_query(vector: Sequence[float], dims: Optional[int] = None) -> np.ndarray:
+    return truncate(np.asarray(vector, dtype="float32").reshape(1, -1), dims)[0]
+
+
+def apply_search_params(index, meta: Dict[str, Any]):
+    """Set nprobe / efSearch recorded in meta on a freshly built or loaded index"""
+    space = faiss.ParameterSpace()
+    for name, value in meta.get("params", {}).items():
+        space.set_index_parameter(index, name, value)
+
+
+def build_index(
+    vectors: np.ndarray,
+    kind: str = "flat",
+    dims: Optional[int] = None,
+    nprobe: int = DEFAULT_NPROBE,
+    ef_search: int = DEFAULT_EF_SEARCH
+) -> Tuple[Any, Dict[str, Any]]:
+    """Train and fill a kind index over (optionally truncated) vectors; returns (index, meta)"""
+    source_dims = vectors.shape[1]
+    vectors = truncate(vectors, dims)
+    n, d = vectors.shape
+
+    factory = factory_string(kind, d, n)
+    index = faiss.index_factory(d, factory, faiss.METRIC_L2)
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+
+    params = {}
+    if kind.startswith("ivf"):
+        params["nprobe"] = nprobe
+    if kind.startswith("hnsw"):
+        params["efSearch"] = ef_search
+
+    meta = {
+        "type": kind,
+        "factory": factory,
+        "dims": d if d < source_dims else None,
+        "source_dims": source_dims,
+        "ntotal": index.ntotal,
+        "params": params,
+    }
+    apply_search_params(index, meta)
+    return index, meta
+
+
+def read_meta(path: Path) -> Dict[str, Any]:
+    """vector_index.json of an index directory ({} for a plain LangChain store)"""
+    meta_path = Path(path) / META_FILE
+    if not meta_path.exists():
+        return {}
+    with open(meta_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def read_index(path: Path, mmap: bool = True):
+    """faiss.read_index, memory-mapped when this faiss build can map the index type"""
+    if mmap:
+        flags = faiss.IO_FLAG_MMAP | getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+        try:
+            return faiss.read_index(str(path), flags)
+        except RuntimeError as e:
+            print(f"[VECTOR] mmap not supported for {path}, reading into memory ({e})")
+    return faiss.read_index(str(path))
+
+
+def compact(
+    source: Path,
+    target: Path,
+    kind: str,
+    dims: Optional[int] = None,
+    nprobe: int = DEFAULT_NPROBE,
+    ef_search: int = DEFAULT_EF_SEARCH
+) -> Dict[str, Any]:
+    """Write a kind copy of the flat store in source to target; returns its meta"""
+    source, target = Path(source), Path(target)
+    if read_meta(source):
+        raise ValueError(f"{source} is already a compact index; compact the flat store instead")
+
+    flat = faiss.read_index(str(source / "index.faiss"))
+    vectors = flat.reconstruct_n(0, flat.ntotal)
+    index, meta = build_index(vectors, kind, dims, nprobe, ef_search)
+
+    # Positions are unchanged, so the docstore mapping carries over as is
+    target.mkdir(parents=True, exist_ok=True)
+    faiss.write_index(index, str(target / "index.faiss"))
+    shutil.copyfile(source / "index.pkl", target / "index.pkl")
+    with open(target / META_FILE, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    meta["bytes"] = os.path.getsize(target / "index.faiss")
+    meta["source_bytes"] = os.path.getsize(source / "index.faiss")
+    return meta
+
+
+def load_store(path: Path, embeddings, mmap: bool = True):
+    """
+    LangChain FAISS store for a flat or compact index directory; returns
+    (store, meta). Equivalent to FAISS.load_local, but with a memory-mapped
+    index and the recorded search parameters applied.
+    """
+    from langchain_community.vectorstores import FAISS
+
+    path = Path(path)
+    meta = read_meta(path)
+    index = read_index(path / "index.faiss", mmap)
+    apply_search_params(index, meta)
+
+    with open(path / "index.pkl", "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)  # our own build output
+    return FAISS(embeddings, index, docstore, index_to_docstore_id), meta
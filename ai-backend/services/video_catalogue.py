@@ -0,0 +1,141 @@
+"""
+Local Video Catalogue
+
+Videos from the trusted channels, read from video_catalogue.json (built by
+build_video_catalogue.py from the YouTube Data API, so every entry is a
+real upload). An inverted index over titles, tags and channel names ranks
+candidates for watch_node in well under 10 ms; the LLM is only asked to
+re-rank those candidates (WATCH_LLM_RERANK) or, when nothing matches, to
+suggest videos itself.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import os
+import threading
+
+from services.text_index import InvertedIndex
+
+DEFAULT_PATH = Path(__file__).resolve().parent.parent / "video_catalogue.json"
+DEFAULT_MIN_SCORE = 0.5
+
+# The channels watch_node and ResponseEvaluator.evaluate_videos both trust
+TRUSTED_CHANNELS = ("Yaqeen Institute", "Bayyinah Institute", "Mufti Menk", "Omar Suleiman", "Nouman Ali Khan")
+_TRUSTED = frozenset(c.lower() for c in TRUSTED_CHANNELS)
+
+VIDEOS_PER_ANSWER = 3
+
+# Field weights in the index
+TAG_WEIGHT = 2.0
+CHANNEL_WEIGHT = 2.0
+TITLE_WEIGHT = 2.0
+DESCRIPTION_WEIGHT = 1.0
+
+# Request phrasing ("show me some lectures about...") carries no topic
+STOP_WORDS = frozenset("""
+a about am an and any are at be by can clip clips could do episode episodes for from give good i
+in is it lecture lectures me my of on or please recommend reminder reminders series share show
+some something talk talks that the this to video videos want watch with you youtube your
+""".split())
+
+
+def thumbnail_url(video_id: str) -> str:
+    return f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"
+
+
+def video_response(entry: Dict[str, Any]) -> Dict[str, str]:
+    """One watch_node video (the frontend links it through the /vi/<id>/ thumbnail path)"""
+    return {
+        "title": entry["title"],
+        "channel": entry["channel"],
+        "thumbnail": thumbnail_url(entry["video_id"]),
+        "duration": entry["duration"],
+    }
+
+
+def is_trusted(channel: str) -> bool:
+    return channel.lower() in _TRUSTED
+
+
+class VideoCatalogue:
+    """Lazily loaded trusted-channel catalogue with an inverted index"""
+
+    def __init__(self, path: Optional[str] = None, min_score: Optional[float] = None):
+        self.path = Path(path or os.getenv("VIDEO_CATALOGUE_PATH", DEFAULT_PATH))
+        if min_score is None:
+            min_score = float(os.getenv("VIDEO_CATALOGUE_MIN_SCORE", DEFAULT_MIN_SCORE))
+        self.min_score = min_score
+
+        self.entries: List[Dict[str, Any]] = []
+        self._index = InvertedIndex(STOP_WORDS)
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.stats = {"lookups": 0, "hits": 0, "fallbacks": 0}
+
+    def _load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    rows = json.load(f)
+            except FileNotFoundError:
+                rows = []
+            except (OSError, ValueError) as e:
+                print(f"[WATCH] ✗ Could not read catalogue {self.path}: {e}")
+                rows = []
+
+            # Entries from other channels or without a video ID are never served
+            entries = [
+                row for row in rows
+                if row.get("video_id") and row.get("title") and row.get("duration") and is_trusted(row.get("channel", ""))
+            ]
+            if len(entries) < len(rows):
+                print(f"[WATCH] Skipped {len(rows) - len(entries)} catalogue rows (untrusted channel or incomplete)")
+
+            index = InvertedIndex(STOP_WORDS)
+            for i, entry in enumerate(entries):
+                index.add(i, [
+                    (" ".join(entry.get("tags", [])), TAG_WEIGHT),
+                    (entry["channel"], CHANNEL_WEIGHT),
+                    (entry["title"], TITLE_WEIGHT),
+                    (entry.get("description", ""), DESCRIPTION_WEIGHT),
+                ])
+            self._index = index.finalize()
+            self.entries = entries
+            self._loaded = True
+            print(f"[WATCH] ✓ Catalogue: {len(entries)} videos, {len(index.postings)} terms")
+
+    def search(self, query: str, k: int = VIDEOS_PER_ANSWER) -> List[Tuple[Dict[str, Any], float]]:
+        """Top-k (entry, score) pairs, best first; score in [0, 1]"""
+        if not self._loaded:
+            self._load()
+        return [(self.entries[i], score) for i, score in self._index.search(query, k)]
+
+    def candidates(self, query: str, k: int = VIDEOS_PER_ANSWER) -> List[Dict[str, Any]]:
+        """Up to k entries clearing min_score, or [] when fewer than two do"""
+        self.stats["lookups"] += 1
+        matches = [entry for entry, score in self.search(query, k) if score >= self.min_score]
+        if len(matches) < 2:
+            return []
+        self.stats["hits"] += 1
+        return matches
+
+    def closest(self, query: str) -> List[Dict[str, Any]]:
+        """Best entries at any score, used when the LLM fails"""
+        self.stats["fallbacks"] += 1
+        return [entry for entry, _ in self.search(query)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["lookups"]
+        return {
+            **self.stats,
+            "hit_ratio": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            "min_score": self.min_score,
+            "entries": len(self.entries),
+        }
+
+
+# Global catalogue instance
+video_catalogue = VideoCatalogue()
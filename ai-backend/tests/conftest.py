@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Tests import the app modules the way main.py does, from the ai-backend root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Offline stand-ins: no API key or network needed
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("EMBEDDINGS_PROVIDER", "hashing")
@@ -0,0 +1,73 @@
+import json
+import sys
+
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_community")
+pytest.importorskip("dotenv")
+
+import build_vector_store
+from services.embedding_cache import EmbeddingCache, content_hash
+from services.fake_providers import HashingEmbeddings
+
+ENTRIES = [
+    {"topic": "zakat", "question": "What is zakat?", "answer": "Obligatory charity."},
+    {"topic": "fasting", "question": "What breaks the fast?", "answer": "Eating and drinking."},
+    {"topic": "prayer", "question": "How many rakats in fajr?", "answer": "Two."},
+]
+
+
+class CountingEmbeddings(HashingEmbeddings):
+    def __init__(self):
+        super().__init__(dim=64)
+        self.embedded = []
+
+    async def aembed_documents(self, texts):
+        self.embedded.extend(texts)
+        return await super().aembed_documents(texts)
+
+
+@pytest.fixture
+def build(tmp_path, monkeypatch):
+    kb_path, index_path = tmp_path / "kb.json", tmp_path / "index"
+    monkeypatch.setenv("EMBEDDING_CACHE_PATH", str(tmp_path / "embeddings.sqlite"))
+    monkeypatch.setattr(build_vector_store, "embeddings_provider", lambda: "hashing")
+    monkeypatch.setattr(build_vector_store, "embedding_model_name", lambda: "hashing-64")
+
+    def run(entries, *flags):
+        kb_path.write_text(json.dumps(entries))
+        embeddings = CountingEmbeddings()
+        monkeypatch.setattr(build_vector_store, "get_embeddings", lambda: embeddings)
+        monkeypatch.setattr(sys, "argv", ["build_vector_store.py", "--kb", str(kb_path),
+                                          "--index", str(index_path), "--no-test", *flags])
+        build_vector_store.main()
+        store, indexed = build_vector_store.load_index(index_path, embeddings)
+        return embeddings.embedded, store, indexed
+    return run
+
+
+def test_rebuild_only_embeds_changed_entries(build):
+    embedded, store, _ = build(ENTRIES)
+    assert len(embedded) == 3 and store.index.ntotal == 3
+
+    changed = [ENTRIES[0], {**ENTRIES[1], "answer": "Eating, drinking and intimacy."}]
+    embedded, store, indexed = build(changed)
+    assert embedded == [build_vector_store.entry_text(changed[1])]
+    assert store.index.ntotal == 2
+    assert set(indexed) == {content_hash(build_vector_store.entry_text(e)) for e in changed}
+
+
+def test_full_rebuild_reuses_the_embedding_cache(build):
+    build(ENTRIES)
+    embedded, store, _ = build(ENTRIES, "--full")
+    assert embedded == [] and store.index.ntotal == 3
+
+
+def test_embedding_cache_round_trip(tmp_path):
+    cache = EmbeddingCache("model-a", path=str(tmp_path / "cache.sqlite"))
+    cache.put_many({"h1": [0.5, -1.0], "h2": [0.25, 0.0]})
+
+    assert cache.get_many(["h1", "missing"]) == {"h1": [0.5, -1.0]}
+    assert len(cache) == 2
+    assert EmbeddingCache("model-b", path=str(tmp_path / "cache.sqlite")).get_many(["h1"]) == {}
@@ -0,0 +1,124 @@
+import asyncio
+import threading
+
+from services.cache_backends import SQLiteBackend
+from services.response_cache import ResponseCache
+
+PAYLOAD = {"text": "x" * 1000}
+
+
+def entry_size():
+    return ResponseCache()._entry_size("0" * 32, PAYLOAD)
+
+
+def test_l2_is_shared_between_caches(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    writer = ResponseCache(backend=SQLiteBackend(path))
+    reader = ResponseCache(backend=SQLiteBackend(path))
+    writer.set("what is zakat", {"text": "charity"}, intent="ask_hafiz")
+
+    assert reader.get("what is zakat", intent="ask_hafiz") == {"text": "charity"}
+    assert reader.stats["l2_hits"] == 1
+
+
+def test_l2_evictions_are_dropped_from_l1(tmp_path):
+    cache = ResponseCache(backend=SQLiteBackend(tmp_path / "cache.sqlite", max_bytes=2 * entry_size()))
+    for query in ("a", "b", "c"):
+        cache.set(query, PAYLOAD)
+
+    assert cache.peek("a") is None
+    assert cache._make_key("a") not in cache._entries
+    assert cache.peek("c") == PAYLOAD
+
+
+class ThreadRecordingBackend(SQLiteBackend):
+    """Records which thread ran each backend call"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threads = set()
+
+
+def _recorded(name):
+    def method(self, *args):
+        self.threads.add(threading.get_ident())
+        return getattr(SQLiteBackend, name)(self, *args)
+    return method
+
+
+for _name in ("get", "set", "peek", "expires_at", "delete", "clear", "delete_expired", "get_stats"):
+    setattr(ThreadRecordingBackend, _name, _recorded(_name))
+
+
+def test_async_methods_keep_backend_io_off_the_event_loop(tmp_path):
+    backend = ThreadRecordingBackend(tmp_path / "cache.sqlite")
+    cache = ResponseCache(backend=backend, l1_ttl=0)
+
+    async def scenario():
+        await cache.aset("what is zakat", {"text": "charity"}, intent="ask_hafiz")
+        value = await cache.aget("what is zakat", intent="ask_hafiz")
+        return value, threading.get_ident()
+
+    value, loop_thread = asyncio.run(scenario())
+    assert value == {"text": "charity"}
+    assert len(backend.threads) >= 1 and loop_thread not in backend.threads
+
+
+def test_maintenance_methods_have_off_loop_variants(tmp_path):
+    backend = ThreadRecordingBackend(tmp_path / "cache.sqlite")
+    cache = ResponseCache(backend=backend)
+    cache.set("what is zakat", {"text": "charity"}, intent="ask_hafiz")
+    backend.threads.clear()
+
+    async def scenario():
+        assert await cache.apeek("what is zakat", intent="ask_hafiz") == {"text": "charity"}
+        assert await cache.attl_remaining("what is zakat", intent="ask_hafiz") > 0
+        assert (await cache.aget_stats())["backend"]["entries"] == 1
+        assert await cache.acleanup_expired() == 0
+        assert await cache.ainvalidate("what is zakat", intent="ask_hafiz") == 1
+        assert await cache.ainvalidate() == 0
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+    assert backend.threads and loop_thread not in backend.threads
+
+
+def test_peek_is_not_a_backend_access(tmp_path):
+    backend = SQLiteBackend(tmp_path / "cache.sqlite")
+    writer, reader = ResponseCache(backend=backend), ResponseCache(backend=SQLiteBackend(tmp_path / "cache.sqlite"))
+    writer.set("what is zakat", {"text": "charity"}, intent="ask_hafiz")
+
+    assert reader.peek("what is zakat", intent="ask_hafiz") == {"text": "charity"}
+    assert len(reader) == 0 and reader.stats["l2_hits"] == 0
+    hits = backend._conn().execute("SELECT hits FROM cache").fetchone()[0]
+    assert hits == 0
+
+
+class LockProbingBackend(SQLiteBackend):
+    """Records whether the cache lock was free (from another thread) while clearing"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache = None
+        self.lock_free = None
+
+    def clear(self):
+        def probe():
+            self.lock_free = self.cache._lock.acquire(timeout=0.5)
+            if self.lock_free:
+                self.cache._lock.release()
+
+        thread = threading.Thread(target=probe)
+        thread.start()
+        thread.join()
+        return super().clear()
+
+
+def test_clear_all_runs_backend_io_outside_the_lock(tmp_path):
+    backend = LockProbingBackend(tmp_path / "cache.sqlite")
+    cache = ResponseCache(backend=backend)
+    backend.cache = cache
+    cache.set("what is zakat", {"text": "charity"}, intent="ask_hafiz")
+
+    assert cache.invalidate() == 1
+    assert backend.lock_free is True and len(cache) == 0
@@ -0,0 +1,111 @@
+from types import SimpleNamespace
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from services import cache_warmer, startup
+from services.cache_backends import SQLiteBackend
+from services.cache_warmer import kb_answered, warmup_queries
+from services.response_cache import ResponseCache
+
+KB = {"what is zakat": 0.97, "what is sadaqah": 0.6}
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.calls = []
+
+    async def aembed_query(self, text):
+        self.calls.append(text)
+        return [KB.get(text, 0.0)]
+
+
+class FakeKnowledgeBase:
+    threshold = 0.85
+
+    def __init__(self):
+        self.embedder = FakeEmbedder()
+
+    def preload(self):
+        return True
+
+    @staticmethod
+    def query_text(query):
+        return query.lower().strip()
+
+    def search_vector(self, vector):
+        return {"similarity": vector[0]}
+
+
+def test_kb_answered_questions_are_embedded_once(tmp_path, monkeypatch):
+    monkeypatch.setenv("EMBEDDING_CACHE_PATH", str(tmp_path / "embeddings.sqlite"))
+    kb = FakeKnowledgeBase()
+    queries = ["What is Zakat", "what is sadaqah", "how do I pray"]
+
+    assert asyncio.run(kb_answered(kb, queries)) == {"What is Zakat"}
+    assert len(kb.embedder.calls) == 3
+
+    rerun = FakeKnowledgeBase()
+    assert asyncio.run(kb_answered(rerun, queries)) == {"What is Zakat"}
+    assert rerun.embedder.calls == []
+
+
+def test_warmup_queries_dedupe_and_put_logged_queries_first(tmp_path):
+    logged = tmp_path / "top.jsonl"
+    logged.write_text('{"query": "dua for rain", "count": 3}\n{"query": "What is Zakat?", "count": 9}\n')
+
+    queries = warmup_queries(str(logged), include_kb=False)
+    assert queries == ["What is Zakat?", "dua for rain"]
+
+
+class ThreadRecordingBackend(SQLiteBackend):
+    def __init__(self, *args, **kwargs):
+        self.threads = set()
+        super().__init__(*args, **kwargs)
+
+    def _conn(self):
+        self.threads.add(threading.get_ident())
+        return super()._conn()
+
+
+class CachingApp:
+    """Stands in for the graph: caches every answer under ask_hafiz"""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    async def ainvoke(self, state):
+        await self.cache.aset(state["query"], {"text": "answer"}, intent="ask_hafiz")
+        return {"intent": "ask_hafiz"}
+
+
+def test_warm_keeps_cache_backend_io_off_the_event_loop(tmp_path, monkeypatch):
+    backend = ThreadRecordingBackend(tmp_path / "cache.sqlite")
+    cache = ResponseCache(backend=backend)
+    cache.set("what is zakat", {"text": "stale"}, intent="ask_hafiz")
+    backend.threads.clear()
+
+    graph = SimpleNamespace(
+        response_cache=cache,
+        get_app=lambda: CachingApp(cache),
+        KB_FAST_PATH_ENABLED=False,
+        delete_conversation_history=lambda session_id: True,
+    )
+
+    async def get_graph():
+        return graph
+
+    monkeypatch.setattr(startup, "get_graph", get_graph)
+
+    async def scenario():
+        stats = await cache_warmer.warm(
+            ["what is zakat", "what is sadaqah"], rate=1000, refresh_within=10 ** 9
+        )
+        return stats, threading.get_ident()
+
+    stats, loop_thread = asyncio.run(scenario())
+    assert (stats["refreshed"], stats["warmed"], stats["failed"]) == (1, 1, 0)
+    assert backend.threads and loop_thread not in backend.threads
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("pydantic")
+
+from routers import chat
+
+
+class FakeApp:
+    def __init__(self):
+        self.calls = []
+
+    async def ainvoke(self, state):
+        self.calls.append((state["query"], state["session_id"]))
+        await asyncio.sleep(0)
+        return {"final_output": {"content": f"answer: {state['query']}", "type": "text"}}
+
+
+class FakeCache:
+    def __init__(self, cached=()):
+        self.cached = set(cached)
+        self.threads = set()
+
+    def peek(self, query, intent):
+        self.threads.add(threading.get_ident())
+        if intent == "analyzer" or query not in self.cached:
+            return None
+        return {"text": "cached"}
+
+
+def fake_graph(cached=()):
+    app = FakeApp()
+    return SimpleNamespace(get_app=lambda: app, response_cache=FakeCache(cached)), app
+
+
+def run_batch(graph, items, **kwargs):
+    request = chat.BatchRequest(items=[chat.BatchItem(**item) for item in items], **kwargs)
+    results = []
+    stats = asyncio.run(chat._run_batch(graph, request, results.append))
+    return sorted(results, key=lambda r: r["index"]), stats
+
+
+def test_duplicates_share_one_run():
+    graph, app = fake_graph()
+    results, stats = run_batch(graph, [
+        {"message": "What is Zakat?"},
+        {"message": "what is  zakat"},
+        {"message": "what breaks the fast"},
+    ])
+
+    assert stats["runs"] == 2 and len(app.calls) == 2
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert results[1]["duplicate_of"] == 0 and results[0]["duplicate_of"] is None
+    assert results[1]["response"] == results[0]["response"]
+
+
+def test_session_items_run_in_order():
+    graph, app = fake_graph()
+    run_batch(graph, [
+        {"message": "first", "session_id": "s1"},
+        {"message": "second", "session_id": "s1"},
+        {"message": "first", "session_id": "s1"},
+    ])
+
+    assert app.calls == [("first", "s1"), ("second", "s1"), ("first", "s1")]
+
+
+def test_only_session_less_items_take_the_cache_lane():
+    graph, _ = fake_graph(cached={"what is zakat?"})
+    results, stats = run_batch(graph, [
+        {"message": "what is zakat?"},
+        {"message": "what is zakat?", "session_id": "with-history"},
+    ])
+
+    assert results[0]["cached"] is True
+    assert results[1]["cached"] is False
+    assert stats["cache_hits"] == 1
+
+
+def test_cache_lookups_run_off_the_event_loop():
+    graph, _ = fake_graph(cached={"what is zakat?"})
+    request = chat.BatchRequest(items=[chat.BatchItem(message=m) for m in ("what is zakat?", "dua for rain")])
+
+    async def scenario():
+        await chat._run_batch(graph, request, lambda result: None)
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+    assert len(graph.response_cache.threads) == 1
+    assert loop_thread not in graph.response_cache.threads
@@ -0,0 +1,106 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers import chat
+
+
+class SlowApp:
+    """Graph stand-in that awaits like a real LLM call and records overlap"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+
+    async def ainvoke(self, state):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        return {"final_output": {"content": f"answer: {state['query']}", "type": "text"}}
+
+
+def use_graph(monkeypatch, app):
+    async def get_graph():
+        return SimpleNamespace(get_app=lambda: app)
+
+    monkeypatch.setattr(chat, "get_graph", get_graph)
+    return app
+
+
+def api():
+    app = FastAPI()
+    app.include_router(chat.router)
+    return app
+
+
+def test_runs_share_the_event_loop_up_to_the_cap(monkeypatch):
+    graph_app = use_graph(monkeypatch, SlowApp(delay=0.05))
+
+    async def main():
+        monkeypatch.setattr(chat, "chat_semaphore", asyncio.Semaphore(3))
+        transport = httpx.ASGITransport(app=api())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            t0 = time.perf_counter()
+            responses = await asyncio.gather(*(
+                client.post("/chat/", json={"message": f"q{i}", "session_id": f"s{i}"}) for i in range(6)
+            ))
+            return [r.json() for r in responses], time.perf_counter() - t0
+
+    results, elapsed = asyncio.run(main())
+
+    assert graph_app.peak == 3
+    assert elapsed < 6 * graph_app.delay
+    assert [r["response"] for r in results] == [f"answer: q{i}" for i in range(6)]
+    assert results[0] == {"response": "answer: q0", "type": "text", "metadata": None, "session_id": "s0"}
+
+
+@pytest.fixture
+def graph_app(monkeypatch):
+    return use_graph(monkeypatch, SlowApp(delay=0))
+
+
+@pytest.fixture
+def client(graph_app):
+    return TestClient(api())
+
+
+def test_chat_endpoint_creates_a_session(client):
+    body = client.post("/chat/", json={"message": "What is Zakat?"}).json()
+    assert body["response"] == "answer: What is Zakat?"
+    assert body["session_id"]
+
+    again = client.post("/chat/", json={"message": "And Sadaqah?", "session_id": body["session_id"]}).json()
+    assert again["session_id"] == body["session_id"]
+
+
+def test_graph_errors_become_500(client, graph_app, monkeypatch):
+    async def broken(state):
+        raise RuntimeError("graph down")
+
+    monkeypatch.setattr(graph_app, "ainvoke", broken)
+    response = client.post("/chat/", json={"message": "What is Zakat?"})
+    assert response.status_code == 500
+    assert response.json()["detail"] == "Error: graph down"
+
+
+def test_stuck_graph_returns_504_after_the_deadline(monkeypatch):
+    use_graph(monkeypatch, SlowApp(delay=10))
+    client = TestClient(api())
+
+    t0 = time.perf_counter()
+    response = client.post("/chat/", json={"message": "What is Zakat?", "timeout_ms": 0})
+    assert response.status_code == 504
+    assert time.perf_counter() - t0 < 5
@@ -0,0 +1,107 @@
+import asyncio
+import itertools
+import json
+import threading
+import uuid
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("langgraph")
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+import graph
+from routers import chat
+from services.deadline import new_deadline
+from services.metrics import node_timings
+
+ANSWER = "Assalamu alaikum, dear friend. Be patient and trust Allah (Sahih Bukhari 6464). You should pray."
+DUA = {
+    "arabic": "رَبَّنَا آتِنَا فِي الدُّنْيَا حَسَنَةً",
+    "transliteration": "Rabbana atina fid-dunya hasanatan",
+    "translation": "Our Lord, give us in this world that which is good",
+    "source": "Quran 2:201",
+    "context": "A comprehensive dua the Prophet (PBUH) made often.",
+}
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    monkeypatch.setattr(graph, "KB_FAST_PATH_ENABLED", False)
+
+    def use(content):
+        model = GenericFakeChatModel(messages=itertools.repeat(AIMessage(content=content)))
+        monkeypatch.setattr(graph, "llm", model)
+        return model
+    return use
+
+
+def stream(message, intent=None):
+    """[(event, data)] from one /chat/stream run"""
+    if intent:
+        graph.response_cache.set(message, {"intent": intent}, intent="analyzer")
+    session_id = f"test-{uuid.uuid4()}"
+
+    async def collect():
+        return [chunk async for chunk in chat._stream_chat(message, session_id, new_deadline())]
+
+    events = []
+    for chunk in asyncio.run(collect()):
+        assert chunk.endswith("\n\n")
+        event, data = chunk.strip().split("\n")
+        events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+
+def test_ask_hafiz_streams_deltas_then_done(fake_llm):
+    fake_llm(ANSWER)
+    events = stream(f"How can I be more patient? ({uuid.uuid4().hex[:8]})", intent="ask_hafiz")
+    names = [name for name, _ in events]
+
+    assert names[0] == "intent" and events[0][1]["intent"] == "ask_hafiz"
+    assert names[-2:] == ["quality", "done"]
+    deltas = [data["text"] for name, data in events if name == "delta"]
+    assert len(deltas) > 1
+    assert events[-1][1]["type"] == "text"
+    assert events[-1][1]["response"] == "".join(deltas)
+
+
+def test_dua_sends_one_card(fake_llm):
+    fake_llm(json.dumps(DUA, ensure_ascii=False))
+    events = stream(f"Dua for anxiety ({uuid.uuid4().hex[:8]})", intent="dua")
+    names = [name for name, _ in events]
+
+    assert names == ["intent", "card", "quality", "done"]
+    assert events[1][1]["type"] == "dua_card"
+    assert events[-1][1]["type"] == "dua_card"
+
+
+def test_failure_ends_with_error_event(monkeypatch):
+    async def broken(state):
+        raise RuntimeError("analyzer down")
+
+    monkeypatch.setattr(graph, "analyzer_node", broken)
+    assert stream("What is Zakat?") == [("error", {"detail": "Error: analyzer down"})]
+
+
+def test_stream_times_nodes_and_keeps_memory_io_off_the_loop(fake_llm, monkeypatch):
+    fake_llm(ANSWER)
+    threads = {}
+
+    def recording(name, node):
+        def run(state):
+            threads[name] = threading.get_ident()
+            return node(state)
+        return run
+
+    for name in ("load_memory", "update_memory"):
+        monkeypatch.setattr(graph, f"{name}_node", recording(name, getattr(graph, f"{name}_node")))
+    node_timings.reset()
+
+    stream(f"How can I be more patient? ({uuid.uuid4().hex[:8]})", intent="ask_hafiz")
+
+    assert threads and threading.main_thread().ident not in threads.values()
+    timed = node_timings.get_stats()
+    assert {"load_memory", "analyzer", "kb_lookup", "ask_hafiz", "update_memory", "finalizer"} <= set(timed)
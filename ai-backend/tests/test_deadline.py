@@ -0,0 +1,35 @@
+import time
+
+from services import deadline
+from services.deadline import call_timeout, has_budget, new_deadline, remaining
+
+
+def test_new_deadline_uses_the_default_and_caps_requests(monkeypatch):
+    monkeypatch.setenv("CHAT_DEADLINE_MS", "2000")
+    monkeypatch.setenv("CHAT_MAX_DEADLINE_MS", "5000")
+
+    assert 1.9 < remaining(new_deadline()) <= 2.0
+    assert 4.9 < remaining(new_deadline(600000)) <= 5.0
+    assert 0.4 < remaining(new_deadline(500)) <= 0.5
+
+
+def test_without_a_deadline_everything_fits():
+    assert remaining(None) == float("inf")
+    assert has_budget(None, 3600)
+    assert call_timeout(None) == deadline.LLM_CALL_TIMEOUT_S
+
+
+def test_budget_keeps_the_reserve_back():
+    soon = time.monotonic() + (deadline.RESERVE_MS + deadline.MIN_CALL_MS) / 1000 - 0.05
+    assert not has_budget(soon)
+    assert has_budget(time.monotonic() + 5)
+
+    timeout = call_timeout(time.monotonic() + 1.0)
+    assert 0.85 < timeout <= 1.0 - deadline.RESERVE_MS / 1000
+
+
+def test_expired_deadlines_give_zero_timeouts():
+    past = time.monotonic() - 1
+    assert remaining(past) < 0
+    assert call_timeout(past) == 0.0
+    assert not has_budget(past, 0)
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from services.dua_catalogue import DEFAULT_ENTRY_ID, DuaCatalogue, dua_response
+from services.text_index import InvertedIndex, stem, terms
+
+
+def test_stemming_and_terms():
+    assert stem("travelling") == stem("travel")
+    assert stem("nights") == "night"
+    assert stem("worried") == "worry"
+    assert terms("Dua for travelling travel", frozenset({"dua", "for"})) == ["travel"]
+
+
+def test_inverted_index_scores_field_weight_and_coverage():
+    index = InvertedIndex(frozenset({"for"}))
+    index.add(0, [("rain", 3.0), ("weather", 1.0)])
+    index.add(1, [("travel journey", 3.0), ("rain", 1.0)])
+    index.finalize()
+
+    assert index.search("rain")[0] == (0, 1.0)
+    assert [doc for doc, _ in index.search("rain")] == [0, 1]
+    assert index.search("for") == []
+
+    doc, score = index.search("travel to the moon")[0]
+    assert doc == 1 and 0 < score < 1
+
+
+@pytest.fixture(scope="module")
+def catalogue():
+    return DuaCatalogue()
+
+
+@pytest.mark.parametrize("query, entry_id", [
+    ("dua for travelling", "travel"),
+    ("dua for rain", "rain"),
+    ("dua for my exams", "exams"),
+])
+def test_situations_match(catalogue, query, entry_id):
+    assert catalogue.match(query)["id"] == entry_id
+
+
+def test_unrelated_queries_do_not_match(catalogue):
+    assert catalogue.match("how to fix my car") is None
+    assert catalogue.closest("zzzz")["id"] == DEFAULT_ENTRY_ID
+
+
+def test_response_has_the_node_fields(catalogue):
+    response = dua_response(catalogue.match("dua for rain"))
+    assert set(response) == {"arabic", "transliteration", "translation", "source", "context"}
+
+
+def test_missing_catalogue_is_empty(tmp_path):
+    catalogue = DuaCatalogue(path=str(tmp_path / "missing.json"))
+    assert catalogue.match("dua for rain") is None
+    assert catalogue.closest("dua for rain") is None
+
+
+def test_custom_catalogue(tmp_path):
+    path = tmp_path / "duas.json"
+    path.write_text(json.dumps([{
+        "id": "exam", "title": "Before an exam", "situations": ["exam", "test"], "keywords": ["study"],
+        "arabic": "...", "transliteration": "...", "translation": "...", "source": "...", "context": "...",
+    }]))
+    assert DuaCatalogue(path=str(path)).match("dua before my test")["id"] == "exam"
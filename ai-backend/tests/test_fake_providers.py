@@ -0,0 +1,52 @@
+import asyncio
+import json
+import math
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from services.fake_providers import DUA_PAYLOAD, FakeChatModel, HashingEmbeddings
+
+
+def cosine(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+
+def test_hashing_embeddings_are_deterministic_unit_vectors():
+    embedder = HashingEmbeddings(dim=256)
+    a, b = embedder.embed_query("dua for anxiety"), HashingEmbeddings(dim=256).embed_query("dua for anxiety")
+
+    assert a == b and len(a) == 256
+    assert math.isclose(math.sqrt(sum(v * v for v in a)), 1.0)
+    assert asyncio.run(embedder.aembed_query("dua for anxiety")) == a
+
+
+def test_related_texts_are_closer_than_unrelated_ones():
+    embedder = HashingEmbeddings(dim=1024)
+    query = embedder.embed_query("dua for anxiety")
+    assert cosine(query, embedder.embed_query("dua when anxious")) > cosine(query, embedder.embed_query("rules of zakat"))
+
+
+def test_fake_chat_model_answers_per_prompt():
+    model = FakeChatModel(latency_ms=0)
+    message = model.invoke([SystemMessage(content="You give authentic duas."), HumanMessage(content="dua for rain")])
+
+    assert json.loads(message.content) == DUA_PAYLOAD
+    assert model.calls == 1
+
+
+def test_fake_chat_model_latency_is_seeded():
+    def delays(seed):
+        model = FakeChatModel(latency_ms=100, latency_distribution="lognormal", seed=seed)
+        return [model._draw()[0] for _ in range(5)]
+
+    assert delays(1) == delays(1) != delays(2)
+
+
+def test_fake_chat_model_error_rate():
+    model = FakeChatModel(latency_ms=0, error_rate=1.0)
+    with pytest.raises(RuntimeError):
+        model.invoke([HumanMessage(content="hello")])
@@ -0,0 +1,68 @@
+import asyncio
+import time
+
+from services.hedging import HedgePolicy, hedged
+
+
+def policy(monkeypatch, candidates=2, delay="off"):
+    monkeypatch.setenv("HEDGE_CANDIDATES_TEST", str(candidates))
+    monkeypatch.setenv("HEDGE_DELAY_MS_TEST", delay)
+    return HedgePolicy("test")
+
+
+def attempts(plan, log):
+    """attempt(i) sleeps plan[i][0] seconds and returns a candidate scoring plan[i][1] (None raises)"""
+    async def attempt(index):
+        log.append(index)
+        delay, score = plan[index]
+        await asyncio.sleep(delay)
+        if score is None:
+            raise RuntimeError("boom")
+        return {"index": index}, {"score": score, "passed": score >= 0.6}
+    return attempt
+
+
+def test_primary_that_passes_needs_no_backup(monkeypatch):
+    log = []
+    candidate, index = asyncio.run(hedged(policy(monkeypatch), attempts([(0, 0.9), (0, 0.9)], log)))
+    assert index == 0 and log == [0]
+
+
+def test_failed_check_fires_the_backup(monkeypatch):
+    p = policy(monkeypatch)
+    log = []
+    candidate, index = asyncio.run(hedged(p, attempts([(0, 0.3), (0, 0.8)], log)))
+    assert index == 1 and candidate[0] == {"index": 1}
+    assert p.stats["backup"] == 1
+
+
+def test_best_candidate_when_none_pass(monkeypatch):
+    p = policy(monkeypatch, candidates=3)
+    candidate, index = asyncio.run(hedged(p, attempts([(0, 0.2), (0, 0.5), (0, None)], [])))
+    assert index == -1 and candidate[1]["score"] == 0.5
+    assert p.stats["none_passed"] == 1
+
+
+def test_hedge_delay_races_a_slow_primary(monkeypatch):
+    p = policy(monkeypatch, delay="20")
+    log = []
+    t0 = time.monotonic()
+    candidate, index = asyncio.run(hedged(p, attempts([(2.0, 0.9), (0, 0.9)], log)))
+    assert index == 1 and log == [0, 1]
+    assert time.monotonic() - t0 < 1.0
+
+
+def test_no_candidate_without_budget(monkeypatch):
+    p = policy(monkeypatch)
+    log = []
+    result = asyncio.run(hedged(p, attempts([(0, 0.9)], log), deadline=time.monotonic()))
+    assert result == (None, -1) and log == []
+    assert p.stats["no_budget"] == 1
+
+
+def test_p90_delay_follows_observed_latency(monkeypatch):
+    p = policy(monkeypatch, delay="p90")
+    for ms in range(1, 101):
+        p.observe(ms / 1000)
+    assert abs(p.delay_s() - 0.091) < 1e-9
+    assert abs(p.expected_latency_s() - 0.051) < 1e-9
@@ -0,0 +1,67 @@
+import pytest
+
+from services.intent_classifier import MODEL_MAX_CONFIDENCE, IntentClassifier, match_rules
+
+THRESHOLD = 0.85
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    return IntentClassifier()
+
+
+@pytest.mark.parametrize("query", [
+    "Is it permissible to watch TV while fasting?",
+    "can I watch movies in ramadan",
+    "is it haram to listen to music",
+    "what does islam say about youtube",
+    "is youtube allowed in islam",
+])
+def test_fiqh_questions_about_media_are_not_watch_requests(classifier, query):
+    intent, confidence = classifier.classify(query)
+    assert not (intent == "watch" and confidence >= THRESHOLD)
+
+
+@pytest.mark.parametrize("query", [
+    "show me videos about patience",
+    "recommend some lectures on the seerah",
+    "videos explaining tafsir of surah al-mulk",
+    "something to watch about ramadan",
+    "i want to watch a lecture about tawakkul",
+])
+def test_watch_requests_match_rules(query):
+    intent, confidence = match_rules(query)
+    assert intent == "watch" and confidence >= THRESHOLD
+
+
+@pytest.mark.parametrize("query", [
+    "Can I make dua in English during salah?",
+    "Is dua for the deceased allowed?",
+    "is it okay to make dua for a non muslim",
+    "Does dua change destiny?",
+    "why do we raise our hands in dua",
+])
+def test_questions_about_dua_go_to_hafiz(classifier, query):
+    assert classifier.classify(query) == ("ask_hafiz", 0.9)
+
+
+def test_a_reminder_is_not_a_video_request(classifier):
+    intent, confidence = classifier.classify("Share a reminder about patience")
+    assert not (intent == "watch" and confidence >= THRESHOLD)
+    assert match_rules("youtube reminders about death")[0] == "watch"
+
+
+@pytest.mark.parametrize("query", [
+    "dua for travel", "what dua for anxiety", "duas before sleeping",
+    "is there a dua for anxiety", "can you give me a dua for my exams", "what is the best dua for rain",
+    "what do i say when someone sneezes",
+])
+def test_dua_requests_match_rules(query):
+    intent, confidence = match_rules(query)
+    assert intent == "dua" and confidence >= THRESHOLD
+
+
+def test_unmatched_queries_fall_through_to_the_model(classifier):
+    assert match_rules("explain tawakkul") is None
+    intent, confidence = classifier.classify("explain tawakkul")
+    assert intent == "ask_hafiz" and confidence <= MODEL_MAX_CONFIDENCE < THRESHOLD
@@ -0,0 +1,51 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("langgraph")
+
+import graph
+
+MATCH = {"question": "What is Zakat?", "answer": "Zakat is obligatory charity.", "topic": "zakat",
+         "similarity": 0.95}
+
+
+class FakeLookup:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+
+    async def __call__(self, query):
+        self.calls.append(query)
+        await asyncio.sleep(self.delay)
+        return MATCH
+
+
+@pytest.fixture
+def lookup(monkeypatch):
+    fake = FakeLookup()
+    monkeypatch.setattr(graph, "KB_FAST_PATH_ENABLED", True)
+    monkeypatch.setattr(graph.knowledge_base, "lookup", fake)
+    return fake
+
+
+def test_confident_match_is_a_hit(lookup):
+    result = asyncio.run(graph.kb_lookup_node({"query": "what is zakat", "conversation_history": []}))
+    assert result["kb_hit"] is True and lookup.calls == ["what is zakat"]
+
+
+def test_follow_ups_skip_the_fast_path(lookup):
+    history = [{"role": "user", "content": "tell me about charity"}, {"role": "assistant", "content": "..."}]
+    result = asyncio.run(graph.kb_lookup_node({"query": "what is zakat", "conversation_history": history}))
+    assert result == {"kb_hit": False} and lookup.calls == []
+
+
+def test_lookup_past_the_deadline_is_a_miss(lookup):
+    lookup.delay = 5.0
+    state = {"query": "what is zakat", "conversation_history": [], "deadline": time.monotonic() + 0.3}
+
+    t0 = time.monotonic()
+    result = asyncio.run(graph.kb_lookup_node(state))
+    assert result == {"kb_hit": False}
+    assert time.monotonic() - t0 < 1.0
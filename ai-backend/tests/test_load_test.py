@@ -0,0 +1,80 @@
+import argparse
+import asyncio
+import random
+
+import pytest
+
+from benchmarks import load_test
+from services.metrics import NodeTimings
+
+BY_INTENT = {
+    "dua": ["dua for anxiety", "dua before sleep"],
+    "ask_hafiz": ["what is zakat", "how do I pray witr"],
+    "watch": ["videos about patience"],
+}
+
+
+def test_percentile():
+    values = [0.1 * i for i in range(1, 101)]
+    assert load_test.percentile(values, 50) == pytest.approx(5.1)
+    assert load_test.percentile(values, 99) == pytest.approx(10.0)
+    assert load_test.percentile([], 95) == 0.0
+
+
+def test_parse_mix():
+    assert load_test.parse_mix("dua=0.3, ask_hafiz=0.5,watch=0.2") == {"dua": 0.3, "ask_hafiz": 0.5, "watch": 0.2}
+
+
+def test_workload_without_repeats_is_all_unique():
+    workload = load_test.build_workload(BY_INTENT, {"dua": 1, "ask_hafiz": 1}, 50, 0.0, random.Random(0), "t")
+    assert len(workload) == 50
+    assert len({query for _, query in workload}) == 50
+    assert {intent for intent, _ in workload} <= {"dua", "ask_hafiz"}
+    assert all(query.split(" (t-")[0] in BY_INTENT[intent] for intent, query in workload)
+
+
+def test_workload_repeats_earlier_queries():
+    workload = load_test.build_workload(BY_INTENT, {"watch": 1}, 20, 1.0, random.Random(0), "t")
+    assert len({query for _, query in workload}) == 1
+
+
+def test_workload_is_reproducible_per_seed():
+    build = lambda seed: load_test.build_workload(BY_INTENT, load_test.parse_mix("dua=1,watch=1"), 30, 0.5, random.Random(seed), "t")
+    assert build(7) == build(7)
+    assert build(7) != build(8)
+
+
+def test_node_timings_share_and_reset():
+    timings = NodeTimings()
+    timings.record("analyzer", 0.1)
+    timings.record("ask_hafiz", 0.2)
+    timings.record("ask_hafiz", 0.1)
+
+    stats = timings.get_stats()
+    assert stats["ask_hafiz"]["count"] == 2
+    assert stats["ask_hafiz"]["mean_ms"] == pytest.approx(150)
+    assert stats["ask_hafiz"]["max_s"] == pytest.approx(0.2)
+    assert stats["analyzer"]["share"] == pytest.approx(0.25)
+
+    timings.reset()
+    assert timings.get_stats() == {}
+
+
+def test_in_process_run_reports_latency_cache_and_nodes(monkeypatch):
+    pytest.importorskip("httpx")
+    pytest.importorskip("langgraph")
+    import graph
+    from services.fake_providers import FakeChatModel
+
+    monkeypatch.setattr(graph, "llm", FakeChatModel(latency_ms=0))
+    args = argparse.Namespace(
+        url=None, concurrency=4, requests=12, warmup=1, mix="dua=1,ask_hafiz=1,watch=1",
+        repeat_ratio=0.5, data=load_test.DEFAULT_DATA, seed=0,
+    )
+    result = asyncio.run(load_test.run(args))
+
+    assert result["errors"] == 0
+    assert result["latency"]["count"] == 12
+    assert result["cache"]["hits"] + result["cache"]["misses"] > 0
+    assert "load_memory" in result["nodes"]
+    assert sum(node["share"] for node in result["nodes"].values()) == pytest.approx(1.0)
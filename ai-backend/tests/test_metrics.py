@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from services.metrics import CallbackCounter, Registry, llm_calls, node_timings, timed_llm_call, timed_node
+
+
+def test_prometheus_text_format():
+    registry = Registry()
+    requests = registry.counter("test_requests_total", "Requests", ["node", "outcome"])
+    latency = registry.histogram("test_latency_seconds", "Latency", ["node"], buckets=(0.1, 1.0))
+    requests.inc("analyzer", "ok")
+    requests.inc("analyzer", "ok", amount=2)
+    latency.observe(0.05, "analyzer")
+    latency.observe(0.5, "analyzer")
+    registry.register(CallbackCounter("test_hits_total", "Hits", ["tier"], lambda: {("l1",): 7}))
+
+    lines = registry.render().splitlines()
+    assert "# TYPE test_requests_total counter" in lines
+    assert 'test_requests_total{node="analyzer",outcome="ok"} 3' in lines
+    assert 'test_latency_seconds_bucket{node="analyzer",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{node="analyzer",le="1"} 2' in lines
+    assert 'test_latency_seconds_bucket{node="analyzer",le="+Inf"} 2' in lines
+    assert 'test_latency_seconds_count{node="analyzer"} 2' in lines
+    assert 'test_hits_total{tier="l1"} 7' in lines
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    registry.counter("test_escape_total", "Escaping", ["query"]).inc('say "hi"\n')
+    assert 'test_escape_total{query="say \\"hi\\"\\n"} 1' in registry.render()
+
+
+def test_timed_node_records_sync_and_async_nodes():
+    node_timings.reset()
+
+    async def async_node(state):
+        return {"x": 1}
+
+    assert timed_node("test_sync", lambda state: {"y": 2})({}) == {"y": 2}
+    assert asyncio.run(timed_node("test_async", async_node)({})) == {"x": 1}
+
+    stats = node_timings.get_stats()
+    assert stats["test_sync"]["count"] == 1 and stats["test_async"]["count"] == 1
+    assert abs(sum(node["share"] for node in stats.values()) - 1.0) < 1e-9
+
+
+def test_timed_llm_call_counts_outcomes():
+    async def slow():
+        await asyncio.sleep(1)
+
+    async def broken():
+        raise RuntimeError("quota")
+
+    async def ok():
+        return "fine"
+
+    before = llm_calls.samples()
+    assert asyncio.run(timed_llm_call("test_node", ok)) == "fine"
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(timed_llm_call("test_node", slow, timeout=0.01))
+    with pytest.raises(RuntimeError):
+        asyncio.run(timed_llm_call("test_node", broken))
+
+    after = llm_calls.samples()
+    for outcome in ("ok", "timeout", "error"):
+        key = ("test_node", outcome)
+        assert after[key] - before.get(key, 0) == 1
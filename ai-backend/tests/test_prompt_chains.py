@@ -0,0 +1,52 @@
+import pytest
+
+pytest.importorskip("langgraph")
+
+import graph
+from services.fake_providers import FakeChatModel
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    model = FakeChatModel(latency_ms=0)
+    monkeypatch.setattr(graph, "llm", model)
+    return model
+
+
+def test_chains_are_built_once_per_llm(fake_llm):
+    chain = graph.get_chain("ask_hafiz")
+    assert graph.get_chain("ask_hafiz") is chain
+    assert graph.get_chain("analyzer") is not chain
+
+
+def test_chains_rebuilt_when_llm_changes(fake_llm, monkeypatch):
+    chain = graph.get_chain("ask_hafiz")
+    monkeypatch.setattr(graph, "llm", FakeChatModel(latency_ms=0))
+    assert graph.get_chain("ask_hafiz") is not chain
+
+
+def test_history_messages_keeps_window_and_maps_roles():
+    history = []
+    for i in range(10):
+        history.append({"role": "user", "content": f"q{i}"})
+        history.append({"role": "assistant", "content": f"a{i}"})
+
+    messages = graph.history_messages(history)
+    assert len(messages) == graph.HISTORY_WINDOW
+    assert messages[0] == ("human", f"q{10 - graph.HISTORY_WINDOW // 2}")
+    assert messages[-1] == ("assistant", "a9")
+
+
+def test_history_braces_are_not_template_variables(fake_llm):
+    history = [
+        {"role": "user", "content": "What is {sabr}?"},
+        {"role": "assistant", "content": "Patience {in hardship}."},
+    ]
+    prompt = graph.get_chain("ask_hafiz").first.invoke({
+        "history": graph.history_messages(history),
+        "query": "And {shukr}?",
+        "quality_reminder": "",
+        "output_format": graph.HAFIZ_JSON_FORMAT,
+    })
+    contents = [message.content for message in prompt.to_messages()]
+    assert contents[1:] == ["What is {sabr}?", "Patience {in hardship}.", "And {shukr}?"]
@@ -0,0 +1,34 @@
+import pytest
+
+from services.query_normalizer import normalize_query
+from services.response_cache import ResponseCache
+
+
+@pytest.mark.parametrize("variants", [
+    ["Ayatul Kursi?", "ayat al-kursi", "  AYAT UL KURSI "],
+    ["Du'a for Laylatul Qadr", "doa for lailatul qadr!", "dua for the laylat-al-qadr"],
+    ["what is zakah", "What is Zakat?", "please, what is zakaat"],
+    ["آيَةُ الْكُرْسِيّ", "أية الكرسي"],
+])
+def test_spelling_variants_share_one_form(variants):
+    assert len({normalize_query(v) for v in variants}) == 1
+
+
+@pytest.mark.parametrize("a, b", [
+    ("dua for fajr", "dua for asr"),
+    ("what is zakat", "who must pay zakat"),
+    ("dua before eating", "dua after eating"),
+])
+def test_different_questions_stay_apart(a, b):
+    assert normalize_query(a) != normalize_query(b)
+
+
+def test_only_fillers_falls_back_to_the_raw_query():
+    assert normalize_query("  Thanks ") == "thanks"
+
+
+def test_cache_keys_use_the_normalized_query(monkeypatch):
+    monkeypatch.setenv("CACHE_NORMALIZE_QUERIES", "true")
+    cache = ResponseCache()
+    cache.set("Ayatul Kursi?", {"text": "..."}, intent="ask_hafiz")
+    assert cache.get("ayat al-kursi", intent="ask_hafiz") == {"text": "..."}
@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+from services.response_cache import ENTRY_OVERHEAD_BYTES, ResponseCache
+
+
+def make_cache(**kwargs):
+    kwargs.setdefault("max_bytes", 10 * 1024 * 1024)
+    return ResponseCache(**kwargs)
+
+
+def cached(cache, query, intent=""):
+    return cache._make_key(query, intent) in cache._entries
+
+
+def test_get_set_per_intent():
+    cache = make_cache()
+    cache.set("What is Zakat?", {"text": "charity"}, intent="ask_hafiz")
+
+    assert cache.get("what is zakat?", intent="ask_hafiz") == {"text": "charity"}
+    assert cache.get("what is zakat", intent="dua") is None
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1
+
+
+def test_entries_expire_after_their_intent_ttl():
+    cache = make_cache(ttls={"watch": 60})
+    cache.set("videos about patience", {"videos": []}, intent="watch")
+    cache._entries[cache._make_key("videos about patience", "watch")].expires_at = time.time() - 1
+
+    assert cache.get("videos about patience", intent="watch") is None
+    assert cache.stats["expired"] == 1 and len(cache) == 0
+
+
+def test_byte_budget_evicts_least_recently_used():
+    payload = {"text": "x" * 1000}
+    entry_size = make_cache()._entry_size("0" * 32, payload)
+    cache = make_cache(max_bytes=3 * entry_size)
+    for query in ("a", "b", "c"):
+        cache.set(query, payload)
+    cache.get("a")  # b is now the least recently used
+    cache.set("d", payload)
+
+    assert not cached(cache, "b")
+    assert all(cached(cache, q) for q in ("a", "c", "d"))
+    assert cache.bytes_used <= cache.max_bytes and cache.stats["evictions"] == 1
+
+
+def test_oversized_entries_are_skipped():
+    cache = make_cache(max_bytes=ENTRY_OVERHEAD_BYTES + 100)
+    cache.set("q", {"text": "x" * 500})
+    assert len(cache) == 0
+
+
+def test_invalidate_by_query_and_intent():
+    cache = make_cache()
+    cache.set("dua for rain", {"arabic": "..."}, intent="dua")
+    cache.set("dua for travel", {"arabic": "..."}, intent="dua")
+    cache.set("what is zakat", {"text": "charity"}, intent="ask_hafiz")
+
+    assert cache.invalidate("dua for rain", intent="dua") == 1
+    assert cache.invalidate(intent="dua") == 1
+    assert len(cache) == 1 and cached(cache, "what is zakat", intent="ask_hafiz")
+
+
+class SlowSemantic:
+    def __init__(self, delay):
+        self.delay = delay
+
+    async def lookup(self, query, intent):
+        await asyncio.sleep(self.delay)
+        return "never"
+
+    def discard(self, keys):
+        pass
+
+
+def test_slow_semantic_lookup_is_a_miss():
+    cache = make_cache()
+    cache.semantic = SlowSemantic(delay=5.0)
+    cache.semantic_timeout = 0.05
+
+    t0 = time.monotonic()
+    assert asyncio.run(cache.aget("dua for anxiety", intent="dua")) is None
+    assert time.monotonic() - t0 < 1.0
+    assert cache.stats["semantic_timeouts"] == 1
+
+
+def test_semantic_lookup_respects_the_request_deadline():
+    cache = make_cache()
+    cache.semantic = SlowSemantic(delay=5.0)
+
+    t0 = time.monotonic()
+    assert asyncio.run(cache.aget("dua for anxiety", intent="dua", deadline=time.monotonic() + 0.2)) is None
+    assert time.monotonic() - t0 < 1.0
+
+
+def test_peek_leaves_stats_and_lru_order_alone():
+    payload = {"text": "x" * 1000}
+    entry_size = make_cache()._entry_size("0" * 32, payload)
+    cache = make_cache(max_bytes=2 * entry_size)
+    cache.set("a", payload)
+    cache.set("b", payload)
+
+    assert cache.peek("a") == payload and cache.peek("missing") is None
+    assert cache.stats["hits"] == cache.stats["misses"] == 0
+
+    cache.set("c", payload)  # a is still the least recently used
+    assert not cached(cache, "a") and cached(cache, "b")
@@ -0,0 +1,24 @@
+from response_evaluator import MIN_PARALLEL_BATCH, ResponseEvaluator
+
+TEXT = {"text": "Assalamu alaikum. The Quran says in Surah Al-Baqarah that Allah is with the patient. " * 3}
+
+
+def test_batch_matches_per_item_scores():
+    evaluator = ResponseEvaluator()
+    responses = [TEXT, {"text": "ok"}] * 10
+    intents = ["ask_hafiz"] * len(responses)
+
+    assert evaluator.evaluate_batch(responses, intents, workers=1) == [
+        evaluator.evaluate(r, i, "") for r, i in zip(responses, intents)
+    ]
+
+
+def test_pool_workers_use_the_calling_evaluator():
+    strict = ResponseEvaluator()
+    strict.quality_thresholds = {"dua": 1.01, "text": 1.01, "video": 1.01}
+    responses = [TEXT] * MIN_PARALLEL_BATCH
+
+    results = strict.evaluate_batch(responses, ["ask_hafiz"] * len(responses), workers=2)
+
+    assert len(results) == MIN_PARALLEL_BATCH
+    assert not any(result["passed"] for result in results)
@@ -0,0 +1,56 @@
+import asyncio
+import warnings
+
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_community")
+
+from services.semantic_cache import SemanticCache
+
+VECTORS = {
+    "dua for anxiety": [3.0, 4.0, 0.0],
+    "dua when anxious": [6.1, 7.9, 0.2],  # same direction, twice the length
+    "dua for rain": [0.0, 0.0, 5.0],
+}
+
+
+class FixedEmbeddings:
+    async def aembed_query(self, text):
+        return VECTORS[text]
+
+    def embed_query(self, text):
+        return VECTORS[text]
+
+
+def test_similar_queries_share_a_key_without_faiss_warnings():
+    cache = SemanticCache(embedder=FixedEmbeddings(), threshold=0.9, intents=["dua"])
+
+    async def scenario():
+        await cache.add("dua for anxiety", "key-anxiety", "dua")
+        return await cache.lookup("dua when anxious", "dua"), await cache.lookup("dua for rain", "dua")
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        similar, unrelated = asyncio.run(scenario())
+
+    assert similar == "key-anxiety"
+    assert unrelated is None
+
+
+def test_discarded_keys_stop_matching():
+    cache = SemanticCache(embedder=FixedEmbeddings(), threshold=0.9, intents=["dua"])
+    asyncio.run(cache.add("dua for anxiety", "key-anxiety", "dua"))
+    cache.discard(["key-anxiety"])
+
+    assert asyncio.run(cache.lookup("dua when anxious", "dua")) is None
+
+
+def test_queries_are_embedded_in_normalized_form():
+    cache = SemanticCache(embedder=FixedEmbeddings(), threshold=0.9, intents=["dua"])
+
+    async def scenario():
+        await cache.add("Duaa for anxiety??", "key-anxiety", "dua")
+        return await cache.lookup("Dua when  Anxious?", "dua")
+
+    assert asyncio.run(scenario()) == "key-anxiety"
@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+
+from services.session_store import SessionStore, SQLiteSessionBackend
+
+
+def turn(i):
+    return [{"role": "user", "content": f"q{i}"}, {"role": "assistant", "content": f"a{i}"}]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    def make(**kwargs):
+        backend = SQLiteSessionBackend(tmp_path / "sessions.sqlite") if request.param == "sqlite" else None
+        return SessionStore(backend=backend, **kwargs)
+    return make
+
+
+def age(store, session_id, seconds):
+    """Pretend session_id was last active seconds earlier"""
+    if store.backend is not None:
+        conn = store.backend._conn()
+        with conn:
+            conn.execute("UPDATE sessions SET last_active = last_active - ? WHERE session_id = ?", (seconds, session_id))
+    else:
+        store._sessions[session_id].last_active -= seconds
+
+
+def test_history_is_a_ring(make_store):
+    store = make_store(history_size=4)
+    for i in range(3):
+        store.append("s", turn(i))
+
+    assert [m["content"] for m in store.get("s")] == ["q1", "a1", "q2", "a2"]
+    assert store.get("unknown") == []
+
+
+def test_max_sessions_evicts_least_recently_used(make_store):
+    store = make_store(max_sessions=2)
+    store.append("a", turn(0))
+    store.append("b", turn(0))
+    age(store, "a", 5)
+    age(store, "b", 10)
+    store.append("a", turn(1))  # a is now the most recent
+    store.append("c", turn(0))
+
+    assert "b" not in store
+    assert "a" in store and "c" in store
+    assert len(store) == 2 and store.get_stats()["evicted"] == 1
+
+
+def test_idle_sessions_are_not_returned(make_store):
+    store = make_store(idle_ttl=60)
+    store.append("s", turn(0))
+    age(store, "s", 120)
+
+    assert store.get("s") == []
+    assert "s" not in store
+    store.cleanup_idle()
+    assert len(store) == 0
+
+
+def test_replace_and_delete(make_store):
+    store = make_store(history_size=2)
+    store.replace("s", turn(0) + turn(1))
+    assert [m["content"] for m in store.get("s")] == ["q1", "a1"]
+
+    assert store.delete("s") is True
+    assert store.get("s") == [] and store.delete("s") is False
+
+
+def test_concurrent_appends_keep_every_message(make_store):
+    store = make_store(history_size=400)
+    threads = [threading.Thread(target=lambda i=i: [store.append("s", turn(i * 50 + j)) for j in range(50)])
+               for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(store.get("s")) == 400
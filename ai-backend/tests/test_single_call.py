@@ -0,0 +1,105 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+
+pytest.importorskip("langgraph")
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+import graph
+
+ANSWER = (
+    "Assalamu alaikum, dear friend. The Prophet (PBUH) taught us that the most beloved deeds to Allah "
+    "are those done consistently, even if small (Sahih Bukhari 6464). You should try to build one small "
+    "habit today.\n\nMay Allah make it easy for you."
+)
+
+
+class Replies:
+    """Endless canned replies for GenericFakeChatModel, counting LLM calls"""
+
+    def __init__(self, content, error=None):
+        self.content = content
+        self.error = error
+        self.calls = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return AIMessage(content=self.content)
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    replies = Replies(json.dumps({"intent": "ask_hafiz", "payload": {"text": ANSWER}}))
+    monkeypatch.setattr(graph, "llm", GenericFakeChatModel(messages=replies))
+    monkeypatch.setattr(graph, "LOCAL_INTENT_ENABLED", False)
+    return replies
+
+
+def unique(query):
+    # The response cache is process-wide; keep each test's queries apart
+    return f"{query} ({uuid.uuid4().hex[:8]})"
+
+
+def classify(query, history=None):
+    return asyncio.run(graph.classify_and_answer_node({
+        "query": query,
+        "conversation_history": history or [],
+    }))
+
+
+def test_one_call_returns_intent_and_payload(fake_llm):
+    query = unique("How can I be more patient?")
+    result = classify(query)
+
+    assert fake_llm.calls == 1
+    assert result["payload_ready"] is True
+    assert result["intent"] == "ask_hafiz"
+    assert result["response"]["text"] == ANSWER
+    assert graph.response_cache.get(query, intent="analyzer") == {"intent": "ask_hafiz"}
+
+
+def test_cached_intent_skips_the_llm(fake_llm):
+    query = unique("Dua before sleeping")
+    graph.response_cache.set(query, {"intent": "dua"}, intent="analyzer")
+
+    assert classify(query) == {"intent": "dua", "payload_ready": False}
+    assert fake_llm.calls == 0
+
+
+def test_confident_local_intent_skips_the_llm(fake_llm, monkeypatch):
+    monkeypatch.setattr(graph, "LOCAL_INTENT_ENABLED", True)
+    monkeypatch.setattr(graph, "INTENT_CONFIDENCE_THRESHOLD", 0.0)
+
+    result = classify(unique("What is the wisdom behind fasting?"))
+    assert result == {"intent": "ask_hafiz", "payload_ready": False}
+    assert fake_llm.calls == 0
+
+
+def test_llm_error_falls_back_to_two_step(monkeypatch):
+    monkeypatch.setattr(graph, "LOCAL_INTENT_ENABLED", False)
+    monkeypatch.setattr(graph, "llm", GenericFakeChatModel(messages=Replies("", error=RuntimeError("down"))))
+    assert classify(unique("How can I be more patient?")) == {"intent": "ask_hafiz", "payload_ready": False}
+
+
+def test_single_call_graph_answers_in_one_llm_call(fake_llm):
+    result = asyncio.run(graph.get_app("single_call").ainvoke({
+        "query": unique("How can I be more patient?"),
+        "session_id": f"test-{uuid.uuid4()}",
+    }))
+
+    assert fake_llm.calls == 1
+    assert result["final_output"]["type"] == "text"
+    assert result["final_output"]["content"] == ANSWER
+
+
+def test_unknown_mode_runs_two_step():
+    assert graph.get_app("bogus") is graph.get_app("two_step")
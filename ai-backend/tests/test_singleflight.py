@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from services.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_computation():
+    flight = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("key", compute) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ["answer"] * 5
+    assert len(calls) == 1
+    assert flight.get_stats() == {"leaders": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_different_keys_and_later_calls_run_again():
+    flight = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return len(calls)
+
+    async def scenario():
+        both = await asyncio.gather(flight.do("a", compute), flight.do("b", compute))
+        return both, await flight.do("a", compute)
+
+    assert asyncio.run(scenario()) == ([1, 2], 3)
+
+
+def test_errors_reach_every_caller():
+    flight = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("provider down")
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("key", compute) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    flight = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def scenario():
+        leader = asyncio.ensure_future(flight.do("key", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("key", compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == "answer"
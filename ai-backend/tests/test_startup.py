@@ -0,0 +1,60 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("langgraph")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_fresh(code, **env):
+    """Run code in a new interpreter (startup state is per process), return its last stdout line as JSON"""
+    env = {**os.environ, "LLM_PROVIDER": "fake", "EMBEDDINGS_PROVIDER": "hashing",
+           "STARTUP_WARMUP": "false", "CACHE_WARMUP_ON_STARTUP": "false", **env}
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def test_importing_main_does_not_load_the_graph():
+    loaded = run_fresh(
+        "import json, sys, main\n"
+        "from services import startup\n"
+        "print(json.dumps({'modules': [m for m in ('graph', 'langgraph', 'langchain_core') if m in sys.modules],"
+        " 'status': startup.status()['status']}))"
+    )
+    assert loaded == {"modules": [], "status": "cold"}
+
+
+def test_warm_up_records_each_step():
+    status = run_fresh("import json\nfrom services import startup\nstartup.warm_up()\nprint(json.dumps(startup.status()))")
+    assert status["status"] == "ready" and status["errors"] == {}
+    assert {"import_graph", "llm_client", "compile_graph", "total"} <= set(status["timings_ms"])
+
+
+def test_missing_api_key_leaves_the_worker_degraded():
+    status = run_fresh(
+        "import json\nfrom services import startup\nstartup.warm_up()\nprint(json.dumps(startup.status()))",
+        LLM_PROVIDER="gemini", GEMINI_API_KEY=""
+    )
+    assert status["status"] == "degraded" and "llm_client" in status["errors"]
+
+
+def test_lifespan_starts_the_graph_warm_up_without_deprecated_hooks():
+    status = run_fresh(
+        "import json, time, warnings\n"
+        "warnings.simplefilter('error', DeprecationWarning)\n"
+        "import main\n"
+        "from fastapi.testclient import TestClient\n"
+        "from services import startup\n"
+        "with TestClient(main.app):\n"
+        "    while startup.status()['status'] in ('cold', 'warming'):\n"
+        "        time.sleep(0.01)\n"
+        "print(json.dumps(startup.status()))",
+        STARTUP_WARMUP="true"
+    )
+    assert status["status"] == "ready"
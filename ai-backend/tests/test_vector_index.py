@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+faiss = pytest.importorskip("faiss")
+np = pytest.importorskip("numpy")
+pytest.importorskip("langchain_community")
+
+from langchain_community.vectorstores import FAISS
+
+from services.fake_providers import HashingEmbeddings
+from services.knowledge_base import KnowledgeBase
+from services.vector_index import build_index, compact, factory_string, load_store, read_meta, truncate
+
+
+def unit_vectors(n, d, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((n, d)).astype("float32")
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def test_truncate_renormalizes():
+    vectors = truncate(unit_vectors(4, 32), 8)
+    assert vectors.shape == (4, 8)
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-5)
+
+
+def test_factory_strings_fit_the_corpus():
+    assert factory_string("flat", 64, 10) == "Flat"
+    assert factory_string("pq", 64, 1000) == "PQ4x8"
+    assert factory_string("ivf", 64, 100) == "IVF2,Flat"
+    with pytest.raises(ValueError):
+        factory_string("annoy", 64, 10)
+
+
+@pytest.mark.parametrize("kind", ["fp16", "sq8", "hnsw"])
+def test_compact_indexes_find_the_exact_neighbour(kind):
+    vectors = unit_vectors(200, 32)
+    index, meta = build_index(vectors, kind)
+    _, ids = index.search(vectors[:10], 1)
+
+    assert meta["type"] == kind and index.ntotal == 200
+    assert (ids[:, 0] == np.arange(10)).mean() >= 0.9
+
+
+def test_compact_copy_loads_memory_mapped(tmp_path):
+    embedder = HashingEmbeddings(dim=64)
+    texts = [f"question {i} about zakat and fasting" for i in range(50)]
+    FAISS.from_texts(texts, embedder, metadatas=[{"i": i} for i in range(50)]).save_local(str(tmp_path / "flat"))
+
+    meta = compact(tmp_path / "flat", tmp_path / "sq8-32", "sq8", dims=32)
+    assert meta["dims"] == 32 and read_meta(tmp_path / "sq8-32")["factory"] == "SQ8"
+    with pytest.raises(ValueError):
+        compact(tmp_path / "sq8-32", tmp_path / "again", "sq8")
+
+    store, loaded_meta = load_store(tmp_path / "sq8-32", embedder)
+    assert store.index.ntotal == 50 and loaded_meta["dims"] == 32
+
+
+def test_knowledge_base_searches_a_truncated_index(tmp_path):
+    embedder = HashingEmbeddings(dim=64)
+    texts = [f"Topic: t{i}\nQuestion: q{i}\nAnswer: answer number {i} about topic {i}" for i in range(20)]
+    FAISS.from_texts(texts, embedder, metadatas=[{"question": f"q{i}"} for i in range(20)]).save_local(str(tmp_path / "flat"))
+    compact(tmp_path / "flat", tmp_path / "fp16-48", "fp16", dims=48)
+
+    kb = KnowledgeBase(path=str(tmp_path / "fp16-48"), embedder=embedder)
+    match = asyncio.run(kb.search(texts[7].lower()))
+    assert match["question"] == "q7" and match["answer"] == "answer number 7 about topic 7"
+    assert match["similarity"] > 0.99
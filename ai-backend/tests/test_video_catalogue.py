@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from services.video_catalogue import VideoCatalogue, video_response
+
+VIDEOS = [
+    {"video_id": "a1", "title": "Patience in Hard Times", "channel": "Omar Suleiman", "duration": "24:10",
+     "tags": ["sabr", "patience", "hardship"]},
+    {"video_id": "a2", "title": "The Beauty of Patience", "channel": "Mufti Menk", "duration": "12:03",
+     "tags": ["patience", "sabr"]},
+    {"video_id": "b1", "title": "Tafsir of Surah Al-Kahf", "channel": "Nouman Ali Khan", "duration": "45:00",
+     "tags": ["kahf", "tafsir", "quran"]},
+    {"video_id": "x1", "title": "Patience Hacks", "channel": "Random Vlogger", "duration": "05:00",
+     "tags": ["patience"]},
+    {"video_id": "", "title": "Patience without an id", "channel": "Mufti Menk", "duration": "01:00"},
+]
+
+
+@pytest.fixture
+def catalogue(tmp_path):
+    path = tmp_path / "videos.json"
+    path.write_text(json.dumps(VIDEOS))
+    return VideoCatalogue(path=str(path))
+
+
+def test_only_complete_trusted_entries_are_loaded(catalogue):
+    catalogue.search("patience")
+    assert {e["video_id"] for e in catalogue.entries} == {"a1", "a2", "b1"}
+
+
+def test_candidates_need_two_confident_matches(catalogue):
+    assert {e["video_id"] for e in catalogue.candidates("show me lectures about patience")} == {"a1", "a2"}
+    assert catalogue.candidates("videos on surah kahf") == []
+    assert catalogue.get_stats()["hits"] == 1
+
+
+def test_closest_ranks_at_any_score(catalogue):
+    assert catalogue.closest("surah kahf")[0]["video_id"] == "b1"
+
+
+def test_response_links_the_thumbnail():
+    response = video_response(VIDEOS[0])
+    assert response["thumbnail"] == "https://i.ytimg.com/vi/a1/hqdefault.jpg"
+    assert set(response) == {"title", "channel", "thumbnail", "duration"}
+
+
+def test_missing_catalogue_is_empty(tmp_path):
+    catalogue = VideoCatalogue(path=str(tmp_path / "missing.json"))
+    assert catalogue.candidates("patience") == [] and catalogue.closest("patience") == []
@@ -0,0 +1,68 @@
+"""
+Warm the Response Cache
+
+Precomputes answers for the top logged queries and the knowledge base
+questions into the shared SQLite cache (CACHE_BACKEND=sqlite), so every
+worker starts a deploy with a warm cache. Entries with more than
+--refresh-within seconds of TTL left are skipped, so it is cheap to rerun
+from a cron job or deploy step.
+
+Usage:
+    CACHE_BACKEND=sqlite python warm_cache.py
+    CACHE_BACKEND=sqlite python warm_cache.py --queries top_queries.jsonl --top 500 --rate 5
+    python warm_cache.py --dry-run   # what would be warmed / refreshed
+"""
+
+import argparse
+import asyncio
+import json
+import os
+
+from dotenv import load_dotenv
+
+from services.cache_warmer import (
+    DEFAULT_CONCURRENCY, DEFAULT_RATE, DEFAULT_REFRESH_WITHIN, DEFAULT_TOP, warm, warmup_queries
+)
+
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute popular answers into the response cache")
+    parser.add_argument("--queries", help="Top logged queries: JSONL with query/count, or one query per line")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help="Most popular logged queries to use")
+    parser.add_argument("--no-kb", action="store_true", help="Skip the knowledge base questions")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Graph runs in flight")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Graph runs started per second (0 = unlimited)")
+    parser.add_argument("--refresh-within", type=float, default=DEFAULT_REFRESH_WITHIN,
+                        help="Regenerate entries with less than this many seconds of TTL left")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be generated")
+    parser.add_argument("--out", help="Write the summary as JSON")
+    args = parser.parse_args()
+
+    if os.getenv("CACHE_BACKEND", "memory") != "sqlite" and not args.dry_run:
+        print("✗ ERROR: CACHE_BACKEND=sqlite is required; an in-memory cache is lost when this process exits")
+        print("  (set CACHE_WARMUP_ON_STARTUP=true to warm a memory-only server instead)")
+        exit(1)
+
+    queries = warmup_queries(args.queries, args.top, include_kb=not args.no_kb)
+    print(f"✓ {len(queries)} unique queries to check")
+
+    stats = asyncio.run(warm(
+        queries,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        refresh_within=args.refresh_within,
+        dry_run=args.dry_run
+    ))
+
+    print(f"\n✓ Done in {stats['elapsed_s']}s: {stats['warmed']} warmed, {stats['refreshed']} refreshed, "
+          f"{stats['fresh']} already fresh, {stats['kb']} answered by the KB, {stats['uncached']} not cacheable, {stats['failed']} failed")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(stats, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()